@@ -2,15 +2,20 @@
 
 import os
 
-from flask import Flask
+from flask import Flask, g
 
 import CS235Flix.adapters.repository as repo
-from CS235Flix.adapters import memory_repository, database_repository
+from CS235Flix.adapters import memory_repository, database_repository, snapshot
+from CS235Flix.adapters.bulk_loader import load_in_progress
+from CS235Flix.adapters.catalogue import MovieCatalogue
+from CS235Flix.adapters.connection_pool import PoolMetrics, engine_pool_arguments
+from CS235Flix.adapters.cover_art import CoverArtCache, ImdbCoverArtProvider, LocalCoverArtProvider
 from CS235Flix.adapters.orm import metadata, map_model_to_tables
+from CS235Flix.utilities.response_cache import ResponseCache, create_backend
+from CS235Flix.utilities.sidebar import SidebarProvider
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, clear_mappers
-from sqlalchemy.pool import NullPool
 
 
 def create_app(test_config=None):
@@ -28,10 +33,24 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
+    def log_hashing_progress(done, total):
+        app.logger.info("Hashed %d of %d passwords", done, total)
+
     if app.config['REPOSITORY'] == 'memory':
         # Create the MemoryRepository implementation for a memory-based repository.
-        repo.repo_instance = memory_repository.MemoryRepository()
-        memory_repository.populate(data_path, repo.repo_instance)
+        def populate_memory_repository(path, memory_repo):
+            timings = memory_repository.populate(path, memory_repo, app.config['POPULATE_WORKERS'],
+                                                 app.config['PASSWORDS_PRE_HASHED'], log_hashing_progress)
+            app.logger.info("Populated memory repository: %s",
+                            ", ".join("{} {:.3f}s".format(stage, seconds) for stage, seconds in timings.items()))
+
+        if app.config.get('MEMORY_SNAPSHOT_PATH'):
+            # Restore the repository from its snapshot, or populate it and write the snapshot for the next start
+            repo.repo_instance = snapshot.load_or_populate(data_path, app.config['MEMORY_SNAPSHOT_PATH'],
+                                                           populate_memory_repository)
+        else:
+            repo.repo_instance = memory_repository.MemoryRepository()
+            populate_memory_repository(data_path, repo.repo_instance)
 
     elif app.config['REPOSITORY'] == 'database':
         # Configure database
@@ -43,31 +62,94 @@ def create_app(test_config=None):
         # Note that create_engine does not establish any actual DB connection directly!
 
         database_echo = app.config['SQLALCHEMY_ECHO']
-        database_engine = create_engine(database_uri, connect_args={"check_same_thread":False}, poolclass=NullPool,
-                                        echo=database_echo)
+        # Connections are pooled, so that the threads of a WSGI server reuse them across requests
+        pool_arguments = engine_pool_arguments(database_uri, app.config['SQLALCHEMY_POOL_CLASS'],
+                                               app.config['SQLALCHEMY_POOL_SIZE'],
+                                               app.config['SQLALCHEMY_MAX_OVERFLOW'],
+                                               app.config['SQLALCHEMY_POOL_TIMEOUT'])
+        database_engine = create_engine(database_uri, connect_args={"check_same_thread":False}, echo=database_echo,
+                                        **pool_arguments)
+        app.extensions['pool_metrics'] = PoolMetrics(database_engine)
+
+        # A load that was interrupted is resumed, keeping the rows it committed, unless testing
+        resume_load = app.config['TESTING'] != 'True' and load_in_progress(database_engine)
+
+        if app.config.get('DATABASE_SYNC') and not resume_load:
+            print("SYNCING DATABASE")
+            # Apply only the rows of the CSV files that changed since the last start, instead of reloading them all
+            clear_mappers()
+            metadata.create_all(database_engine)
+            map_model_to_tables()
+
+            report = database_repository.sync(database_engine, data_path, app.config['POPULATE_WORKERS'],
+                                              app.config['PASSWORDS_PRE_HASHED'], log_hashing_progress)
+            app.logger.info("Synced database: %s", ", ".join(
+                "{} {inserted} inserted, {updated} updated, {deleted} deleted, {unchanged} unchanged, "
+                "{skipped} skipped".format(table, **counts) for table, counts in report.items()))
 
-        if app.config['TESTING'] == 'True' or len(database_engine.table_names()) == 0:
+        elif app.config['TESTING'] == 'True' or len(database_engine.table_names()) == 0 or resume_load:
             print("REPOPULATING DATABASE")
             # For testing, or first-time use of the web application, reinitialise the database.
             clear_mappers()
             metadata.create_all(database_engine)  # Conditionally create database tables.
-            for table in reversed(metadata.sorted_tables):  # Remove any data from the tables.
-                database_engine.execute(table.delete())
+            if not resume_load:
+                for table in reversed(metadata.sorted_tables):  # Remove any data from the tables.
+                    database_engine.execute(table.delete())
 
             # Generate mappings that map domain model classes to the database tables.
             map_model_to_tables()
 
-            database_repository.populate(database_engine, data_path)
+            report = database_repository.populate(database_engine, data_path, app.config['POPULATE_WORKERS'],
+                                                  app.config['POPULATE_BATCH_SIZE'], app.config['PASSWORDS_PRE_HASHED'],
+                                                  log_hashing_progress)
+            app.logger.info("Populated database: %s", ", ".join(
+                "{} {} rows {:.3f}s".format(table, load['rows'], load['seconds']) for table, load in report.items()))
 
         else:
             # Solely generate mappings that map domain model classes to the database tables.
             map_model_to_tables()
 
+        if app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+            database_repository.QueryCounter(database_engine)
+
+            @app.after_request
+            def report_query_count(response):
+                response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+                return response
+
         # Create the database session factory using sessionmaker (this has to be done once, in a global manner)
         session_factory = sessionmaker(autocommit=False, autoflush=True, bind=database_engine)
         # Create the SQLAlchemy DatabaseRepository instance for an sqlite3-based repository.
         repo.repo_instance = database_repository.SqlAlchemyRepository(session_factory)
-
+        # The movies table stores a missing revenue as 0 and no ratings, so the catalogue is read from the data file
+        repo.repo_instance.set_catalogue(MovieCatalogue.from_csv(os.path.join(data_path, 'movies.csv')))
+
+        @app.teardown_appcontext
+        def remove_database_session(exception):
+            # Each request works in a session of its own, whose connection goes back to the pool once it is done
+            repo.repo_instance.remove_session()
+
+    # Cover art is looked up in the background and served from a cache, starting with the covers of the home page
+    if app.config['COVER_ART_PROVIDER'] == 'local':
+        cover_art_provider = LocalCoverArtProvider(app.config['COVER_ART_FILE'])
+    else:
+        cover_art_provider = ImdbCoverArtProvider()
+    app.extensions['cover_art'] = CoverArtCache(cover_art_provider, app.config['COVER_ART_CACHE_PATH'],
+                                                app.config['COVER_ART_TTL_SECONDS'])
+    with app.app_context():
+        app.extensions['cover_art'].prefetch(repo.repo_instance.get_top_6_highest_revenue_movies())
+
+    # Genre links and random movie picks shown beside every page, precomputed rather than rebuilt per request
+    app.extensions['sidebar'] = SidebarProvider(app, app.config['SIDEBAR_POOL_SIZE'],
+                                                app.config['SIDEBAR_ROTATE_SECONDS'])
+
+    # Catalogue pages are served from a response cache until what they show changes
+    response_cache_backend = create_backend(app.config['RESPONSE_CACHE_BACKEND'],
+                                            app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+                                            app.config['RESPONSE_CACHE_REDIS_URL'])
+    if response_cache_backend is not None:
+        app.extensions['response_cache'] = ResponseCache(response_cache_backend,
+                                                         app.config['RESPONSE_CACHE_TTL_SECONDS'])
 
     # Build the application and register blueprints
     with app.app_context():
@@ -36,7 +36,7 @@ class MovieWatchingSimulation:
         if isinstance(user, User):
             if user not in self.__users:
                 self.__users.append(user)
-                user.watched_movies.append(self.movie)
+                user.watch_movie(self.movie)
 
     def retrieve_review(self):
         for user in self.__users:
@@ -0,0 +1,250 @@
+import csv
+import itertools
+import os
+import time
+from typing import Callable, Dict, Iterator, List
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from CS235Flix.adapters.orm import metadata
+from CS235Flix.adapters.password_hashing import hash_passwords
+from CS235Flix.adapters.title_search import drop_title_search
+
+# Rows of a source file written per transaction
+DEFAULT_BATCH_SIZE = 10000
+
+# Records the rows of each source file that are loaded; it only exists while a load is unfinished. It is created
+# outside the ORM metadata on purpose, so that it never shows up among the application's tables
+PROGRESS_TABLE = 'populate_progress'
+
+# Source files in load order, each with the table receiving one row per line of the file
+SOURCES = (('movies.csv', 'movies'), ('users.csv', 'users'), ('reviews.csv', 'reviews'))
+
+INSERT_STATEMENTS = {
+    'movies': 'INSERT INTO movies (id, title, description, director, release_year, runtime_minutes, revenue) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?)',
+    'genres': 'INSERT INTO genres (id, name) VALUES (?, ?)',
+    'actors': 'INSERT INTO actors (id, name) VALUES (?, ?)',
+    'directors': 'INSERT INTO directors (id, name) VALUES (?, ?)',
+    'movie_genres': 'INSERT INTO movie_genres (id, movie_id, genre_id) VALUES (?, ?, ?)',
+    'movie_actors': 'INSERT INTO movie_actors (id, movie_id, actor_id) VALUES (?, ?, ?)',
+    'users': 'INSERT INTO users (id, username, password) VALUES (?, ?, ?)',
+    'reviews': 'INSERT INTO reviews (id, user_id, movie_id, review_text, ratings, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+}
+
+
+def read_rows(filename: str, skip: int = 0) -> Iterator[List[str]]:
+    """ Yields the data rows of a CSV file with surrounding white space stripped, after skipping the first skip """
+    with open(filename, encoding='utf-8-sig') as infile:
+        reader = csv.reader(infile)
+        next(reader)
+        for row in itertools.islice(reader, skip, None):
+            yield [item.strip() for item in row]
+
+
+def movie_values(data_row: List[str]) -> tuple:
+    """ Returns the movies table row of a movies.csv line. Revenues that are missing or do not parse are stored as 0 """
+    try:
+        revenue = float(data_row[10])
+    except ValueError:
+        revenue = 0
+    return int(data_row[0]), data_row[1], data_row[3], data_row[4], int(data_row[6]), int(data_row[7]), revenue
+
+
+def batches(rows: Iterator, batch_size: int) -> Iterator[list]:
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if len(batch) == 0:
+            return
+        yield batch
+
+
+def load_in_progress(engine: Engine) -> bool:
+    """ True if a load into the database was interrupted before it finished """
+    return engine.has_table(PROGRESS_TABLE)
+
+
+class BulkLoader:
+    """ Loads the CSV files of a data directory into the tables of an SQLite database.
+
+        Rows are streamed from the files and written in batches of batch_size, one transaction per batch. Each batch
+        records how many lines of its file are loaded in the progress table within the same transaction, so a load
+        that was interrupted resumes after the last batch it committed. The secondary indexes are dropped while
+        rows are written and built once at the end, the full-text title index is dropped for the next title search
+        to rebuild, and the load runs with a write-ahead log and without syncing to disk; the previous journal mode
+        and synchronous setting are restored when it finishes.
+
+        Genre, actor and director ids are given out in order of first appearance in movies.csv. Passwords are hashed
+        as by hash_passwords, with pre_hashed, and progress(done, total) is called as the users' passwords are hashed.
+    """
+
+    def __init__(self, engine: Engine, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1,
+                 pre_hashed: bool = False, progress: Callable[[int, int], None] = None):
+        self._engine = engine
+        self._batch_size = batch_size
+        self._workers = workers
+        self._pre_hashed = pre_hashed
+        self._progress = progress
+        self._ids_by_name = {'genres': dict(), 'actors': dict(), 'directors': dict()}
+        self._next_ids = dict()
+        self._rows = dict()
+        self._seconds = dict()
+
+    def load(self, data_path: str) -> Dict[str, dict]:
+        """ Loads the files and returns the rows written, the seconds spent writing them and the resulting rows per
+            second of every table. Index building is reported as 'indexes', counting the indexes built.
+        """
+        connection = self._engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            saved_settings = self._begin_load(cursor)
+            try:
+                self._drop_indexes(cursor)
+                drop_title_search(cursor)
+                done = self._resume(connection, cursor)
+                for file_name, table in SOURCES:
+                    self._load_source(connection, cursor, os.path.join(data_path, file_name), table,
+                                      done.get(file_name, 0))
+                self._build_indexes(cursor)
+                cursor.execute('DROP TABLE {}'.format(PROGRESS_TABLE))
+                connection.commit()
+            finally:
+                connection.rollback()
+                self._end_load(cursor, saved_settings)
+        finally:
+            connection.close()
+        return self.report()
+
+    def report(self) -> Dict[str, dict]:
+        return {table: {'rows': rows,
+                        'seconds': self._seconds[table],
+                        'rows_per_second': rows / self._seconds[table] if self._seconds[table] > 0 else None}
+                for table, rows in self._rows.items()}
+
+    def _begin_load(self, cursor) -> tuple:
+        journal_mode = cursor.execute('PRAGMA journal_mode').fetchone()[0]
+        synchronous = cursor.execute('PRAGMA synchronous').fetchone()[0]
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=OFF')
+        return journal_mode, synchronous
+
+    def _end_load(self, cursor, saved_settings: tuple):
+        journal_mode, synchronous = saved_settings
+        cursor.execute('PRAGMA journal_mode={}'.format(journal_mode))
+        cursor.execute('PRAGMA synchronous={}'.format(int(synchronous)))
+
+    def _drop_indexes(self, cursor):
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                cursor.execute('DROP INDEX IF EXISTS {}'.format(index.name))
+
+    def _build_indexes(self, cursor):
+        started = time.perf_counter()
+        built = 0
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                cursor.execute(str(CreateIndex(index).compile(dialect=self._engine.dialect)))
+                built += 1
+        self._record('indexes', built, time.perf_counter() - started)
+
+    def _resume(self, connection, cursor) -> Dict[str, int]:
+        """ Returns the lines of each source file that are loaded already, and reloads the ids given out so far.
+
+            Each line of a source file adds one row to its table, so the progress recorded must match the row count
+            of that table. If it does not, e.g. because the tables were emptied since, the load starts over.
+        """
+        cursor.execute('CREATE TABLE IF NOT EXISTS {} (source VARCHAR(64) PRIMARY KEY, rows_done INTEGER NOT NULL)'
+                       .format(PROGRESS_TABLE))
+        done = dict(cursor.execute('SELECT source, rows_done FROM {}'.format(PROGRESS_TABLE)).fetchall())
+        for file_name, table in SOURCES:
+            if cursor.execute('SELECT COUNT(*) FROM {}'.format(table)).fetchone()[0] != done.get(file_name, 0):
+                for stale_table in reversed(metadata.sorted_tables):
+                    cursor.execute('DELETE FROM {}'.format(stale_table.name))
+                cursor.execute('DELETE FROM {}'.format(PROGRESS_TABLE))
+                done = dict()
+                break
+        connection.commit()
+
+        for table, ids_by_name in self._ids_by_name.items():
+            ids_by_name.update(cursor.execute('SELECT name, id FROM {} ORDER BY id'.format(table)).fetchall())
+        for table in ('genres', 'actors', 'directors', 'movie_genres', 'movie_actors'):
+            next_id = cursor.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM {}'.format(table)).fetchone()[0]
+            self._next_ids[table] = next_id
+        return done
+
+    def _load_source(self, connection, cursor, filename: str, table: str, done: int):
+        total = None
+        if table == 'users' and self._progress is not None:
+            total = done + sum(1 for _ in read_rows(filename, skip=done))
+        for batch in batches(read_rows(filename, skip=done), self._batch_size):
+            if table == 'movies':
+                self._write_movies(cursor, batch)
+            elif table == 'users':
+                passwords = hash_passwords([row[2] for row in batch], self._workers,
+                                           self._hashing_progress(done, total), self._pre_hashed)
+                self._write(cursor, 'users', [(row[0], row[1], password) for row, password in zip(batch, passwords)])
+            else:
+                self._write(cursor, table, batch)
+            done += len(batch)
+            cursor.execute('INSERT OR REPLACE INTO {} (source, rows_done) VALUES (?, ?)'.format(PROGRESS_TABLE),
+                           (os.path.basename(filename), done))
+            connection.commit()
+
+    def _hashing_progress(self, loaded: int, total: int):
+        # Reports the passwords of a batch as they are hashed, on top of the users loaded before the batch
+        if self._progress is None:
+            return None
+        return lambda hashed, _: self._progress(loaded + hashed, total)
+
+    def _write_movies(self, cursor, batch: List[List[str]]):
+        movies = list()
+        director_names = list()
+        # The movie ids and the names of the genre and actor links, as parallel columns
+        genre_movie_keys, genre_names = list(), list()
+        actor_movie_keys, actor_names = list(), list()
+
+        for data_row in batch:
+            movie = movie_values(data_row)
+            movie_key = movie[0]
+            movies.append(movie)
+            director_names.append(data_row[4])
+
+            names = data_row[2].split(',')
+            genre_names.extend(names)
+            genre_movie_keys.extend([movie_key] * len(names))
+            names = data_row[5].split(',')
+            actor_names.extend(map(str.strip, names))
+            actor_movie_keys.extend([movie_key] * len(names))
+
+        self._write(cursor, 'movies', movies)
+        self._write_entities(cursor, 'directors', director_names)
+        genre_ids = self._write_entities(cursor, 'genres', genre_names)
+        actor_ids = self._write_entities(cursor, 'actors', actor_names)
+        self._write_links(cursor, 'movie_genres', genre_movie_keys, map(genre_ids.__getitem__, genre_names))
+        self._write_links(cursor, 'movie_actors', actor_movie_keys, map(actor_ids.__getitem__, actor_names))
+
+    def _write_entities(self, cursor, table: str, names: List[str]) -> Dict[str, int]:
+        """ Gives the names not seen before the next ids of table, in order of appearance, and writes them """
+        ids_by_name = self._ids_by_name[table]
+        new_names = [name for name in dict.fromkeys(names) if name not in ids_by_name]
+        rows = list(enumerate(new_names, self._next_ids[table]))
+        self._next_ids[table] += len(rows)
+        ids_by_name.update((name, entity_id) for entity_id, name in rows)
+        self._write(cursor, table, rows)
+        return ids_by_name
+
+    def _write_links(self, cursor, table: str, movie_keys: List[int], entity_ids: Iterator[int]):
+        """ Writes rows of an association table, numbering them on from the rows written before """
+        first_id = self._next_ids[table]
+        self._next_ids[table] += len(movie_keys)
+        self._write(cursor, table, list(zip(range(first_id, first_id + len(movie_keys)), movie_keys, entity_ids)))
+
+    def _write(self, cursor, table: str, rows: list):
+        started = time.perf_counter()
+        cursor.executemany(INSERT_STATEMENTS[table], rows)
+        self._record(table, len(rows), time.perf_counter() - started)
+
+    def _record(self, table: str, rows: int, seconds: float):
+        self._rows[table] = self._rows.get(table, 0) + rows
+        self._seconds[table] = self._seconds.get(table, 0.0) + seconds
@@ -0,0 +1,260 @@
+import csv
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+# Numeric columns of the catalogue, with the movies.csv header each one is read from and its dtype
+COLUMNS = {
+    'release_year': ('Year', np.int64),
+    'runtime_minutes': ('Runtime (Minutes)', np.int64),
+    'rating': ('Rating', np.float64),
+    'votes': ('Votes', np.int64),
+    'revenue': ('Revenue (Millions)', np.float64),
+    'metascore': ('Metascore', np.float64),
+}
+
+
+class MovieCatalogue:
+    """ Column store of the numeric movie attributes, keyed by movie id.
+
+        Every column is a NumPy array aligned with the sorted array of movie ids, paired with a boolean mask that is
+        True where the value is known. Genres are held as a movies x genres boolean matrix. Analytics queries (top-k,
+        year histograms, range filters and per-genre aggregates) run as vectorised operations over these arrays
+        instead of Python loops over Movie objects.
+
+        Movies added after construction are kept in a pending list and merged into the arrays on the next query. The
+        year histogram, and the release years the previous/next year lookups bisect, are kept until then as well.
+    """
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._values = {name: np.empty(0, dtype=dtype) for name, (_, dtype) in COLUMNS.items()}
+        self._present = {name: np.empty(0, dtype=bool) for name in COLUMNS}
+        self._genre_names = list()
+        self._genre_matrix = np.empty((0, 0), dtype=bool)
+        self._pending = list()
+        self._year_histogram = None
+        self._years = None
+        self._merge(list(rows))
+
+    @classmethod
+    def from_csv(cls, filename: str) -> 'MovieCatalogue':
+        """ Reads movies.csv. Values that are missing or do not parse are recorded as nulls rather than skipped """
+        rows = list()
+        with open(filename, mode='r', encoding='utf-8-sig') as csvfile:
+            for record in csv.DictReader(csvfile):
+                row = {'id': int(record['id']), 'genres': [name.strip() for name in record['Genre'].split(',')]}
+                for name, (header, dtype) in COLUMNS.items():
+                    row[name] = parse_value(record.get(header), dtype)
+                rows.append(row)
+        return cls(rows)
+
+    @classmethod
+    def from_movies(cls, movies: Iterable) -> 'MovieCatalogue':
+        """ Builds a catalogue from domain Movie objects. Columns a Movie does not carry are left null """
+        return cls(movie_row(movie) for movie in movies)
+
+    def add_movie(self, movie):
+        """ Queues a Movie, which is read when the catalogue is next queried """
+        self._pending.append(movie)
+
+    def add_row(self, row: dict):
+        """ Queues a row with an id, the COLUMNS and a list of genre names, such as movie_row() returns """
+        self._pending.append(row)
+
+    def __len__(self) -> int:
+        self._flush()
+        return len(self._ids)
+
+    def __contains__(self, movie_id) -> bool:
+        self._flush()
+        return self._row_of(movie_id) is not None
+
+    @property
+    def movie_ids(self) -> List[int]:
+        self._flush()
+        return self._ids.tolist()
+
+    @property
+    def genre_names(self) -> List[str]:
+        self._flush()
+        return list(self._genre_names)
+
+    def column(self, name: str) -> np.ma.MaskedArray:
+        """ Returns the named column, aligned with movie_ids, as a masked array with nulls masked out """
+        self._flush()
+        return np.ma.MaskedArray(self._values[name], mask=~self._present[name])
+
+    def value(self, movie_id: int, name: str):
+        """ Returns the value of the named column for movie_id, or None if the movie or the value is unknown """
+        self._flush()
+        row = self._row_of(movie_id)
+        if row is None or not self._present[name][row]:
+            return None
+        return self._values[name][row].item()
+
+    def top_k(self, name: str, k: int) -> List[int]:
+        """ Returns the ids of the k movies with the largest known values in the named column, largest first.
+            Ties are broken by ascending movie id.
+        """
+        self._flush()
+        rows = np.flatnonzero(self._present[name])
+        if k <= 0 or len(rows) == 0:
+            return []
+        values = self._values[name][rows]
+        if k < len(rows):
+            # Only the rows reaching the k-th largest value can make the cut; order just those
+            threshold = np.partition(values, len(values) - k)[len(values) - k]
+            candidates = values >= threshold
+            rows, values = rows[candidates], values[candidates]
+        order = np.lexsort((self._ids[rows], -values))[:k]
+        return self._ids[rows[order]].tolist()
+
+    def year_histogram(self) -> Dict[int, int]:
+        """ Returns the number of movies released in each year, ordered by year """
+        self._flush()
+        if self._year_histogram is None:
+            years, counts = np.unique(self._values['release_year'][self._present['release_year']], return_counts=True)
+            self._year_histogram = dict(zip(years.tolist(), counts.tolist()))
+            self._years = years.tolist()
+        return dict(self._year_histogram)
+
+    def previous_year(self, release_year: int):
+        """ Returns the latest year before release_year that has movies, or None """
+        years = self._release_years()
+        index = bisect_left(years, release_year)
+        return years[index - 1] if index > 0 else None
+
+    def next_year(self, release_year: int):
+        """ Returns the earliest year after release_year that has movies, or None """
+        years = self._release_years()
+        index = bisect_right(years, release_year)
+        return years[index] if index < len(years) else None
+
+    def earliest_year(self):
+        years = self._release_years()
+        return years[0] if len(years) > 0 else None
+
+    def latest_year(self):
+        years = self._release_years()
+        return years[-1] if len(years) > 0 else None
+
+    def _release_years(self) -> List[int]:
+        self.year_histogram()
+        return self._years
+
+    def filter_range(self, name: str, low=None, high=None) -> List[int]:
+        """ Returns the ids of the movies whose value in the named column lies within [low, high].
+            Either bound may be None. Movies with a null value never match.
+        """
+        self._flush()
+        selected = self._present[name].copy()
+        if low is not None:
+            selected &= self._values[name] >= low
+        if high is not None:
+            selected &= self._values[name] <= high
+        return self._ids[selected].tolist()
+
+    def movie_ids_for_genre(self, genre_name: str) -> List[int]:
+        self._flush()
+        if genre_name not in self._genre_names:
+            return []
+        return self._ids[self._genre_matrix[:, self._genre_names.index(genre_name)]].tolist()
+
+    def genre_aggregate(self, name: str, how: str = 'mean') -> Dict[str, object]:
+        """ Aggregates the named column per genre, ignoring nulls.
+
+            how is one of 'count', 'sum' or 'mean'. The mean of a genre without any known value is None.
+        """
+        if how not in ('count', 'sum', 'mean'):
+            raise ValueError('Unsupported aggregate: {}'.format(how))
+        self._flush()
+        present = self._present[name]
+        membership = self._genre_matrix.T.astype(np.int64)
+        counts = membership @ present.astype(np.int64)
+        sums = membership.astype(np.float64) @ np.where(present, self._values[name], 0).astype(np.float64)
+
+        aggregates = dict()
+        for genre_name, count, total in zip(self._genre_names, counts.tolist(), sums.tolist()):
+            if how == 'count':
+                aggregates[genre_name] = count
+            elif how == 'sum':
+                aggregates[genre_name] = total
+            else:
+                aggregates[genre_name] = total / count if count > 0 else None
+        return aggregates
+
+    def genre_rows(self, name: str) -> Iterator[tuple]:
+        """ Yields a (genre name, movie id, value) row for every movie of every genre, with the value of the named
+            column, or None where it is null
+        """
+        self._flush()
+        for index, genre_name in enumerate(self._genre_names):
+            for row in np.flatnonzero(self._genre_matrix[:, index]).tolist():
+                yield genre_name, int(self._ids[row]), \
+                    self._values[name][row].item() if self._present[name][row] else None
+
+    def _row_of(self, movie_id):
+        row = int(np.searchsorted(self._ids, movie_id))
+        if row < len(self._ids) and self._ids[row] == movie_id:
+            return row
+        return None
+
+    def _flush(self):
+        if len(self._pending) > 0:
+            movies, self._pending = self._pending, list()
+            self._merge([entry if isinstance(entry, dict) else movie_row(entry) for entry in movies])
+
+    def _merge(self, rows: List[dict]):
+        # Rows for ids the catalogue already holds (or repeated within rows) are ignored
+        known = set(self._ids.tolist())
+        fresh = list()
+        for row in rows:
+            if row['id'] is not None and row['id'] not in known:
+                known.add(row['id'])
+                fresh.append(row)
+        if len(fresh) == 0:
+            return
+        self._year_histogram = self._years = None
+
+        for row in fresh:
+            for genre_name in row['genres']:
+                if genre_name not in self._genre_names:
+                    self._genre_names.append(genre_name)
+        genre_columns = {genre_name: column for column, genre_name in enumerate(self._genre_names)}
+        new_genres = np.zeros((len(fresh), len(self._genre_names)), dtype=bool)
+        for position, row in enumerate(fresh):
+            for genre_name in row['genres']:
+                new_genres[position, genre_columns[genre_name]] = True
+        old_genres = np.zeros((len(self._ids), len(self._genre_names)), dtype=bool)
+        old_genres[:, :self._genre_matrix.shape[1]] = self._genre_matrix
+
+        ids = np.concatenate([self._ids, np.array([row['id'] for row in fresh], dtype=np.int64)])
+        order = np.argsort(ids, kind='stable')
+        self._ids = ids[order]
+        self._genre_matrix = np.concatenate([old_genres, new_genres])[order]
+        for name, (_, dtype) in COLUMNS.items():
+            present = np.array([row[name] is not None for row in fresh], dtype=bool)
+            values = np.array([row[name] if row[name] is not None else 0 for row in fresh], dtype=dtype)
+            self._values[name] = np.concatenate([self._values[name], values])[order]
+            self._present[name] = np.concatenate([self._present[name], present])[order]
+
+
+def parse_value(text, dtype):
+    if text is None:
+        return None
+    try:
+        return float(text) if dtype is np.float64 else int(text)
+    except ValueError:
+        return None
+
+
+def movie_row(movie) -> dict:
+    row = {name: None for name in COLUMNS}
+    row['id'] = movie.id
+    row['release_year'] = movie.release_year
+    row['runtime_minutes'] = movie.runtime_minutes
+    row['revenue'] = movie.revenue
+    row['genres'] = [genre.genre_name for genre in movie.genres]
+    return row
@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# Chunks smaller than this are not worth shipping to another process
+MINIMUM_CHUNK_BYTES = 1 << 20
+
+# More chunks than workers keeps every worker busy when chunks parse at different speeds
+CHUNKS_PER_WORKER = 4
+
+
+def split_into_chunks(filename: str, number_of_chunks: int) -> List[Tuple[int, int]]:
+    """ Splits the data rows of a CSV file into at most number_of_chunks byte ranges [start, end).
+
+        The header line is skipped and every range starts at the beginning of a line, so each chunk can be parsed on
+        its own. This assumes that no quoted field spans several lines, which holds for the movies.csv format.
+    """
+    with open(filename, mode='rb') as infile:
+        infile.readline()
+        data_start = infile.tell()
+        file_end = infile.seek(0, os.SEEK_END)
+
+        boundaries = [data_start]
+        chunk_bytes = max((file_end - data_start) // max(number_of_chunks, 1), 1)
+        for target in range(data_start + chunk_bytes, file_end, chunk_bytes):
+            if target <= boundaries[-1]:
+                continue
+            infile.seek(target - 1)
+            infile.readline()
+            boundary = infile.tell()
+            if boundary >= file_end:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+        boundaries.append(file_end)
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def read_chunk_rows(filename: str, start: int, end: int) -> List[List[str]]:
+    with open(filename, mode='rb') as infile:
+        infile.seek(start)
+        text = infile.read(end - start).decode('utf-8')
+    # The csv module splits the rows itself, on line endings only; str.splitlines() would also split on form feeds,
+    # Unicode line separators and the like inside fields
+    return [[item.strip() for item in row] for row in csv.reader(io.StringIO(text, newline='')) if len(row) > 0]
+
+
+def parse_chunks(filename: str, parse_chunk: Callable[[str, int, int], list], workers: int = 1,
+                 number_of_chunks: int = None) -> list:
+    """ Parses filename with parse_chunk(filename, start, end), one call per byte-range chunk.
+
+        With more than one worker the chunks are parsed in a process pool; parse_chunk must then be a module-level
+        function returning picklable values. Results are concatenated in file order. By default the file is split
+        into CHUNKS_PER_WORKER chunks per worker, but never into chunks smaller than MINIMUM_CHUNK_BYTES.
+    """
+    if number_of_chunks is None:
+        file_bytes = os.path.getsize(filename)
+        number_of_chunks = max(1, min(workers * CHUNKS_PER_WORKER, file_bytes // MINIMUM_CHUNK_BYTES))
+    chunks = split_into_chunks(filename, number_of_chunks)
+
+    if workers <= 1 or len(chunks) <= 1:
+        parsed_chunks = [parse_chunk(filename, start, end) for start, end in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed_chunks = list(executor.map(parse_chunk, [filename] * len(chunks),
+                                              [start for start, _ in chunks], [end for _, end in chunks]))
+
+    return [record for parsed_chunk in parsed_chunks for record in parsed_chunk]
+
+
+class StageTimer:
+    """ Records the wall-clock seconds spent in each named stage of a load """
+
+    def __init__(self):
+        self.timings = dict()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def report(self) -> Dict[str, float]:
+        return dict(self.timings)
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool
+
+
+class TimedCheckout:
+    """ Pool mixin recording in the connection record's info how long each checkout waited for a connection """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        record = super()._do_get()
+        record.info['checkout_wait'] = time.perf_counter() - started
+        return record
+
+
+class TimedQueuePool(TimedCheckout, QueuePool):
+    pass
+
+
+class TimedSingletonThreadPool(TimedCheckout, SingletonThreadPool):
+    pass
+
+
+class TimedNullPool(TimedCheckout, NullPool):
+    pass
+
+
+POOL_CLASSES = {
+    'queue': TimedQueuePool,
+    'singleton': TimedSingletonThreadPool,
+    'null': TimedNullPool,
+}
+
+
+def engine_pool_arguments(database_uri: str, pool_class: str = None, pool_size: int = 5, max_overflow: int = 10,
+                          pool_timeout: float = 30.0) -> dict:
+    """ Returns the create_engine() keyword arguments for the named pool class: 'queue', 'singleton' or 'null'.
+
+        Without a pool class, in-memory SQLite databases get a singleton pool, as each of their connections would
+        otherwise see a database of its own, and every other database a queue pool. A queue pool keeps up to
+        pool_size connections open, opens up to max_overflow more under load and makes a checkout wait at most
+        pool_timeout seconds for a connection to be returned.
+    """
+    if pool_class is None:
+        url = make_url(database_uri)
+        in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+        pool_class = 'singleton' if in_memory else 'queue'
+    if pool_class not in POOL_CLASSES:
+        raise ValueError("Unknown pool class: {}".format(pool_class))
+
+    arguments = {'poolclass': POOL_CLASSES[pool_class]}
+    if pool_class == 'queue':
+        arguments.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+    elif pool_class == 'singleton':
+        arguments.update(pool_size=pool_size)
+    return arguments
+
+
+class PoolMetrics:
+    """ Counts the connection checkouts of an engine's pool, the time they waited and how many went into overflow """
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        wait = connection_record.info.pop('checkout_wait', 0.0)
+        pool = self._engine.pool
+        overflow = pool.overflow() if isinstance(pool, QueuePool) else 0
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                'pool': self._engine.pool.status(),
+                'connections_opened': self.connections_opened,
+                'checkouts': self.checkouts,
+                'checked_out': self.checkouts - self.checkins,
+                'mean_wait_seconds': self.total_wait_seconds / self.checkouts if self.checkouts > 0 else 0.0,
+                'max_wait_seconds': self.max_wait_seconds,
+                'overflow_checkouts': self.overflow_checkouts,
+                'peak_overflow': self.peak_overflow,
+            }
+
+    def detach(self):
+        event.remove(self._engine, 'connect', self._on_connect)
+        event.remove(self._engine, 'checkout', self._on_checkout)
+        event.remove(self._engine, 'checkin', self._on_checkin)
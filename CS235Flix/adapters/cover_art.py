@@ -0,0 +1,155 @@
+import abc
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from CS235Flix.domainmodel.model import Movie
+
+
+class CoverArtProvider(abc.ABC):
+    """ Looks up the URL of the cover art of a movie. Lookups may be slow; CoverArtCache only makes them in the
+        background.
+    """
+
+    @abc.abstractmethod
+    def cover_url(self, movie_id: int, title: str, release_year: int) -> Optional[str]:
+        """ Returns the cover art URL of the movie, or None if it has none. Raises an exception if the lookup failed,
+            so that the movie is looked up again later rather than recorded as having no cover.
+        """
+        raise NotImplementedError
+
+
+class ImdbCoverArtProvider(CoverArtProvider):
+    """ Searches IMDb for the title, preferring the result released in the same year. The IMDb client is created by
+        the first lookup rather than at import time.
+    """
+
+    def __init__(self):
+        self._access = None
+
+    def cover_url(self, movie_id: int, title: str, release_year: int) -> Optional[str]:
+        if self._access is None:
+            import imdb
+            self._access = imdb.IMDb()
+
+        results = self._access.search_movie(title)
+        if len(results) == 0:
+            return None
+        same_year = [result for result in results if result.get('year') == release_year]
+        return (same_year or results)[0].get('cover url')
+
+
+class LocalCoverArtProvider(CoverArtProvider):
+    """ Reads the cover art URLs from a CSV file with id and cover_url columns, for tests and offline deployments.
+        Without a file, no movie has a cover.
+    """
+
+    def __init__(self, filename: str = None):
+        self._filename = filename
+        self._urls = None
+
+    def cover_url(self, movie_id: int, title: str, release_year: int) -> Optional[str]:
+        if self._urls is None:
+            self._urls = dict()
+            if self._filename is not None:
+                with open(self._filename, newline='', encoding='utf-8-sig') as infile:
+                    self._urls = {int(row['id']): row['cover_url'] for row in csv.DictReader(infile)}
+        return self._urls.get(movie_id)
+
+
+class CoverArtCache:
+    """ Cover art URLs by movie id, answered from memory and persisted to cache_path.
+
+        cover_url() never waits on the provider: it returns what is cached (None if nothing is) and, when the entry is
+        missing or older than ttl_seconds, queues the movie for a background thread that looks it up and writes the
+        cache file. Movies with no cover are cached too, so they are not looked up on every request; failed lookups
+        are retried after retry_seconds. Without a cache_path the cache is kept in memory only.
+    """
+
+    def __init__(self, provider: CoverArtProvider, cache_path: str = None, ttl_seconds: float = 7 * 24 * 3600,
+                 retry_seconds: float = 300.0, clock: Callable[[], float] = time.time):
+        self._provider = provider
+        self._cache_path = cache_path
+        self._ttl_seconds = ttl_seconds
+        self._retry_seconds = retry_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        # movie id -> (cover url or None, time it was looked up)
+        self._entries = self._read_cache_file()
+        self._retry_at = dict()
+        self._queued = set()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def cover_url(self, movie_id: int, title: str, release_year: int) -> Optional[str]:
+        entry = self._entries.get(movie_id)
+        if entry is None or self._clock() - entry[1] >= self._ttl_seconds:
+            self._enqueue(movie_id, title, release_year)
+        return entry[0] if entry is not None else None
+
+    def prefetch(self, movies: Iterable[Movie]):
+        """ Queues the movies whose covers are not cached, or are stale, for the background thread """
+        for movie in movies:
+            self.cover_url(movie.id, movie.title, movie.release_year)
+
+    def wait(self):
+        """ Blocks until every queued lookup is done """
+        self._queue.join()
+
+    def _enqueue(self, movie_id: int, title: str, release_year: int):
+        with self._lock:
+            if movie_id in self._queued or self._clock() < self._retry_at.get(movie_id, 0):
+                return
+            self._queued.add(movie_id)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._look_up_queued, daemon=True)
+                self._worker.start()
+        self._queue.put((movie_id, title, release_year))
+
+    def _look_up_queued(self):
+        while True:
+            movie_id, title, release_year = self._queue.get()
+            try:
+                self._look_up(movie_id, title, release_year)
+                if self._queue.empty():
+                    # Write the file once the queue is drained rather than after every lookup of a bulk prefetch
+                    self._write_cache_file()
+            finally:
+                with self._lock:
+                    self._queued.discard(movie_id)
+                self._queue.task_done()
+
+    def _look_up(self, movie_id: int, title: str, release_year: int):
+        try:
+            url = self._provider.cover_url(movie_id, title, release_year)
+        except Exception:
+            with self._lock:
+                self._retry_at[movie_id] = self._clock() + self._retry_seconds
+            return
+        self._entries[movie_id] = (url, self._clock())
+
+    def _read_cache_file(self) -> Dict[int, tuple]:
+        if self._cache_path is None or not os.path.exists(self._cache_path):
+            return dict()
+        try:
+            with open(self._cache_path, encoding='utf-8') as infile:
+                return {int(movie_id): (url, fetched_at) for movie_id, (url, fetched_at) in json.load(infile).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            # An unreadable or corrupt cache file, or one whose root is not an object, is dropped; the covers are
+            # looked up again
+            return dict()
+
+    def _write_cache_file(self):
+        # Only the background thread changes the entries, so they are not changed while being written
+        if self._cache_path is None:
+            return
+        # Written to a temporary file first and moved into place, so readers never see a partial file
+        temporary_path = self._cache_path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as outfile:
+            json.dump({str(movie_id): list(entry) for movie_id, entry in self._entries.items()}, outfile)
+        os.replace(temporary_path, self._cache_path)
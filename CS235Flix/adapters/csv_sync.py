@@ -0,0 +1,177 @@
+import hashlib
+import os
+from typing import Callable, Dict, Iterable, List
+
+from sqlalchemy.engine import Engine
+
+from CS235Flix.adapters.bulk_loader import movie_values, read_rows
+from CS235Flix.adapters.password_hashing import hash_passwords
+
+# Content hash of every CSV line as of the last sync, by source file and key. Like the bulk loader's progress table it
+# is created outside the ORM metadata, so that it never shows up among the application's tables
+SYNC_STATE_TABLE = 'sync_state'
+
+UPSERT_STATEMENTS = {
+    'movies': 'INSERT INTO movies (id, title, description, director, release_year, runtime_minutes, revenue) '
+              'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET title = excluded.title, '
+              'description = excluded.description, director = excluded.director, '
+              'release_year = excluded.release_year, runtime_minutes = excluded.runtime_minutes, '
+              'revenue = excluded.revenue',
+    'users': 'INSERT INTO users (id, username, password) VALUES (?, ?, ?) '
+             'ON CONFLICT (id) DO UPDATE SET username = excluded.username, password = excluded.password',
+    'reviews': 'INSERT INTO reviews (id, user_id, movie_id, review_text, ratings, timestamp) VALUES (?, ?, ?, ?, ?, ?) '
+               'ON CONFLICT (id) DO UPDATE SET user_id = excluded.user_id, movie_id = excluded.movie_id, '
+               'review_text = excluded.review_text, ratings = excluded.ratings, timestamp = excluded.timestamp',
+}
+
+
+def row_hash(row: List[str]) -> str:
+    return hashlib.sha1('\x1f'.join(row).encode('utf-8')).hexdigest()
+
+
+class SyncDiff:
+    """ The lines of a source file that are new, changed or gone since the last sync, by key """
+
+    def __init__(self):
+        self.inserted = list()
+        self.updated = list()
+        self.unchanged = 0
+        self.deleted = list()
+        self.skipped = list()
+        self.hashes = dict()
+
+    @property
+    def changed(self) -> list:
+        return self.inserted + self.updated
+
+    def counts(self) -> Dict[str, int]:
+        return {'inserted': len(self.inserted), 'updated': len(self.updated), 'deleted': len(self.deleted),
+                'unchanged': self.unchanged, 'skipped': len(self.skipped)}
+
+
+class CsvSync:
+    """ Brings the database in line with the CSV files of a data directory by applying only what changed.
+
+        Every line of movies.csv, users.csv and reviews.csv is keyed by its id column and hashed. Lines whose key is
+        in the database and whose hash matches the one recorded by the previous sync are left alone; the others are
+        upserted, and rows the previous sync recorded whose key no longer appears in their file are deleted. Rows
+        the sync never recorded, such as users and reviews added through the application, are never deleted, and a
+        line whose key is taken by such a row is skipped rather than overwriting it. A database populated some other
+        way has no recorded hashes at all, so its first sync adopts the rows the files describe and rewrites them once.
+
+        Changed movies get their genre and actor links rewritten, genres, actors and directors no movie refers to
+        any more are deleted, as are reviews of deleted movies or by deleted users, and only new or changed passwords
+        are hashed, as by hash_passwords with pre_hashed and progress. The whole sync runs in one transaction.
+    """
+
+    def __init__(self, engine: Engine, workers: int = 1, pre_hashed: bool = False,
+                 progress: Callable[[int, int], None] = None):
+        self._engine = engine
+        self._workers = workers
+        self._pre_hashed = pre_hashed
+        self._progress = progress
+
+    def sync(self, data_path: str) -> Dict[str, Dict[str, int]]:
+        """ Returns the number of inserted, updated, deleted, unchanged and skipped rows of every source table """
+        connection = self._engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute('CREATE TABLE IF NOT EXISTS {} (source VARCHAR(64) NOT NULL, key VARCHAR(64) NOT NULL, '
+                           'hash CHAR(40) NOT NULL, PRIMARY KEY (source, key))'.format(SYNC_STATE_TABLE))
+            diffs = {table: self._diff(cursor, os.path.join(data_path, table + '.csv'), table)
+                     for table in ('movies', 'users', 'reviews')}
+
+            # Reviews refer to users and movies, so they are deleted first and written last
+            self._delete(cursor, 'reviews', diffs['reviews'].deleted)
+            self._sync_users(cursor, diffs['users'])
+            self._sync_movies(cursor, diffs['movies'])
+            cursor.executemany(UPSERT_STATEMENTS['reviews'], [row for _, row in diffs['reviews'].changed])
+            if diffs['users'].deleted or diffs['movies'].deleted:
+                diffs['reviews'].deleted.extend(self._delete_orphaned_reviews(cursor))
+            for table, diff in diffs.items():
+                self._record_state(cursor, table + '.csv', diff)
+            connection.commit()
+        finally:
+            connection.rollback()
+            connection.close()
+        return {table: diff.counts() for table, diff in diffs.items()}
+
+    def _diff(self, cursor, filename: str, table: str) -> SyncDiff:
+        source = os.path.basename(filename)
+        recorded = dict(cursor.execute('SELECT key, hash FROM {} WHERE source = ?'.format(SYNC_STATE_TABLE),
+                                       (source,)).fetchall())
+        existing = {str(row[0]) for row in cursor.execute('SELECT id FROM {}'.format(table))}
+        # Without any recorded hashes the database was populated some other way, and its rows are taken as the file's
+        adopting = len(recorded) == 0
+
+        diff = SyncDiff()
+        for row in read_rows(filename):
+            key, line_hash = row[0], row_hash(row)
+            if key not in existing:
+                diff.inserted.append((key, row))
+            elif key not in recorded and not adopting:
+                diff.skipped.append(key)
+                continue
+            elif recorded.get(key) != line_hash:
+                diff.updated.append((key, row))
+            else:
+                diff.unchanged += 1
+            diff.hashes[key] = line_hash
+        diff.deleted = sorted(recorded.keys() - diff.hashes.keys(), key=int)
+        return diff
+
+    def _sync_users(self, cursor, diff: SyncDiff):
+        rows = [row for _, row in diff.changed]
+        passwords = hash_passwords([row[2] for row in rows], self._workers, self._progress, self._pre_hashed)
+        cursor.executemany(UPSERT_STATEMENTS['users'],
+                           [(row[0], row[1], password) for row, password in zip(rows, passwords)])
+        self._delete(cursor, 'users', diff.deleted)
+
+    def _sync_movies(self, cursor, diff: SyncDiff):
+        rows = [row for _, row in diff.changed]
+        rewritten = [(key,) for key, _ in diff.updated] + [(key,) for key in diff.deleted]
+        cursor.executemany('DELETE FROM movie_genres WHERE movie_id = ?', rewritten)
+        cursor.executemany('DELETE FROM movie_actors WHERE movie_id = ?', rewritten)
+        self._delete(cursor, 'movies', diff.deleted)
+
+        self._entity_ids(cursor, 'directors', [row[4] for row in rows])
+        cursor.executemany(UPSERT_STATEMENTS['movies'], [movie_values(row) for row in rows])
+
+        genre_links = [(int(row[0]), name) for row in rows for name in row[2].split(',')]
+        actor_links = [(int(row[0]), name.strip()) for row in rows for name in row[5].split(',')]
+        genres = self._entity_ids(cursor, 'genres', [name for _, name in genre_links])
+        actors = self._entity_ids(cursor, 'actors', [name for _, name in actor_links])
+        cursor.executemany('INSERT INTO movie_genres (movie_id, genre_id) VALUES (?, ?)',
+                           [(movie_key, genres[name]) for movie_key, name in genre_links])
+        cursor.executemany('INSERT INTO movie_actors (movie_id, actor_id) VALUES (?, ?)',
+                           [(movie_key, actors[name]) for movie_key, name in actor_links])
+
+        if len(rewritten) > 0:
+            cursor.execute('DELETE FROM genres WHERE id NOT IN (SELECT genre_id FROM movie_genres)')
+            cursor.execute('DELETE FROM actors WHERE id NOT IN (SELECT actor_id FROM movie_actors)')
+            cursor.execute('DELETE FROM directors WHERE name NOT IN (SELECT director FROM movies)')
+
+    def _entity_ids(self, cursor, table: str, names: Iterable[str]) -> Dict[str, int]:
+        """ Returns the ids of the named genres, actors or directors, inserting those that are not stored yet """
+        ids_by_name = dict(cursor.execute('SELECT name, id FROM {}'.format(table)).fetchall())
+        next_id = max(ids_by_name.values(), default=0) + 1
+        new_rows = list(enumerate((name for name in dict.fromkeys(names) if name not in ids_by_name), next_id))
+        cursor.executemany('INSERT INTO {} (id, name) VALUES (?, ?)'.format(table), new_rows)
+        ids_by_name.update((name, entity_id) for entity_id, name in new_rows)
+        return ids_by_name
+
+    def _delete_orphaned_reviews(self, cursor) -> List[str]:
+        orphans = [str(row[0]) for row in cursor.execute(
+            'SELECT id FROM reviews WHERE user_id NOT IN (SELECT id FROM users) '
+            'OR movie_id NOT IN (SELECT id FROM movies)').fetchall()]
+        self._delete(cursor, 'reviews', orphans)
+        return orphans
+
+    def _delete(self, cursor, table: str, keys: List[str]):
+        cursor.executemany('DELETE FROM {} WHERE id = ?'.format(table), [(key,) for key in keys])
+
+    def _record_state(self, cursor, source: str, diff: SyncDiff):
+        cursor.executemany('INSERT OR REPLACE INTO {} (source, key, hash) VALUES (?, ?, ?)'.format(SYNC_STATE_TABLE),
+                           [(source, key, diff.hashes[key]) for key, _ in diff.changed])
+        cursor.executemany('DELETE FROM {} WHERE source = ? AND key = ?'.format(SYNC_STATE_TABLE),
+                           [(source, key) for key in diff.deleted])
@@ -1,24 +1,24 @@
-import csv, os
-
 from datetime import date
-from typing import List
+from typing import Dict, List
 
-from sqlalchemy import desc, asc
+from sqlalchemy import and_, asc, event, exists, func, inspect
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
-from werkzeug.security import generate_password_hash
 
-from sqlalchemy.orm import scoped_session
-from flask import _app_ctx_stack
+from sqlalchemy.orm import scoped_session, joinedload, selectinload
+from flask import _app_ctx_stack, g, has_request_context
 
 from CS235Flix.domainmodel.model import Actor, Director, Genre, Movie, User, Review
-from CS235Flix.adapters.repository import AbstractRepository
-
-genres = None
-actors = None
-directors = None
-
+from CS235Flix.adapters.bulk_loader import BulkLoader, DEFAULT_BATCH_SIZE
+from CS235Flix.adapters.catalogue import MovieCatalogue, COLUMNS, movie_row
+from CS235Flix.adapters.csv_sync import CsvSync
+from CS235Flix.adapters.indexes import ReleaseYearIndex, CoStarIndex
+from CS235Flix.adapters.recommendations import RecommendationEngine
+from CS235Flix.adapters.repository import AbstractRepository, MovieQuery, Page, LOAD_ADMIN, LOAD_CARD, LOAD_DETAIL, \
+    LOAD_SIDEBAR
+from CS235Flix.adapters.title_search import RANK_COLUMNS, install_title_search, register_fold_title, \
+    title_search_source, title_search_statement
 
 class SessionContextManager:
     def __init__(self, session_factory):
@@ -51,17 +51,92 @@ class SessionContextManager:
         if not self.__session is None:
             self.__session.close()
 
+    def remove_session(self):
+        # Closes the session of the current scope and forgets it, so that the scope's next use starts a new session.
+        # Called when a Flask app context is torn down, this scopes sessions to requests
+        self.__session.remove()
+
+
+class QueryCounter:
+    """ Counts the statements executed through an engine, in total and (as g.query_count) for the current request """
+
+    def __init__(self, engine: Engine):
+        self.count = 0
+        self._engine = engine
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        if has_request_context():
+            g.query_count = g.get('query_count', 0) + 1
+
+    def detach(self):
+        event.remove(self._engine, 'before_cursor_execute', self._record)
+
+
+def movie_loading_options(load: str) -> list:
+    """ Returns the query options that eagerly load the relationships of the given eager-loading profile.
+        Many-to-one relationships are joined; collections are fetched with one SELECT ... IN per relationship.
+    """
+    if load is None or load == LOAD_CARD:
+        return []
+    if load == LOAD_SIDEBAR:
+        return [joinedload('_Movie__director'), selectinload('_Movie__actors')]
+    if load == LOAD_DETAIL:
+        return [joinedload('_Movie__director'),
+                selectinload('_Movie__actors'),
+                selectinload('_Movie__genres'),
+                selectinload('_Movie__reviews').joinedload('_Review__author')]
+    if load == LOAD_ADMIN:
+        return [joinedload('_Movie__director'),
+                selectinload('_Movie__actors'),
+                selectinload('_Movie__genres').selectinload('_Genre__classified_movies'),
+                selectinload('_Movie__reviews').joinedload('_Review__author')]
+    raise ValueError("Unknown eager-loading profile: {}".format(load))
+
 
 class SqlAlchemyRepository(AbstractRepository):
     def __init__(self, session_factory):
         self._session_cm = SessionContextManager(session_factory)
 
+        # Release year index, built on first use and discarded whenever a movie is added
+        self._year_index = None
+
+        # Columnar copy of the numeric movie attributes, which answers the revenue, release year, runtime and genre
+        # queries. create_app reads it from movies.csv, where missing values are null; otherwise it is built from the
+        # movies table on first use. Movies added afterwards are queued on it by add_movie
+        self._catalogue = None
+
+        # The ids of the colleagues of an actor, by actor name, queried from the movie_actors table and cached until
+        # movies or actors are added. Ids rather than Actor objects, which would outlive the session they belong to
+        self._co_stars = CoStarIndex(self._query_co_stars, max_entries=4096)
+
+        # Bumped by add_movie and add_genre, see get_catalogue_version()
+        self._catalogue_version = 0
+        # Movie counts by (catalogue version, query), see count(). Entries of older versions are dropped by the first
+        # count of a new version
+        self._counts = dict()
+        # Bumped per movie by add_review, see get_movie_review_version()
+        self._review_versions = dict()
+
+        # Top movies of every genre and the users' genre affinities, read from the database on first use and kept up to
+        # date by add_movie, add_genre and add_review
+        self._recommendations = RecommendationEngine(self._genre_movies, self._query_user_affinity)
+
+        # Whether the full-text title index is available, found out (and the index created) by the first title search
+        self._title_search_indexed = None
+        # Title searches fold titles in SQL with the same function as the MemoryRepository
+        register_fold_title(session_factory.kw['bind'])
+
     def close_session(self):
         self._session_cm.close_current_session()
 
     def reset_session(self):
         self._session_cm.reset_session()
 
+    def remove_session(self):
+        self._session_cm.remove_session()
+
     def add_user(self, user: User):
         with self._session_cm as scm:
             scm.session.add(user)
@@ -87,6 +162,7 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             scm.session.add(actor)
             scm.commit()
+        self._co_stars.invalidate()
 
     def get_actor(self, actor_full_name) -> Actor:
         actor_fullname = actor_full_name.strip()
@@ -105,18 +181,42 @@ class SqlAlchemyRepository(AbstractRepository):
         return actor
 
     def check_actor_existence_in_repo(self, actor:Actor) -> bool:
-        if isinstance(actor, Actor):
-            all_actors = list(self._session_cm.session.query(Actor).all())
-            if actor in all_actors:
-                return True
+        if isinstance(actor, Actor) and actor.actor_full_name is not None:
+            return self._in_session(actor) or self._exists(Actor._Actor__actor_full_name == actor.actor_full_name)
         return False
 
     def get_actor_colleague(self, actor:Actor) -> List[Actor]:
-        all_actors = list(self._session_cm.session.query(Actor).all())
-        if actor in all_actors:
-            return actor.actor_colleague
+        if self.check_actor_existence_in_repo(actor):
+            actor_ids = self._co_stars.colleagues(actor.actor_full_name)
+            if len(actor_ids) == 0:
+                return list()
+            return self._session_cm.session.query(Actor).filter(Actor.id.in_(actor_ids)).order_by(Actor.id).all()
         return None
 
+    def check_if_actors_worked_together(self, actor: Actor, colleague: Actor) -> bool:
+        if self.check_actor_existence_in_repo(actor):
+            colleague_id = self._session_cm.session.query(Actor.id).filter(
+                Actor._Actor__actor_full_name == colleague.actor_full_name).scalar()
+            return self._co_stars.worked_together(actor.actor_full_name, colleague_id)
+        return False
+
+    def get_number_of_colleagues(self, actor: Actor) -> int:
+        if self.check_actor_existence_in_repo(actor):
+            return self._co_stars.number_of_colleagues(actor.actor_full_name)
+        return None
+
+    def _query_co_stars(self, actor_fullname: str) -> List[int]:
+        # Self-join of the movie-actor association on movie_id yields every actor sharing a movie with the given one
+        rows = self._session_cm.session.execute(
+            'SELECT DISTINCT co_star.actor_id FROM movie_actors AS starring '
+            'JOIN movie_actors AS co_star ON co_star.movie_id = starring.movie_id '
+            'JOIN actors ON actors.id = starring.actor_id '
+            'WHERE actors.name = :name AND co_star.actor_id != starring.actor_id '
+            'ORDER BY co_star.actor_id',
+            {'name': actor_fullname}
+        ).fetchall()
+        return [row[0] for row in rows]
+
     def get_total_number_of_actors(self) -> int:
         return self._session_cm.session.query(Actor).count()
 
@@ -142,10 +242,9 @@ class SqlAlchemyRepository(AbstractRepository):
         return director
 
     def check_director_existence_in_repo(self, director:Director):
-        if isinstance(director, Director):
-            all_directors = list(self._session_cm.session.query(Director).all())
-            if director in all_directors:
-                return True
+        if isinstance(director, Director) and director.director_full_name is not None:
+            return self._in_session(director) or \
+                self._exists(Director._Director__director_full_name == director.director_full_name)
         return False
 
     def get_total_number_of_directors(self) -> int:
@@ -155,6 +254,8 @@ class SqlAlchemyRepository(AbstractRepository):
         with self._session_cm as scm:
             scm.session.add(genre)
             scm.commit()
+        self._recommendations.invalidate()
+        self._catalogue_version += 1
 
     def get_genre(self, genre_name: str) -> Genre:
         genre = None
@@ -171,16 +272,22 @@ class SqlAlchemyRepository(AbstractRepository):
         return self._session_cm.session.query(Genre).count()
 
     def check_genre_existence(self, genre:Genre) -> bool:
-        if isinstance(genre, Genre):
-            all_genres = list(self._session_cm.session.query(Genre).all())
-            if genre in all_genres:
-                return True
+        if isinstance(genre, Genre) and genre.genre_name is not None:
+            return self._in_session(genre) or self._exists(Genre._Genre__genre_name == genre.genre_name)
         return False
 
     def add_movie(self, movie:Movie):
+        # The row is read before the commit expires the movie's attributes
+        row = movie_row(movie)
         with self._session_cm as scm:
             scm.session.add(movie)
             scm.commit()
+        self._year_index = None
+        if self._catalogue is not None:
+            self._catalogue.add_row(dict(row, id=movie.id))
+        self._co_stars.invalidate()
+        self._recommendations.invalidate()
+        self._catalogue_version += 1
 
     def get_movie(self, title:str, release_year:int):
         movie = None
@@ -190,39 +297,58 @@ class SqlAlchemyRepository(AbstractRepository):
             pass
         return movie
 
-    def get_movies_by_release_year(self, target_year: int) -> List[Movie]:
+    def get_movies_by_release_year(self, target_year: int, load: str = None) -> List[Movie]:
         if target_year is None:
-            movies = list(self._session_cm.session.query(Movie).all())
+            movies = list(self._session_cm.session.query(Movie).options(*movie_loading_options(load)).all())
             return movies
         else:
-            movies = list(self._session_cm.session.query(Movie).filter_by(_release_year=target_year).all())
-            print(movies)
-            return movies
+            movie_ids = self.get_year_index().movie_ids(target_year)
+            if len(movie_ids) == 0:
+                return list()
+
+            # Return the movies in the order of the index, i.e. by title
+            return self._movies_in_order(movie_ids, load)
 
-    def get_movies_played_by_an_actor(self, actor_fullname: str):
+    def get_movies_played_by_an_actor(self, actor_fullname: str, load: str = None):
 
         actor = self.get_actor(actor_fullname)
 
-        if actor is not None:
+        if actor is not None and load is not None:
+            played_movies = self._session_cm.session.query(Movie).with_parent(actor, '_Actor__played_movies') \
+                .options(*movie_loading_options(load)).all()
+        elif actor is not None:
             played_movies = [movie for movie in actor.played_movies]
         else:
             played_movies = list()
         return played_movies
 
-    def get_movies_directed_by_a_director(self, director_fullname:str) -> List[Movie]:
+    def get_movies_directed_by_a_director(self, director_fullname:str, load: str = None) -> List[Movie]:
         director = self.get_director(director_fullname)
 
-        if director is not None:
+        if director is not None and load is not None:
+            directed_movies = self._session_cm.session.query(Movie) \
+                .with_parent(director, '_Director__directed_movies').options(*movie_loading_options(load)).all()
+        elif director is not None:
             directed_movies = [movie for movie in director.directed_movies]
         else:
             directed_movies = list()
         return directed_movies
 
-    def get_top_6_highest_revenue_movies(self) -> List[Movie]:
-        return list(self._session_cm.session.query(Movie).order_by(desc(Movie._revenue)).limit(6))
+    def get_top_6_highest_revenue_movies(self, load: str = None) -> List[Movie]:
+        # Movies whose revenue is unknown are left out
+        return self._movies_in_order(self.get_catalogue().top_k('revenue', 6), load)
 
-    def search_movies_by_actor_and_director(self, actor_fullname: str, director_name: str) -> List[Movie]:
-        movies_played_by_actor = self.get_movies_played_by_an_actor(actor_fullname=actor_fullname)
+    def get_movies_by_runtime(self, min_minutes: int = None, max_minutes: int = None, load: str = None) -> List[Movie]:
+        return self._movies_in_order(self.get_catalogue().filter_range('runtime_minutes', min_minutes, max_minutes),
+                                     load)
+
+    def _movies_in_order(self, movie_ids: List[int], load: str = None) -> List[Movie]:
+        movies_by_id = {movie.id: movie for movie in self.get_movies_by_index(movie_ids, load)}
+        return [movies_by_id[movie_id] for movie_id in movie_ids if movie_id in movies_by_id]
+
+    def search_movies_by_actor_and_director(self, actor_fullname: str, director_name: str,
+                                            load: str = None) -> List[Movie]:
+        movies_played_by_actor = self.get_movies_played_by_an_actor(actor_fullname=actor_fullname, load=load)
         director = self.get_director(director_name)
         output = list()
 
@@ -231,60 +357,157 @@ class SqlAlchemyRepository(AbstractRepository):
                       movie.director == director]
         return output
 
-    def search_movie_by_title(self, title: str) -> List[Movie]:
-        return list(self._session_cm.session.query(Movie).filter(Movie._title.like('%{}%'.format(title))).all())
+    def search_movie_by_title(self, title: str, load: str = None) -> List[Movie]:
+        if self._title_search_indexed is None:
+            self._title_search_indexed = install_title_search(self._session_cm.session.get_bind())
+        statement, parameters = title_search_statement(title, self._title_search_indexed)
+        movie_ids = [row[0] for row in self._session_cm.session.execute(statement, parameters)]
+        if len(movie_ids) == 0:
+            return []
+        movies = {movie.id: movie for movie in self.get_movies_by_index(movie_ids, load)}
+        return [movies[movie_id] for movie_id in movie_ids]
+
+    def page(self, query: MovieQuery, after_key: tuple = None, limit: int = 10, reverse: bool = False,
+             load: str = None) -> Page:
+        movie_list = self._movie_list(query)
+        if movie_list is None:
+            return Page([], [], False, False)
+
+        # One more key than asked for tells whether the list goes on past the page
+        keys = self._seek(movie_list, after_key, limit + 1, reverse)
+        goes_on = len(keys) > limit
+        keys = keys[:limit]
+        # Whether the list goes on the other way is one more seek of a single key, from after_key on
+        goes_back = after_key is not None and len(self._seek(movie_list, after_key, 1, not reverse, True)) > 0
+        if reverse:
+            keys.reverse()
+            has_previous, has_next = goes_on, goes_back
+        else:
+            has_previous, has_next = goes_back, goes_on
+
+        if len(keys) == 0:
+            return Page([], [], has_previous, has_next)
+        movies = {movie.id: movie for movie in self.get_movies_by_index([key[-1] for key in keys], load)}
+        return Page([movies[key[-1]] for key in keys], keys, has_previous, has_next)
+
+    def count(self, query: MovieQuery) -> int:
+        # A count reads the whole list, so it is taken once per list and catalogue version rather than on every page
+        key = (self._catalogue_version, query)
+        count = self._counts.get(key)
+        if count is None:
+            if self._counts and next(iter(self._counts))[0] != self._catalogue_version:
+                self._counts.clear()
+            count = self._counts[key] = self._count(query)
+        return count
+
+    def _count(self, query: MovieQuery) -> int:
+        # Genre and release year lists are counted by the catalogue, the others by the database
+        if query.kind == MovieQuery.GENRE:
+            return len(self.get_catalogue().movie_ids_for_genre(query.values[0]))
+        if query.kind == MovieQuery.RELEASE_YEAR:
+            return self.get_catalogue().year_histogram().get(query.values[0], 0)
+        movie_list = self._movie_list(query)
+        if movie_list is None:
+            return 0
+        _, source, parameters = movie_list
+        return self._session_cm.session.execute('SELECT COUNT(*) ' + source, parameters).scalar()
+
+    def _movie_list(self, query: MovieQuery):
+        """ Returns the key columns of the query's list, in the order of the list, and the FROM and WHERE clauses
+            selecting its rows with their parameters; or None if the actor or director named does not exist.
+            Each list is read in the order of an index: the genre, actor and director lists by movie id, through the
+            association tables or movies.director, and the release year lists by title, through release_year and title.
+        """
+        if query.kind == MovieQuery.GENRE:
+            # The genre is looked up first, so that its movie ids are read in order from the association's index
+            return (('movie_genres.movie_id',),
+                    'FROM movie_genres WHERE movie_genres.genre_id = (SELECT id FROM genres WHERE name = :genre_name)',
+                    {'genre_name': query.values[0]})
+        if query.kind == MovieQuery.RELEASE_YEAR:
+            return ('movies.title', 'movies.id'), 'FROM movies WHERE movies.release_year = :release_year', \
+                {'release_year': query.values[0]}
+        if query.kind == MovieQuery.TITLE:
+            if self._title_search_indexed is None:
+                self._title_search_indexed = install_title_search(self._session_cm.session.get_bind())
+            source, parameters = title_search_source(query.values[0], self._title_search_indexed)
+            return RANK_COLUMNS, source, parameters
+
+        actor = director = None
+        if query.kind in (MovieQuery.ACTOR, MovieQuery.ACTOR_AND_DIRECTOR):
+            actor = self.get_actor(query.values[0])
+            if actor is None:
+                return None
+        if query.kind in (MovieQuery.DIRECTOR, MovieQuery.ACTOR_AND_DIRECTOR):
+            director = self.get_director(query.values[-1])
+            if director is None:
+                return None
+
+        if query.kind == MovieQuery.ACTOR:
+            return ('movie_actors.movie_id',), 'FROM movie_actors WHERE movie_actors.actor_id = :actor_id', \
+                {'actor_id': actor.id}
+        if query.kind == MovieQuery.DIRECTOR:
+            return ('movies.id',), 'FROM movies WHERE movies.director = :director', \
+                {'director': director.director_full_name}
+        return (('movie_actors.movie_id',),
+                'FROM movie_actors JOIN movies ON movies.id = movie_actors.movie_id '
+                'WHERE movie_actors.actor_id = :actor_id AND movies.director = :director',
+                {'actor_id': actor.id, 'director': director.director_full_name})
+
+    def _seek(self, movie_list: tuple, after_key: tuple, limit: int, reverse: bool = False,
+              inclusive: bool = False) -> List[tuple]:
+        # A keyset seek: the row value comparison starts the ordered index scan at after_key rather than skipping rows
+        key_columns, source, parameters = movie_list
+        parameters = dict(parameters, limit=limit)
+        statement = 'SELECT {} {}'.format(', '.join(key_columns), source)
+        if after_key is not None:
+            operator = ('<' if reverse else '>') + ('=' if inclusive else '')
+            placeholders = [':key_{}'.format(position) for position in range(len(key_columns))]
+            statement += ' AND ({}) {} ({})'.format(', '.join(key_columns), operator, ', '.join(placeholders))
+            parameters.update(('key_{}'.format(position), part) for position, part in enumerate(after_key))
+        direction = ' DESC' if reverse else ''
+        statement += ' ORDER BY {} LIMIT :limit'.format(', '.join(column + direction for column in key_columns))
+        return [tuple(row) for row in self._session_cm.session.execute(statement, parameters)]
 
     def get_latest_movie(self):
-        return self._session_cm.session.query(Movie).order_by(desc(Movie._release_year)).first()
+        # Ties within the latest year go to the lowest id, as they did before release_year was indexed
+        return self._first_movie_of_year(func.max(Movie._release_year))
 
     def get_oldest_movie(self):
-        return self._session_cm.session.query(Movie).order_by(asc(Movie._release_year)).first()
+        return self._first_movie_of_year(func.min(Movie._release_year))
 
-    def get_release_year_of_previous_movie(self, movie: Movie):
-        previous_year = None
-        prev = self._session_cm.session.query(Movie).filter(Movie._release_year < movie.release_year).order_by(desc(Movie._release_year)).first()
+    def _first_movie_of_year(self, year):
+        # The year is read from one end of the release year index, then its movies are searched for the lowest id
+        session = self._session_cm.session
+        return session.query(Movie).filter(Movie._release_year == session.query(year).as_scalar()) \
+            .order_by(asc(Movie._id)).first()
 
-        if prev is not None:
-            previous_year = prev.release_year
-        return previous_year
+    def get_release_year_of_previous_movie(self, movie: Movie):
+        return self.get_catalogue().previous_year(movie.release_year)
 
     def get_release_year_of_next_movie(self, movie: Movie):
-        next_year = None
-        nxt = self._session_cm.session.query(Movie).filter(Movie._release_year > movie.release_year).order_by(asc(Movie._release_year)).first()
+        return self.get_catalogue().next_year(movie.release_year)
 
-        if nxt is not None:
-            next_year = nxt.release_year
-        return next_year
-
-    def get_movie_by_index(self, index:int):
-        return self._session_cm.session.query(Movie).filter_by(_id=index).one()
+    def get_movie_by_index(self, index:int, load: str = None):
+        return self._session_cm.session.query(Movie).options(*movie_loading_options(load)).filter_by(_id=index).one()
 
     def get_total_number_of_movies_in_repo(self):
         return self._session_cm.session.query(Movie).count()
 
     def get_movie_indexes_for_genre(self, genre_name:str):
-        # Use native SQL to retrieve movie ids, since there is no mapped class for the movie_genres table
-        row = self._session_cm.session.execute('SELECT id from genres WHERE name = :genre_name', {'genre_name': genre_name}).fetchone()
+        return self.get_catalogue().movie_ids_for_genre(genre_name)
 
-        if row is None:
-            # No genre with the genre_name - create an empty list.
-            movie_indexes = list()
-        else:
-            genre_id = row[0]
+    def check_movie_existence(self, movie: Movie) -> bool:
+        return self._in_session(movie) or \
+            self._exists(Movie._title == movie.title, Movie._release_year == movie.release_year)
 
-            # Retrieve movie id of movies associated with the genre.
-            movie_indexes = self._session_cm.session.execute(
-                'SELECT movie_id FROM movie_genres WHERE genre_id = :genre_id ORDER BY movie_id ASC',
-                {'genre_id': genre_id}
-            ).fetchall()  # This will be a list of tuples
-            movie_indexes = [id[0] for id in movie_indexes]
-        return movie_indexes
+    def _in_session(self, entity) -> bool:
+        # An entity persistent in the current session has a row in the database, so no query is needed to find it
+        state = inspect(entity, raiseerr=False)
+        return state is not None and state.persistent and state.session is self._session_cm.session.registry()
 
-    def check_movie_existence(self, movie: Movie) -> bool:
-        check_movie = self.get_movie(movie.title, movie.release_year)
-        if check_movie is not None:
-            return True
-        return False
+    def _exists(self, *criteria) -> bool:
+        # SELECT EXISTS stops at the first matching row, which the indexes on the compared columns lead straight to
+        return self._session_cm.session.query(exists().where(and_(*criteria))).scalar()
 
     def get_movie_actors(self, movie:Movie) -> List[Actor]:
         if isinstance(movie, Movie):
@@ -319,14 +542,24 @@ class SqlAlchemyRepository(AbstractRepository):
         if self.check_movie_existence(movie):
             return movie.runtime_minutes
 
-    def get_movies_by_index(self, ids_list):
-        return list(self._session_cm.session.query(Movie).filter(Movie._id.in_(ids_list)).all())
+    def get_movies_by_index(self, ids_list, load: str = None):
+        return list(self._session_cm.session.query(Movie).options(*movie_loading_options(load))
+                    .filter(Movie._id.in_(ids_list)).all())
 
     def add_review(self, review:Review):
         super().add_review(review)
+        movie_id = review.movie.id
+        username = review.review_author.username
+        genre_names = [genre.genre_name for genre in review.movie.genres]
         with self._session_cm as scm:
             scm.session.add(review)
             scm.commit()
+        self._review_versions[movie_id] = self._review_versions.get(movie_id, 0) + 1
+        self._recommendations.record_review(username, genre_names, review.rating)
+
+    def get_movie_review_version(self, movie_id: int) -> int:
+        # Counts the reviews added through this repository; reviews written by other processes are not seen
+        return self._review_versions.get(movie_id, 0)
 
     def get_reviews(self)-> List[Review]:
         return list(self._session_cm.session.query(Review).all())
@@ -352,30 +585,75 @@ class SqlAlchemyRepository(AbstractRepository):
         return genre_list
 
     def get_top_movie_by_genre(self, genre:Genre) -> Movie:
-        movies_classified_by_genre = list(genre.classified_movies)
-        movies_classified_by_genre.sort(key=lambda x: x.revenue, reverse=True)
-        return movies_classified_by_genre[0]
-
-    def get_suggestion_for_user(self, username: str) -> List[Movie]:
-        user_reviewed_movies = self.get_user_reviewed_movie(username)
-        user_interested_genres = self.get_user_interested_genre_from_reviewed_movies(user_reviewed_movies)
-        suggestion = list()
-        if len(user_interested_genres) > 0:
-            for genre in user_interested_genres:
-                suggested_movie = self.get_top_movie_by_genre(genre)
-                if suggested_movie not in suggestion:
-                    suggestion.append(suggested_movie)
-        return suggestion
+        top_movies = self._recommendations.top_movies(genre.genre_name)
+        if len(top_movies) > 0:
+            return self.get_movie_by_index(top_movies[0])
+        return None
+
+    def get_suggestion_for_user(self, username: str, load: str = None) -> List[Movie]:
+        user = self.get_user(username)
+        if user is None:
+            return list()
+        # Like the review versions, affinities only follow the reviews added through this repository
+        movie_ids = self._recommendations.suggestions(user.username)
+        if len(movie_ids) == 0:
+            return list()
+        return self._movies_in_order(movie_ids, load)
+
+    def _genre_movies(self):
+        return self.get_catalogue().genre_rows('revenue')
+
+    def _query_user_affinity(self, username: str) -> Dict[str, float]:
+        rows = self._session_cm.session.execute(
+            'SELECT genres.name, SUM(reviews.ratings) FROM users '
+            'JOIN reviews ON reviews.user_id = users.id '
+            'JOIN movie_genres ON movie_genres.movie_id = reviews.movie_id '
+            'JOIN genres ON genres.id = movie_genres.genre_id '
+            'WHERE users.username = :username GROUP BY genres.name',
+            {'username': username}
+        ).fetchall()
+        return {genre_name: rating for genre_name, rating in rows}
 
     def get_earliest_year(self):
-        movie = self.get_oldest_movie()
-        if movie is not None:
-            return movie.release_year
+        return self.get_catalogue().earliest_year()
 
     def get_latest_year(self):
-        movie = self.get_latest_movie()
-        if movie is not None:
-            return movie.release_year
+        return self.get_catalogue().latest_year()
+
+    def get_year_index(self) -> ReleaseYearIndex:
+        if self._year_index is None:
+            year_index = ReleaseYearIndex()
+            rows = self._session_cm.session.execute('SELECT id, release_year, title FROM movies').fetchall()
+            for movie_id, release_year, title in rows:
+                year_index.add(release_year, movie_id, sort_key=title)
+            self._year_index = year_index
+        return self._year_index
+
+    def get_catalogue_version(self) -> int:
+        return self._catalogue_version
+
+    def get_catalogue(self) -> MovieCatalogue:
+        # Only release year, runtime and revenue are stored in the movies table, a missing revenue as 0; the other
+        # columns stay null. create_app sets a catalogue read from movies.csv instead
+        if self._catalogue is None:
+            session = self._session_cm.session
+            rows = dict()
+            for movie_id, release_year, runtime_minutes, revenue in session.execute(
+                    'SELECT id, release_year, runtime_minutes, revenue FROM movies').fetchall():
+                row = {name: None for name in COLUMNS}
+                row.update(id=movie_id, release_year=release_year, runtime_minutes=runtime_minutes, revenue=revenue,
+                           genres=list())
+                rows[movie_id] = row
+            for movie_id, genre_name in session.execute(
+                    'SELECT movie_genres.movie_id, genres.name FROM movie_genres '
+                    'JOIN genres ON genres.id = movie_genres.genre_id').fetchall():
+                if movie_id in rows:
+                    rows[movie_id]['genres'].append(genre_name)
+            self._catalogue = MovieCatalogue(rows.values())
+        return self._catalogue
+
+    def set_catalogue(self, catalogue: MovieCatalogue):
+        self._catalogue = catalogue
 
 
 # ------------------------------------------------------------------
@@ -383,206 +661,17 @@ class SqlAlchemyRepository(AbstractRepository):
 # ------------------------------------------------------------------
 
 
-def read_csv_file(filename: str):
-    with open(filename, encoding='utf-8-sig') as infile:
-        reader = csv.reader(infile)
-
-        # Read first line of the the CSV file.
-        headers = next(reader)
-
-        # Read remaining rows from the CSV file.
-        for row in reader:
-            # Strip any leading/trailing white space from data read.
-            row = [item.strip() for item in row]
-            yield row
-
-
-def movie_record_generator(filename: str):
-    for data_row in read_csv_file(filename=filename):
-        movie_key = int(data_row[0])
-        movie_title = data_row[1]
-
-        try:
-            movie_revenue = float(data_row[10])
-        except ValueError:
-            movie_revenue = 0
-
-        list_of_genre_names = data_row[2].split(',')
-
-        movie_description = data_row[3]
-
-        movie_director_fullname = data_row[4]
-
-        list_of_actor_fullname = data_row[5].split(',')
-        list_of_actor_fullname = [name.strip() for name in list_of_actor_fullname]
-
-        release_year = int(data_row[6])
-
-        runtime = int(data_row[7])
-
-        if movie_director_fullname not in directors:
-            directors[movie_director_fullname] = list()
-        directors[movie_director_fullname].append(movie_key)
-
-        for genre_name in list_of_genre_names:
-            if genre_name not in genres:
-                genres[genre_name] = list()
-            genres[genre_name].append(movie_key)
-
-        for actor_fullname in list_of_actor_fullname:
-            if actor_fullname not in actors:
-                actors[actor_fullname] = list()
-            actors[actor_fullname].append(movie_key)
-
-        movie_data = [movie_key, movie_title, movie_description, movie_director_fullname, release_year, runtime,
-                      movie_revenue]
-        yield movie_data
-
-
-def get_genre_records():
-    genre_records = list()
-    genre_key = 0
-
-    for genre in genres.keys():
-        genre_key += 1
-        genre_records.append((genre_key, genre))
-    return genre_records
-
-
-def get_actor_records():
-    actor_records = list()
-    actor_key = 0
-    for actor in actors.keys():
-        actor_key += 1
-        actor_records.append((actor_key, actor))
-    return actor_records
-
-
-def generic_generator(filename, post_process=None):
-    with open(filename) as infile:
-        reader = csv.reader(infile)
-
-        # Read first line of CSV file.
-        next(reader)
-
-        # Read remaining rows from the CSV file
-        for row in reader:
-            # Strip any leading/trailing white space from data read.
-            row = [item.strip() for item in row]
-
-            if post_process is not None:
-                row = post_process(row)
-            yield row
-
-
-def get_director_records():
-    director_records = list()
-    director_key = 0
-    for director in directors.keys():
-        director_key += 1
-        director_records.append((director_key, director))
-    return director_records
-
-
-def movie_genres_generator():
-    movie_genres_key = 0
-    genre_key = 0
-
-    for genre in genres.keys():
-        genre_key += 1
-        for movie_key in genres[genre]:
-            movie_genres_key += 1
-            yield movie_genres_key, movie_key, genre_key
-
-
-def movie_actors_generator():
-    movie_actors_key = 0
-    actor_key = 0
-
-    for actor in actors.keys():
-        actor_key += 1
-        for movie_key in actors[actor]:
-            movie_actors_key += 1
-            yield movie_actors_key, movie_key, actor_key
-
-
-def movie_directors_generator():
-    movie_directors_key = 0
-    director_key = 0
-
-    for director in directors.keys():
-        director_key += 1
-        for movie_key in directors[director]:
-            movie_directors_key += 1
-            yield movie_directors_key, movie_key, director_key
-
+def populate(engine: Engine, data_path: str, workers: int = 1, batch_size: int = DEFAULT_BATCH_SIZE,
+             pre_hashed: bool = False, progress=None) -> Dict[str, dict]:
+    """ Loads the CSV files in data_path with a BulkLoader, resuming a load that was interrupted, and returns the
+        rows written, seconds spent and rows per second of every table
+    """
+    return BulkLoader(engine, batch_size, workers, pre_hashed, progress).load(data_path)
 
-def process_user(user_row):
-    user_row[2] = generate_password_hash(user_row[2])
-    return user_row
-
-
-def populate(engine: Engine, data_path: str):
-    connection = engine.raw_connection()
-    cursor = connection.cursor()
-
-    global genres
-    global actors
-    global directors
-
-    genres = dict()
-    actors = dict()
-    directors = dict()
 
-    insert_movies = """
-        INSERT INTO movies (id, title, description, director, release_year, runtime_minutes, revenue)
-        VALUES(?, ?, ?, ?, ?, ?, ?)"""
-    cursor.executemany(insert_movies, movie_record_generator(os.path.join(data_path, 'movies.csv')))
-
-    insert_genres = """
-        INSERT INTO genres(id, name)
-        VALUES(?, ?)"""
-    cursor.executemany(insert_genres, get_genre_records())
-
-    insert_actors = """
-        INSERT INTO actors(id, name)
-        VALUES(?, ?)"""
-    cursor.executemany(insert_actors, get_actor_records())
-
-    insert_directors = """
-        INSERT INTO directors(id, name)
-        VALUES(?, ?)"""
-    cursor.executemany(insert_directors, get_director_records())
-
-    insert_users = """
-        INSERT INTO users(
-        id, username, password)
-        VALUES(?, ?, ?)"""
-    cursor.executemany(insert_users, generic_generator(os.path.join(data_path, 'users.csv'), process_user))
-
-    insert_reviews = """
-        INSERT INTO reviews(
-        id, user_id, movie_id, review_text, ratings, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)"""
-    cursor.executemany(insert_reviews, generic_generator(os.path.join(data_path, 'reviews.csv')))
-
-    insert_movie_genres = """
-        INSERT INTO movie_genres(
-        id, movie_id, genre_id)
-        VALUES(?, ?, ?)"""
-    cursor.executemany(insert_movie_genres, movie_genres_generator())
-
-    insert_movie_actors = """
-        INSERT INTO movie_actors(
-        id, movie_id, actor_id)
-        VALUES(?, ?, ?)"""
-    cursor.executemany(insert_movie_actors, movie_actors_generator())
-
-    # insert_movie_directors = """
-    #     INSERT INTO movie_directors(
-    #     id, movie_id, director_id)
-    #     VALUES(?, ?, ?)"""
-    # cursor.executemany(insert_movie_directors, movie_directors_generator())
-
-    connection.commit()
-    connection.close()
+def sync(engine: Engine, data_path: str, workers: int = 1, pre_hashed: bool = False,
+         progress=None) -> Dict[str, Dict[str, int]]:
+    """ Applies the changes of the CSV files in data_path since the last sync with a CsvSync, and returns the number
+        of inserted, updated, deleted, unchanged and skipped rows of every source table
+    """
+    return CsvSync(engine, workers, pre_hashed, progress).sync(data_path)
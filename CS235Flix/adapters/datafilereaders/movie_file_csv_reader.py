@@ -1,8 +1,22 @@
 
 import csv
+from collections import namedtuple
+from typing import Iterator
 
 from CS235Flix.domainmodel.model import Movie, Actor, Genre, Director
 
+MovieRecord = namedtuple('MovieRecord', ['id', 'title', 'genres', 'description', 'director', 'actors', 'release_year',
+                                         'runtime_minutes', 'rating', 'votes', 'revenue', 'metascore'])
+
+
+def parse_number(text, number_type):
+    if text is None:
+        return None
+    try:
+        return number_type(text)
+    except ValueError:
+        return None
+
 
 class MovieFileCSVReader:
 
@@ -23,86 +37,59 @@ class MovieFileCSVReader:
 
 
     def read_csv_file(self):
-        duplicated_genre = []
-        duplicated_actors = []
+        # Dictionaries keep first-seen order while making each duplicate check O(1)
+        movies = dict.fromkeys(self.__dataset_of_movies)
+        directors = dict.fromkeys(self.__dataset_of_directors)
+        actors = dict.fromkeys(self.__dataset_of_actors)
+        genres = dict.fromkeys(self.__dataset_of_genres)
+
+        for record in self.stream_records():
+            movies.setdefault(Movie(record.title, record.release_year, record.id))
+            directors.setdefault(Director(record.director))
+            for actor_full_name in record.actors:
+                actors.setdefault(Actor(actor_full_name))
+            for genre_name in record.genres:
+                genres.setdefault(Genre(genre_name))
+
+            self.__dataset_of_description.append(record.description)
+
+            # The numeric data sets stop at the first value of a row that does not parse, so that a row without a
+            # revenue contributes neither a revenue nor a metascore
+            numeric_values = [(record.runtime_minutes, self.__dataset_of_runtime),
+                              (record.rating, self.__dataset_of_ratings),
+                              (record.votes, self.__dataset_of_votes),
+                              (record.revenue, self.__dataset_of_revenue),
+                              (record.metascore, self.__dataset_of_metadata)]
+            for value, dataset in numeric_values:
+                if value is None:
+                    break
+                dataset.append(value)
+
+        self.__dataset_of_movies = list(movies)
+        self.__dataset_of_directors = list(directors)
+        self.__dataset_of_actors = list(actors)
+        self.__dataset_of_genres = list(genres)
+
+    def stream_records(self) -> Iterator[MovieRecord]:
+        """ Yields one MovieRecord per row of the file without keeping earlier rows in memory.
+            Numeric fields that are missing or do not parse are None.
+        """
         with open(self.__file_name, mode='r', encoding='utf-8-sig') as csvfile:
-            movie_file_reader = csv.DictReader(csvfile)
-            for row in movie_file_reader:
-                # Append to the movie data set
-                title = row['Title']
-                year = int(row['Year'])
-                movie = Movie(title, year, 4)
-                if (movie not in self.__dataset_of_movies):
-                    self.__dataset_of_movies.append(movie)
-                # Store potential duplicated actors
-                duplicated_actors.append(row['Actors'].split(','))  # This is a list of list
-
-                # Store unique directors
-                director = Director(row['Director'])
-                if director not in self.__dataset_of_directors:
-                    self.__dataset_of_directors.append(director)
-
-                # Store potential duplicated genres
-                duplicated_genre.append(row['Genre'].split(','))
-
-                #Store description
-                description = row['Description']
-                self.__dataset_of_description.append(description)
-
-
-                # Store runtime
-                runtime = row['Runtime (Minutes)']
-                try:
-                    runtime = int(runtime)
-                    self.__dataset_of_runtime.append(runtime)
-                except ValueError:
-                    continue
-
-                # Store ratings
-                rating = row['Rating']
-                try:
-                    rating = float(rating)
-                    self.__dataset_of_ratings.append(rating)
-                except ValueError:
-                    continue
-
-                # Store votes
-                vote = row['Votes']
-                try:
-                    vote = int(vote)
-                    self.__dataset_of_votes.append(vote)
-                except ValueError:
-                    continue
-
-                # Store revenue
-                revenue = row["Revenue (Millions)"]
-                try:
-                    revenue = float(revenue)
-                    self.__dataset_of_revenue.append(revenue)
-                except ValueError:
-                    continue
-
-                # Store Metascore
-                meta_score = row["Metascore"]
-                try:
-                    meta_score = float(meta_score)
-                    self.__dataset_of_metadata.append(meta_score)
-                except ValueError:
-                    continue
-
-
-
-        for actor_list in duplicated_actors:
-            for current_actor in actor_list:
-                current_actor = Actor(current_actor)
-                if current_actor not in self.__dataset_of_actors:
-                    self.__dataset_of_actors.append(current_actor)
-
-        for genre_list in duplicated_genre:
-            for current_genre in genre_list:
-                current_genre = Genre(current_genre)
-                if current_genre not in self.__dataset_of_genres:
-                    self.__dataset_of_genres.append(current_genre)
+            for row in csv.DictReader(csvfile):
+                yield MovieRecord(
+                    id=parse_number(row.get('id'), int),
+                    title=row['Title'],
+                    genres=[genre_name.strip() for genre_name in row['Genre'].split(',')],
+                    description=row['Description'],
+                    director=row['Director'],
+                    actors=[actor_full_name.strip() for actor_full_name in row['Actors'].split(',')],
+                    release_year=int(row['Year']),
+                    runtime_minutes=parse_number(row['Runtime (Minutes)'], int),
+                    rating=parse_number(row['Rating'], float),
+                    votes=parse_number(row['Votes'], int),
+                    revenue=parse_number(row['Revenue (Millions)'], float),
+                    metascore=parse_number(row['Metascore'], float)
+                )
 
     @property
     def dataset_of_movies(self):
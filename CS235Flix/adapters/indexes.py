@@ -0,0 +1,230 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Iterable, List
+
+
+class ReleaseYearIndex:
+    """ Buckets movie ids by release year.
+
+        Keeps a sorted list of the distinct release years plus a map from each year to the ids of the movies released
+        in that year, so that a year page and its previous/next years come from one dictionary hit and a bisect.
+    """
+
+    def __init__(self):
+        self._years = list()
+        self._buckets = dict()
+
+    @property
+    def years(self) -> List[int]:
+        return list(self._years)
+
+    def add(self, release_year: int, movie_id: int, sort_key=None):
+        """ Adds movie_id to the bucket of release_year. Ids within a bucket are ordered by sort_key (default: id) """
+        if release_year is None:
+            return
+        if sort_key is None:
+            sort_key = movie_id
+
+        bucket = self._buckets.get(release_year)
+        if bucket is None:
+            bucket = self._buckets[release_year] = list()
+            insort(self._years, release_year)
+        insort(bucket, (sort_key, movie_id))
+
+    def clear(self):
+        self._years.clear()
+        self._buckets.clear()
+
+    def movie_ids(self, release_year: int) -> List[int]:
+        return [movie_id for _, movie_id in self._buckets.get(release_year, ())]
+
+    def keys(self, release_year: int) -> List[tuple]:
+        """ Returns the sorted (sort_key, id) pairs of the year's bucket. The list is shared and must not be changed """
+        return self._buckets.get(release_year, [])
+
+    def previous_year(self, release_year: int):
+        """ Returns the latest year before release_year that has movies, or None """
+        index = bisect_left(self._years, release_year)
+        if index > 0:
+            return self._years[index - 1]
+        return None
+
+    def next_year(self, release_year: int):
+        """ Returns the earliest year after release_year that has movies, or None """
+        index = bisect_right(self._years, release_year)
+        if index < len(self._years):
+            return self._years[index]
+        return None
+
+    def earliest_year(self):
+        if len(self._years) > 0:
+            return self._years[0]
+        return None
+
+    def latest_year(self):
+        if len(self._years) > 0:
+            return self._years[-1]
+        return None
+
+
+class CoStarIndex:
+    """ Adjacency sets of actors who played together, built lazily from the movie -> actors relation.
+
+        colleagues_of(actor) supplies the colleagues of one actor, in whatever form the repository identifies actors
+        by: Actor objects in memory, names and ids in the database. Its answer is cached per actor until invalidate()
+        is called, which the repositories do whenever movies or actors are added. With max_entries, the sets of at
+        most that many actors are kept, dropping the ones cached first.
+    """
+
+    def __init__(self, colleagues_of: Callable[[object], Iterable], max_entries: int = None):
+        self._colleagues_of = colleagues_of
+        self._max_entries = max_entries
+        self._adjacency = dict()
+
+    def colleagues(self, actor) -> List:
+        return list(self._colleague_set(actor))
+
+    def worked_together(self, actor, colleague) -> bool:
+        return colleague in self._colleague_set(actor)
+
+    def number_of_colleagues(self, actor) -> int:
+        return len(self._colleague_set(actor))
+
+    def invalidate(self):
+        self._adjacency.clear()
+
+    def _colleague_set(self, actor) -> dict:
+        # An insertion-ordered dict doubles as an ordered set
+        colleagues = self._adjacency.get(actor)
+        if colleagues is None:
+            if self._max_entries is not None and len(self._adjacency) >= self._max_entries:
+                del self._adjacency[next(iter(self._adjacency))]
+            colleagues = self._adjacency[actor] = dict.fromkeys(self._colleagues_of(actor))
+        return colleagues
+
+
+class PagedListIndex:
+    """ Sorted key lists of the movie lists that are read a page at a time, e.g. the (id,) keys of the movies of a
+        genre. A list is built and sorted the first time it is paged and cached until invalidate() is called, which
+        the repositories do whenever movies, genres, actors or directors are added; a page is then one bisect.
+        Empty lists are not cached, so that searches for names that do not exist leave nothing behind.
+    """
+
+    def __init__(self):
+        self._lists = dict()
+
+    def keys(self, list_name, build: Callable[[], Iterable[tuple]]) -> List[tuple]:
+        keys = self._lists.get(list_name)
+        if keys is None:
+            keys = sorted(build())
+            if len(keys) > 0:
+                self._lists[list_name] = keys
+        return keys
+
+    def invalidate(self):
+        self._lists.clear()
+
+
+def keyset_slice(keys: List[tuple], after_key, limit: int, reverse: bool = False) -> tuple:
+    """ Returns the page of up to limit sorted keys that follow after_key (from the start when it is None) or, with
+        reverse=True, that precede it (up to the end when it is None), as (page, whether keys precede the page,
+        whether keys follow it)
+    """
+    if reverse:
+        end = len(keys) if after_key is None else bisect_left(keys, after_key)
+        start = max(end - limit, 0)
+    else:
+        start = 0 if after_key is None else bisect_right(keys, after_key)
+        end = min(start + limit, len(keys))
+    return keys[start:end], start > 0, end < len(keys)
+
+
+def fold_title(text: str) -> str:
+    """ The form titles and title queries are compared in: lower case, without surrounding white space """
+    return text.strip().lower()
+
+
+def title_match_rank(folded_title: str, query: str) -> tuple:
+    """ Orders the titles containing query: an exact match first, then titles starting with query, then titles with
+        a word starting with query, then the rest; within each, earlier and then shorter matches come first.
+        The database repository orders its full-text matches by the same rules.
+    """
+    position = folded_title.find(query)
+    if folded_title == query:
+        category = 0
+    elif position == 0:
+        category = 1
+    elif (' ' + folded_title).find(' ' + query) >= 0:
+        category = 2
+    else:
+        category = 3
+    return category, position, len(folded_title)
+
+
+class TitleSearchIndex:
+    """ Inverted index from the character trigrams of folded movie titles to movie ids.
+
+        A query of three or more characters is answered by intersecting the posting sets of its trigrams, smallest
+        first, and checking the few candidates left for the whole query, so its cost follows the number of titles
+        sharing those trigrams rather than the size of the catalogue. Shorter queries have no trigram and scan the
+        folded titles, which are kept so that no title is lowered per query.
+    """
+
+    NGRAM_LENGTH = 3
+
+    def __init__(self):
+        self._titles = dict()
+        self._postings = dict()
+
+    def add(self, movie_id: int, title: str):
+        if title is None:
+            return
+        folded_title = fold_title(title)
+        self._titles[movie_id] = (folded_title, title)
+        for ngram in self._ngrams(folded_title):
+            postings = self._postings.get(ngram)
+            if postings is None:
+                postings = self._postings[ngram] = set()
+            postings.add(movie_id)
+
+    def clear(self):
+        self._titles.clear()
+        self._postings.clear()
+
+    def search(self, text: str) -> List[int]:
+        """ Returns the ids of the movies whose title contains text, ignoring case, best match first """
+        return [key[-1] for key in self.ranked_keys(text)]
+
+    def ranked_keys(self, text: str) -> List[tuple]:
+        """ Returns the (category, position, length, title, id) keys of the matches of text, best match first """
+        query = fold_title(text)
+        if len(query) < self.NGRAM_LENGTH:
+            candidates = self._titles.keys()
+        else:
+            candidates = self._candidates(query)
+
+        matches = list()
+        for movie_id in candidates:
+            folded_title, title = self._titles[movie_id]
+            if query in folded_title:
+                matches.append(title_match_rank(folded_title, query) + (title, movie_id))
+        matches.sort()
+        return matches
+
+    def _candidates(self, query: str) -> set:
+        posting_sets = list()
+        for ngram in self._ngrams(query):
+            postings = self._postings.get(ngram)
+            if postings is None:
+                return set()
+            posting_sets.append(postings)
+        posting_sets.sort(key=len)
+
+        candidates = set(posting_sets[0])
+        for postings in posting_sets[1:]:
+            candidates &= postings
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    def _ngrams(self, text: str) -> set:
+        return {text[start:start + self.NGRAM_LENGTH] for start in range(len(text) - self.NGRAM_LENGTH + 1)}
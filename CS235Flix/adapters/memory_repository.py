@@ -1,17 +1,22 @@
 import csv
 import os
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 
-from werkzeug.security import generate_password_hash
-from bisect import bisect_left, insort_left
-from CS235Flix.adapters.repository import AbstractRepository
-from CS235Flix.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList, add_movie_attributes, \
-    make_review
+from bisect import bisect_left
+from heapq import nlargest
+from CS235Flix.adapters.catalogue import MovieCatalogue
+from CS235Flix.adapters.chunked_loader import StageTimer, parse_chunks, read_chunk_rows
+from CS235Flix.adapters.indexes import ReleaseYearIndex, CoStarIndex, PagedListIndex, TitleSearchIndex, keyset_slice
+from CS235Flix.adapters.password_hashing import hash_passwords
+from CS235Flix.adapters.recommendations import RecommendationEngine
+from CS235Flix.adapters.repository import AbstractRepository, MovieQuery, Page
+from CS235Flix.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList, make_review
 
 
 class MemoryRepository(AbstractRepository):
-    # Movies are ordered by title then by release year
+    # Movies are ordered by release year then by title. This order is relied upon by movie_index(), so the list must
+    # never be re-sorted in place; other orderings are kept as separate views.
     def __init__(self):
         self._users = list()
         self._actors = list()
@@ -22,44 +27,100 @@ class MemoryRepository(AbstractRepository):
         self._watchlists = list()
         self._movie_index = dict()
 
+        # Hash indexes maintained by the add_* methods so that lookups by name or key do not scan the lists above
+        self._users_by_name = dict()
+        self._actors_by_name = dict()
+        self._actors_by_folded_name = dict()
+        self._directors_by_name = dict()
+        self._directors_by_folded_name = dict()
+        self._genres_by_name = dict()
+        self._movies_by_key = dict()
+
+        # Secondary view maintained by add_movie, bucketing movie ids by release year (ordered by title within a year)
+        self._movies_by_year = ReleaseYearIndex()
+
+        # Trigram index over the movie titles, answering title searches without scanning the movies
+        self._movies_by_title_ngram = TitleSearchIndex()
+
+        # Colleagues are derived from the movies each actor played in and cached until movies or actors are added
+        self._co_stars = CoStarIndex(lambda actor: actor.actor_colleague)
+
+        # Sorted keys of the genre, actor and director movie lists read by page(), cached until the catalogue changes
+        self._paged_lists = PagedListIndex()
+
+        # Top movies of every genre and the users' genre affinities, kept up to date by add_movie, add_genre and
+        # add_review, from which get_suggestion_for_user() answers
+        self._recommendations = RecommendationEngine(self._genre_movies, self._user_affinity)
+
+        # Bumped by add_movie and add_genre, see get_catalogue_version()
+        self._catalogue_version = 0
+        # Movie counts by (catalogue version, query), see count(). Entries of older versions are dropped by the first
+        # count of a new version
+        self._counts = dict()
+        # Bumped per movie by add_review, see get_movie_review_version()
+        self._review_versions = dict()
+
+        # Columnar copy of the numeric movie attributes, which answers the revenue, release year, runtime and genre
+        # queries. populate() reads it from movies.csv, where missing values are null; otherwise it is built from the
+        # movies on first use, which hold release year, runtime and revenue only. Movies added afterwards are queued on
+        # it by add_movie
+        self._catalogue = None
+
     def add_user(self, user: User):
         if isinstance(user, User):
             self._users.append(user)
+            if user.username is not None:
+                self._users_by_name.setdefault(user.username, user)
 
     def get_user(self, username) -> User:
-        return next((user for user in self._users if user.username == username.lower()), None)
+        return self._users_by_name.get(username.lower())
 
     def get_user_watched_movies(self, user: User) -> List[Movie]:
-        if user in self._users:
+        if self.check_user_existence(user):
             return user.watched_movies
         return None
 
     def get_user_reviews(self, user: User) -> List[Review]:
-        if user in self._users:
+        if self.check_user_existence(user):
             return user.reviews
         return None
 
     def get_user_time_spent_watching_movies_minutes(self, user: User):
-        if user in self._users:
+        if self.check_user_existence(user):
             return user.time_spent_watching_movies_minutes
         return None
 
     def add_actor(self, actor: Actor):
         if isinstance(actor, Actor):
             self._actors.append(actor)
+            if actor.actor_full_name is not None:
+                self._actors_by_name.setdefault(actor.actor_full_name, actor)
+                self._actors_by_folded_name.setdefault(fold_name(actor.actor_full_name), actor)
+            self._co_stars.invalidate()
+            self._paged_lists.invalidate()
 
     def get_actor(self, actor_full_name) -> Actor:
-        return next((actor for actor in self._actors if actor.actor_full_name == actor_full_name), None)
+        return self._actors_by_name.get(actor_full_name)
 
     def check_actor_existence_in_repo(self, actor: Actor) -> bool:
         if isinstance(actor, Actor):
-            if actor in self._actors:
+            if actor.actor_full_name in self._actors_by_name:
                 return True
         return False
 
     def get_actor_colleague(self, actor: Actor) -> List[Actor]:
-        if actor in self._actors:
-            return actor.actor_colleague
+        if self.check_actor_existence_in_repo(actor):
+            return self._co_stars.colleagues(actor)
+        return None
+
+    def check_if_actors_worked_together(self, actor: Actor, colleague: Actor) -> bool:
+        if self.check_actor_existence_in_repo(actor):
+            return self._co_stars.worked_together(actor, colleague)
+        return False
+
+    def get_number_of_colleagues(self, actor: Actor) -> int:
+        if self.check_actor_existence_in_repo(actor):
+            return self._co_stars.number_of_colleagues(actor)
         return None
 
     def get_total_number_of_actors(self) -> int:
@@ -68,14 +129,17 @@ class MemoryRepository(AbstractRepository):
     def add_director(self, director: Director):
         if isinstance(director, Director):
             self._directors.append(director)
+            if director.director_full_name is not None:
+                self._directors_by_name.setdefault(director.director_full_name, director)
+                self._directors_by_folded_name.setdefault(fold_name(director.director_full_name), director)
+            self._paged_lists.invalidate()
 
     def get_director(self, director_full_name) -> Director:
-        return next((director for director in self._directors if director.director_full_name == director_full_name),
-                    None)
+        return self._directors_by_name.get(director_full_name)
 
     def check_director_existence_in_repo(self, director: Director):
         if isinstance(director, Director):
-            if director in self._directors:
+            if director.director_full_name in self._directors_by_name:
                 return True
         return False
 
@@ -85,6 +149,11 @@ class MemoryRepository(AbstractRepository):
     def add_genre(self, genre: Genre):
         if isinstance(genre, Genre):
             self._genres.append(genre)
+            if genre.genre_name is not None:
+                self._genres_by_name.setdefault(genre.genre_name, genre)
+            self._paged_lists.invalidate()
+            self._recommendations.invalidate()
+            self._catalogue_version += 1
 
     def get_genres(self) -> List[Genre]:
         return self._genres
@@ -94,46 +163,48 @@ class MemoryRepository(AbstractRepository):
 
     def check_genre_existence(self, genre: Genre) -> bool:
         if isinstance(genre, Genre):
-            if genre in self._genres:
+            if genre.genre_name in self._genres_by_name:
                 return True
         return False
 
     def add_movie(self, movie: Movie):
         if isinstance(movie, Movie):
-            # self._movies.append(movie)
-            insort_left(self._movies, movie)
+            self._movies.insert(bisect_left(self._movies, movie), movie)
+            self._movies_by_year.add(movie.release_year, movie.id, sort_key=movie.title)
+
             self._movie_index[movie.id] = movie
+            self._movies_by_key.setdefault((movie.title, movie.release_year), movie)
+            self._movies_by_title_ngram.add(movie.id, movie.title)
+            self._co_stars.invalidate()
+            self._paged_lists.invalidate()
+            self._recommendations.invalidate()
+            if self._catalogue is not None:
+                self._catalogue.add_movie(movie)
+            self._catalogue_version += 1
 
     def get_movie(self, title: str, release_year: int):
-        return next((movie for movie in self._movies if (movie.title == title and movie.release_year == release_year)),
-                    None)
+        return self._movies_by_key.get((title, release_year))
 
-    def get_movies_by_release_year(self, target_year:int):
-        matching_movies = list()
-        for movie in self._movies:
-            if movie.release_year == target_year:
-                matching_movies.append(movie)
-        return matching_movies
+    def get_movies_by_release_year(self, target_year:int, load: str = None):
+        return self.get_movies_by_index(self._movies_by_year.movie_ids(target_year))
 
-    def get_movies_played_by_an_actor(self, actor_fullname: str):
-        actor_fullname = actor_fullname.strip()
-        actor = next((actor for actor in self._actors if actor.actor_full_name.lower() == actor_fullname.lower()), None)
+    def get_movies_played_by_an_actor(self, actor_fullname: str, load: str = None):
+        actor = self._actors_by_folded_name.get(fold_name(actor_fullname))
         if actor is not None:
             played_movies = [movie for movie in actor.played_movies]
         else:
             played_movies = list()
         return played_movies
 
-    def get_movies_directed_by_a_director(self, director_fullname:str):
-        director_fullname = director_fullname.strip()
-        director = next((director for director in self._directors if director.director_full_name.lower() == director_fullname.lower()), None)
+    def get_movies_directed_by_a_director(self, director_fullname:str, load: str = None):
+        director = self._directors_by_folded_name.get(fold_name(director_fullname))
         if director is not None:
             directed_movies = [movie for movie in director.directed_movies]
         else:
             directed_movies = list()
         return directed_movies
 
-    def search_movies_by_actor_and_director(self, actor_fullname: str, director_fullname: str):
+    def search_movies_by_actor_and_director(self, actor_fullname: str, director_fullname: str, load: str = None):
         actor_fullname = actor_fullname.strip()
         director_fullname = director_fullname.strip()
         output = list()
@@ -142,12 +213,56 @@ class MemoryRepository(AbstractRepository):
             output = [movie for movie in movies_played_by_actor if movie.director.director_full_name.lower() == director_fullname.lower()]
         return output
 
-    def search_movie_by_title(self, title: str) -> List[Movie]:
-        output = list()
-        for current_movie in self._movies:
-            if title.lower() in current_movie.title.lower():
-                output.append(current_movie)
-        return output
+    def search_movie_by_title(self, title: str, load: str = None) -> List[Movie]:
+        return [self._movie_index[movie_id] for movie_id in self._movies_by_title_ngram.search(title)]
+
+    def page(self, query: MovieQuery, after_key: tuple = None, limit: int = 10, reverse: bool = False,
+             load: str = None) -> Page:
+        keys, has_previous, has_next = keyset_slice(self._keys(query), after_key, limit, reverse)
+        return Page([self._movie_index[key[-1]] for key in keys], keys, has_previous, has_next)
+
+    def count(self, query: MovieQuery) -> int:
+        # A count reads the whole list, so it is taken once per list and catalogue version rather than on every page
+        key = (self._catalogue_version, query)
+        count = self._counts.get(key)
+        if count is None:
+            if self._counts and next(iter(self._counts))[0] != self._catalogue_version:
+                self._counts.clear()
+            count = self._counts[key] = self._count(query)
+        return count
+
+    def _count(self, query: MovieQuery) -> int:
+        # Genre and release year lists are counted by the catalogue, the others by their keys
+        if query.kind == MovieQuery.GENRE:
+            return len(self.get_catalogue().movie_ids_for_genre(query.values[0]))
+        if query.kind == MovieQuery.RELEASE_YEAR:
+            return self.get_catalogue().year_histogram().get(query.values[0], 0)
+        return len(self._keys(query))
+
+    def _keys(self, query: MovieQuery) -> List[tuple]:
+        # Release years and titles have sorted indexes of their own; the other lists are sorted by id on first use
+        if query.kind == MovieQuery.RELEASE_YEAR:
+            return self._movies_by_year.keys(query.values[0])
+        if query.kind == MovieQuery.TITLE:
+            return self._movies_by_title_ngram.ranked_keys(query.values[0])
+
+        if query.kind == MovieQuery.GENRE:
+            # Genre names are matched exactly, actor and director names ignoring case
+            list_name = (query.kind,) + query.values
+        else:
+            list_name = (query.kind,) + tuple(fold_name(value) for value in query.values)
+        return self._paged_lists.keys(list_name, lambda: [(movie.id,) for movie in self._list_movies(query)
+                                                          if movie.id in self._movie_index])
+
+    def _list_movies(self, query: MovieQuery) -> List[Movie]:
+        if query.kind == MovieQuery.GENRE:
+            genre = self._genres_by_name.get(query.values[0])
+            return genre.classified_movies if genre is not None else []
+        if query.kind == MovieQuery.ACTOR:
+            return self.get_movies_played_by_an_actor(*query.values)
+        if query.kind == MovieQuery.DIRECTOR:
+            return self.get_movies_directed_by_a_director(*query.values)
+        return self.search_movies_by_actor_and_director(*query.values)
 
     def get_total_number_of_movies_in_repo(self):
         return len(self._movies)
@@ -156,14 +271,14 @@ class MemoryRepository(AbstractRepository):
         movie = None
 
         if len(self._movies) > 0:
-            self._movies.sort(key=lambda x: x.release_year, reverse=True)
-            movie = self._movies[0]
+            # First movie (by title) of the latest release year
+            latest_year = self._movies_by_year.latest_year()
+            movie = self._movie_index[self._movies_by_year.movie_ids(latest_year)[0]]
         return movie
 
     def get_oldest_movie(self):
         movie = None
         if len(self._movies) > 0:
-            self._movies.sort(key=lambda x: x.release_year, reverse=False)
             movie = self._movies[0]
         return movie
 
@@ -171,11 +286,8 @@ class MemoryRepository(AbstractRepository):
         previous_year = None
 
         try:
-            index = self.movie_index(movie)
-            for stored_movie in reversed(self._movies[0:index]):
-                if stored_movie.release_year < movie.release_year:
-                    previous_year = stored_movie.release_year
-                    break
+            self.movie_index(movie)
+            previous_year = self.get_catalogue().previous_year(movie.release_year)
         except ValueError:
             pass
 
@@ -186,17 +298,14 @@ class MemoryRepository(AbstractRepository):
         next_year = None
 
         try:
-            index = self.movie_index(movie)
-            for stored_movie in self._movies[index + 1:len(self._movies)]:
-                if stored_movie.release_year > movie.release_year:
-                    next_year = stored_movie.release_year
-                    break
+            self.movie_index(movie)
+            next_year = self.get_catalogue().next_year(movie.release_year)
         except ValueError:
             pass
 
         return next_year
 
-    def get_movie_by_index(self, index: int):
+    def get_movie_by_index(self, index: int, load: str = None):
         movie = None
 
         try:
@@ -206,49 +315,44 @@ class MemoryRepository(AbstractRepository):
         return movie
 
     def get_movie_indexes_for_genre(self, genre_name: str):
-        genre = next((genre for genre in self._genres if genre.genre_name == genre_name), None)
-        if genre is not None:
-            movie_indexes = [movie.id for movie in genre.classified_movies]
-        else:
-            movie_indexes = list()
-        return movie_indexes
+        return self.get_catalogue().movie_ids_for_genre(genre_name)
 
     def get_movie_actors(self, movie: Movie) -> List[Actor]:
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.actors
         return None
 
     def get_movie_release_year(self, movie: Movie) -> int:
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.release_year
         return None
 
     def get_movie_description(self, movie: Movie) -> str:
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.description
         return None
 
     def get_movie_director(self, movie: Movie) -> Director:
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.director
         return None
 
     def get_movie_reviews(self, movie: Movie):
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.reviews
         return None
 
     def get_movie_genres(self, movie: Movie) -> List[Genre]:
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.genres
         return None
 
     def get_movie_runtime_minutes(self, movie: Movie) -> int:
-        if movie in self._movies:
+        if self.check_movie_existence(movie):
             return movie.runtime_minutes
         return None
 
-    def get_movies_by_index(self, index_list):
+    def get_movies_by_index(self, index_list, load: str = None):
         # strip out any ids in the index_list that don't represent the Movie indexes in the repository
         existing_indexes = [index for index in index_list if index in self._movie_index]
         movies = [self._movie_index[index] for index in existing_indexes]
@@ -258,6 +362,12 @@ class MemoryRepository(AbstractRepository):
         if isinstance(review, Review):
             super().add_review(review)
             self._reviews.append(review)
+            self._review_versions[review.movie.id] = self._review_versions.get(review.movie.id, 0) + 1
+            self._recommendations.record_review(review.review_author.username,
+                                                [genre.genre_name for genre in review.movie.genres], review.rating)
+
+    def get_movie_review_version(self, movie_id: int) -> int:
+        return self._review_versions.get(movie_id, 0)
 
     def get_reviews(self) -> List[Review]:
         return self._reviews
@@ -272,6 +382,18 @@ class MemoryRepository(AbstractRepository):
     def get_watchlist(self) -> List[WatchList]:
         return self._watchlists
 
+    def check_user_existence(self, user: User) -> bool:
+        if isinstance(user, User):
+            if user.username in self._users_by_name:
+                return True
+        return False
+
+    def check_movie_existence(self, movie: Movie) -> bool:
+        if isinstance(movie, Movie):
+            if (movie.title, movie.release_year) in self._movies_by_key:
+                return True
+        return False
+
     # Helper method to return movie index
     def movie_index(self, movie: Movie):
         index = bisect_left(self._movies, movie)
@@ -279,10 +401,16 @@ class MemoryRepository(AbstractRepository):
             return index
         raise ValueError
 
-    def get_top_6_highest_revenue_movies(self):
-        # Sort the movies in the repository by revenue in descending order:
-        self._movies.sort(key=lambda x: x.revenue, reverse=True)
-        return self._movies[:6]  # Return the top 5
+    def get_top_6_highest_revenue_movies(self, load: str = None):
+        # Movies whose revenue is unknown are left out
+        return self.get_movies_by_index(self.get_catalogue().top_k('revenue', 6))
+
+    def get_movies_by_runtime(self, min_minutes: int = None, max_minutes: int = None, load: str = None) -> List[Movie]:
+        return self.get_movies_by_index(self.get_catalogue().filter_range('runtime_minutes', min_minutes, max_minutes))
+
+    def top_k(self, key, k: int) -> List[Movie]:
+        """ Returns the k movies with the largest key(movie), largest first, without reordering the repository """
+        return nlargest(k, self._movies, key=key)
 
     def get_user_reviewed_movie(self, username:str):
         user = self.get_user(username)
@@ -302,30 +430,130 @@ class MemoryRepository(AbstractRepository):
         return genre_list
 
     def get_top_movie_by_genre(self, genre: Genre) -> Movie:
-        movies_classified_by_genre = list(genre.classified_movies)
-        movies_classified_by_genre.sort(key=lambda x: x.revenue, reverse=True)
-        return movies_classified_by_genre[0]
-
-    def get_suggestion_for_user(self, username: str) -> List[Movie]:
-        user_reviewed_movies = self.get_user_reviewed_movie(username)
-        user_interested_genres = self.get_user_interested_genre_from_reviewed_movies(user_reviewed_movies)
-        suggestion = list()
-        if len(user_interested_genres) > 0:
-            for genre in user_interested_genres:
-                suggested_movie = self.get_top_movie_by_genre(genre)
-                if suggested_movie not in suggestion:
-                    suggestion.append(suggested_movie)
-        return suggestion
+        top_movies = self._recommendations.top_movies(genre.genre_name)
+        if len(top_movies) > 0:
+            return self._movie_index[top_movies[0]]
+        return None
+
+    def get_suggestion_for_user(self, username: str, load: str = None) -> List[Movie]:
+        user = self.get_user(username)
+        if user is None:
+            return list()
+        return [self._movie_index[movie_id] for movie_id in self._recommendations.suggestions(user.username)]
+
+    def _genre_movies(self):
+        return self.get_catalogue().genre_rows('revenue')
+
+    def _user_affinity(self, username: str) -> Dict[str, float]:
+        affinity = dict()
+        for review in self.get_user(username).reviews:
+            for genre in review.movie.genres:
+                affinity[genre.genre_name] = affinity.get(genre.genre_name, 0) + review.rating
+        return affinity
 
     def get_earliest_year(self):
-        movie = self.get_oldest_movie()
-        if movie is not None:
-            return movie.release_year
+        return self.get_catalogue().earliest_year()
 
     def get_latest_year(self):
-        movie = self.get_latest_movie()
-        if movie is not None:
-            return movie.release_year
+        return self.get_catalogue().latest_year()
+
+    def get_catalogue_version(self) -> int:
+        return self._catalogue_version
+
+    def get_catalogue(self) -> MovieCatalogue:
+        if self._catalogue is None:
+            self._catalogue = MovieCatalogue.from_movies(self._movies)
+        return self._catalogue
+
+    def set_catalogue(self, catalogue: MovieCatalogue):
+        self._catalogue = catalogue
+
+    def export_tables(self) -> dict:
+        """ Flattens the repository into tables of plain values for snapshots.
+
+            Entities refer to each other by their row in the table of their kind, so the tables can be pickled without
+            walking the object graph. Links to entities that are not in the repository, and explicit actor colleagues,
+            are not exported.
+        """
+        movie_rows = {id(movie): row for row, movie in enumerate(self._movies)}
+        actor_rows = {id(actor): row for row, actor in enumerate(self._actors)}
+        director_rows = {id(director): row for row, director in enumerate(self._directors)}
+        genre_rows = {id(genre): row for row, genre in enumerate(self._genres)}
+        user_rows = {id(user): row for row, user in enumerate(self._users)}
+
+        def rows_of(entities, rows):
+            return [rows[id(entity)] for entity in entities if id(entity) in rows]
+
+        return {
+            'movies': [(movie.title, movie.release_year, movie.id, movie.description, movie.runtime_minutes,
+                        movie.revenue, director_rows.get(id(movie.director)), rows_of(movie.actors, actor_rows),
+                        rows_of(movie.genres, genre_rows)) for movie in self._movies],
+            'actors': [(actor.actor_full_name, rows_of(actor.played_movies, movie_rows)) for actor in self._actors],
+            'directors': [(director.director_full_name, rows_of(director.directed_movies, movie_rows))
+                          for director in self._directors],
+            'genres': [(genre.genre_name, rows_of(genre.classified_movies, movie_rows)) for genre in self._genres],
+            'users': [(user.username, user.password, rows_of(user.watched_movies, movie_rows)) for user in self._users],
+            'reviews': [(user_rows.get(id(review.review_author)), movie_rows.get(id(review.movie)), review.review_text,
+                         review.rating, review.timestamp) for review in self._reviews],
+            'catalogue': self._catalogue
+        }
+
+    @classmethod
+    def from_tables(cls, tables: dict) -> 'MemoryRepository':
+        """ Rebuilds a repository, with all its links and indexes, from the tables made by export_tables() """
+        repo = cls()
+        movies = list()
+        for title, release_year, movie_id, description, runtime, revenue, _, _, _ in tables['movies']:
+            movie = Movie(title=title, release_year=release_year, id=movie_id)
+            movie.set_description(description)
+            movie.set_runtime_minutes(runtime)
+            movie.set_revenue(revenue)
+            movies.append(movie)
+
+        actors = [Actor(actor_full_name) for actor_full_name, _ in tables['actors']]
+        directors = [Director(director_full_name) for director_full_name, _ in tables['directors']]
+        genres = [Genre(genre_name) for genre_name, _ in tables['genres']]
+
+        for movie, (_, _, _, _, _, _, director_row, actor_rows, genre_rows) in zip(movies, tables['movies']):
+            if director_row is not None:
+                movie.set_director(directors[director_row])
+            for row in actor_rows:
+                movie.add_actor(actors[row])
+            for row in genre_rows:
+                movie.add_genre(genres[row])
+            repo.add_movie(movie)
+        for actor, (_, movie_rows) in zip(actors, tables['actors']):
+            for row in movie_rows:
+                actor.add_played_movies(movies[row])
+            repo.add_actor(actor)
+        for director, (_, movie_rows) in zip(directors, tables['directors']):
+            for row in movie_rows:
+                director.add_directed_movies(movies[row])
+            repo.add_director(director)
+        for genre, (_, movie_rows) in zip(genres, tables['genres']):
+            for row in movie_rows:
+                genre.add_Movie(movies[row])
+            repo.add_genre(genre)
+
+        users = list()
+        for username, password, movie_rows in tables['users']:
+            user = User(user_name=username, password=password)
+            for row in movie_rows:
+                user.watch_movie(movies[row])
+            repo.add_user(user)
+            users.append(user)
+        for user_row, movie_row, review_text, rating, timestamp in tables['reviews']:
+            if user_row is not None and movie_row is not None:
+                repo.add_review(make_review(review_text=review_text, user=users[user_row], movie=movies[movie_row],
+                                            rating=rating, timestamp=timestamp))
+
+        repo.set_catalogue(tables['catalogue'])
+        return repo
+
+
+def fold_name(name: str) -> str:
+    # Key used for case-insensitive lookups of actors and directors
+    return name.strip().casefold()
 
 
 def read_csv_file(filename: str):
@@ -342,97 +570,89 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_movies_actors_directors_genre_description(data_path: str, repo: MemoryRepository):
-    genres = dict()
-    actors = dict()
-    directors = dict()
-    for data_row in read_csv_file(os.path.join(data_path, "movies.csv")):
-        movie_index = int(data_row[0])
-        title = data_row[1]
+def parse_movie_chunk(filename: str, start: int, end: int) -> List[tuple]:
+    """ Parses one byte range of movies.csv into plain tuples, which are cheap to send back from a worker process """
+    records = list()
+    for data_row in read_chunk_rows(filename, start, end):
         try:
             movie_revenue = float(data_row[10])
         except ValueError:
             movie_revenue = 0
-        list_of_genre_names = data_row[2].split(",")
-        list_of_genres = [Genre(genre_name) for genre_name in list_of_genre_names]  # can have duplicate
+        list_of_actor_names = [name.strip() for name in data_row[5].split(",")]
+        records.append((int(data_row[0]), data_row[1], data_row[2].split(","), data_row[3], data_row[4],
+                        list_of_actor_names, int(data_row[6]), int(data_row[7]), movie_revenue))
+    return records
 
-        movie_description = data_row[3]
 
-        director = Director(data_row[4])  # can have duplicate
-        list_of_actor_names = data_row[5].split(",")
-        list_of_actor_names = [name.strip() for name in list_of_actor_names]
-        list_of_actors = [Actor(actor_full_name) for actor_full_name in list_of_actor_names]  # can have duplicate
+def load_movies_actors_directors_genre_description(data_path: str, repo: MemoryRepository, workers: int = 1,
+                                                   timer: StageTimer = None):
+    timer = timer if timer is not None else StageTimer()
 
-        release_year = int(data_row[6])
-        runtime = int(data_row[7])
+    with timer.stage('parse movies'):
+        records = parse_chunks(os.path.join(data_path, "movies.csv"), parse_movie_chunk, workers)
 
-        # Create Movie object
-        movie = Movie(
-            title=title,
-            release_year=release_year,
-            id=movie_index
-        )
+    # Genres, actors and directors are keyed by name and collect their movies in file order
+    genres = dict()
+    actors = dict()
+    directors = dict()
+    with timer.stage('create movies'):
+        for movie_index, title, list_of_genre_names, movie_description, director_name, list_of_actor_names, \
+                release_year, runtime, movie_revenue in records:
+            # Create Movie object
+            movie = Movie(
+                title=title,
+                release_year=release_year,
+                id=movie_index
+            )
+            movie.set_revenue(revenue=movie_revenue)
+            movie.set_description(movie_description)
+            movie.set_runtime_minutes(runtime)
+
+            # Add movie to repo
+            repo.add_movie(movie)
+
+            for genre_name in list_of_genre_names:
+                genres.setdefault(genre_name.strip(), list()).append(movie)
+            for actor_full_name in list_of_actor_names:
+                actors.setdefault(actor_full_name, list()).append(movie)
+            directors.setdefault(director_name.strip(), list()).append(movie)
+
+    # Link every genre, actor and director with the movies collected for it and add them to the repository
+    with timer.stage('link movies'):
+        for genre_name, movies in genres.items():
+            genre = Genre(genre_name)
+            for movie in movies:
+                movie.add_genre(genre)
+                genre.add_Movie(movie)
+            repo.add_genre(genre)
+
+        for actor_full_name, movies in actors.items():
+            actor = Actor(actor_full_name)
+            for movie in movies:
+                movie.add_actor(actor)
+                actor.add_played_movies(movie)
+            repo.add_actor(actor)
+
+        for director_full_name, movies in directors.items():
+            director = Director(director_full_name)
+            for movie in movies:
+                movie.set_director(director)
+                director.add_directed_movies(movie)
+            repo.add_director(director)
+
+    return timer.report()
+
+
+def load_users(datapath: str, repo: MemoryRepository, workers: int = 1, progress=None, pre_hashed: bool = False):
+    rows = list(read_csv_file(os.path.join(datapath, 'users.csv')))
+    # With pre_hashed, passwords may be stored already hashed; the others are hashed, across workers processes if asked
+    passwords = hash_passwords([data_row[2] for data_row in rows], workers, progress, pre_hashed)
 
-        movie.set_revenue(revenue=movie_revenue)
-
-        # Add movie to repo
-        repo.add_movie(movie)
-
-        # Add any new genres to repo
-        for genre in list_of_genres:
-            if genre not in genres.keys():
-                genres[genre] = list()
-            genres[genre].append(movie_index)
-
-        for actor in list_of_actors:
-            if actor not in actors.keys():
-                actors[actor] = list()
-            actors[actor].append(movie_index)
-
-        # Add any new directors to dict
-        if director not in directors:
-            directors[director] = list()
-        directors[director].append(movie_index)
-
-        # Connect the current movie with its attributes
-        add_movie_attributes(movie=movie,
-                             list_of_genres=list_of_genres,
-                             description=movie_description,
-                             list_of_actors=list_of_actors,
-                             director=director,
-                             runtime=runtime)
-
-    # Associate Genres with Movies and add them to the repository
-    for genre in genres.keys():
-        for current_movie_index in genres[genre]:
-            movie = repo.get_movie_by_index(current_movie_index)
-            movie.add_genre(genre)
-            genre.add_Movie(movie)
-        repo.add_genre(genre)
-
-    # Associate Actors with Movies and add them to the repository
-    for actor in actors.keys():
-        for current_movie_index in actors[actor]:
-            movie = repo.get_movie_by_index(current_movie_index)
-            movie.add_actor(actor)
-            actor.add_played_movies(movie)
-        repo.add_actor(actor)
-
-    # Associate Directors with Movies and add them to the repositor
-    for director in directors.keys():
-        for current_movie_index in directors[director]:
-            movie = repo.get_movie_by_index(current_movie_index)
-            movie.set_director(director)
-            director.add_directed_movies(movie)
-        repo.add_director(director)
-
-
-def load_users(datapath: str, repo: MemoryRepository):
     users = dict()
-    for data_row in read_csv_file(os.path.join(datapath, 'users.csv')):
+    for data_row, password in zip(rows, passwords):
         user = User(
             user_name=data_row[1],
-            password=generate_password_hash(data_row[2])
+            password=password
         )
         repo.add_user(user)
         users[int(data_row[0])] = user
@@ -447,12 +667,25 @@ def load_reviews(data_path: str, repo: MemoryRepository, users):
         repo.add_review(review)
 
 
-def populate(data_path: str, repo: MemoryRepository):
+def populate(data_path: str, repo: MemoryRepository, workers: int = 1, pre_hashed: bool = False,
+             progress=None) -> Dict[str, float]:
+    """ Loads the repository from the CSV files in data_path and returns the seconds spent in each stage.
+        When workers is above 1, movies.csv is parsed in byte-range chunks and user passwords are hashed in a
+        process pool. pre_hashed and progress are handed to hash_passwords.
+    """
+    timer = StageTimer()
+
     # Load movies from movies.csv
-    load_movies_actors_directors_genre_description(data_path, repo)
+    load_movies_actors_directors_genre_description(data_path, repo, workers, timer)
+    with timer.stage('build catalogue'):
+        repo.set_catalogue(MovieCatalogue.from_csv(os.path.join(data_path, "movies.csv")))
 
     # Load users into the repository
-    users = load_users(data_path, repo)
+    with timer.stage('load users'):
+        users = load_users(data_path, repo, workers, progress, pre_hashed)
 
     # Load reviews into the repository
-    load_reviews(data_path, repo, users)
+    with timer.stage('load reviews'):
+        load_reviews(data_path, repo, users)
+
+    return timer.report()
@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Table, MetaData, Column, Integer, String, Date, DateTime, Float,
-    ForeignKey
+    ForeignKey, Index
 )
 from sqlalchemy.orm import mapper, relationship
 import datetime
@@ -70,6 +70,25 @@ movie_actors = Table(
 )
 
 
+# Secondary indexes, created with the tables by metadata.create_all. users.username is already indexed through its
+# unique constraint
+Index('ix_reviews_user_id', reviews.c.user_id)
+Index('ix_reviews_movie_id', reviews.c.movie_id)
+Index('ix_movies_title_release_year', movies.c.title, movies.c.release_year)
+# Also orders the movies of a year by title, which is how they are paged
+Index('ix_movies_release_year_title', movies.c.release_year, movies.c.title)
+Index('ix_movies_revenue', movies.c.revenue.desc())
+Index('ix_movies_director', movies.c.director)
+Index('ix_actors_name', actors.c.name)
+Index('ix_directors_name', directors.c.name)
+Index('ix_genres_name', genres.c.name)
+# Both column orders of each association table, so that lookups from either side are covered by an index
+Index('ix_movie_genres_movie_id_genre_id', movie_genres.c.movie_id, movie_genres.c.genre_id)
+Index('ix_movie_genres_genre_id_movie_id', movie_genres.c.genre_id, movie_genres.c.movie_id)
+Index('ix_movie_actors_movie_id_actor_id', movie_actors.c.movie_id, movie_actors.c.actor_id)
+Index('ix_movie_actors_actor_id_movie_id', movie_actors.c.actor_id, movie_actors.c.movie_id)
+
+
 # movie_directors = Table(
 #     'movie_directors', metadata,
 #     Column('id', Integer, primary_key=True, autoincrement=True),
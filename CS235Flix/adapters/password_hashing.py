@@ -0,0 +1,51 @@
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List
+
+from werkzeug.security import generate_password_hash
+
+# Hashing methods werkzeug writes as the first field of "method$salt$hash"
+HASH_METHOD_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+# Passwords handed to each worker process at a time
+HASHING_BATCH_SIZE = 64
+
+
+def is_password_hash(password: str) -> bool:
+    """ True if password is already a werkzeug password hash rather than a plain password """
+    fields = password.split('$')
+    return len(fields) == 3 and fields[0].startswith(HASH_METHOD_PREFIXES) and all(len(field) > 0 for field in fields)
+
+
+def hash_password(password: str, pre_hashed: bool = False) -> str:
+    """ Hashes a password. With pre_hashed, passwords that are already hashed are returned unchanged; otherwise every
+        password is taken as plain, so that a plain password that merely looks like a hash is not stored as one
+    """
+    if pre_hashed and is_password_hash(password):
+        return password
+    return generate_password_hash(password)
+
+
+def hash_passwords(passwords: List[str], workers: int = 1, progress: Callable[[int, int], None] = None,
+                   pre_hashed: bool = False) -> List[str]:
+    """ Hashes a list of passwords with hash_password(), keeping their order.
+
+        generate_password_hash is a deliberately slow key derivation function, so with more than one worker the
+        plain passwords are hashed in a process pool. progress(done, total) is called after every batch.
+    """
+    hash_one = functools.partial(hash_password, pre_hashed=pre_hashed)
+    if workers <= 1 or len(passwords) <= HASHING_BATCH_SIZE:
+        return collect_with_progress(map(hash_one, passwords), len(passwords), progress)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        hashed_passwords = executor.map(hash_one, passwords, chunksize=HASHING_BATCH_SIZE)
+        return collect_with_progress(hashed_passwords, len(passwords), progress)
+
+
+def collect_with_progress(hashed_passwords: Iterable[str], total: int, progress) -> List[str]:
+    collected = list()
+    for hashed_password in hashed_passwords:
+        collected.append(hashed_password)
+        if progress is not None and (len(collected) % HASHING_BATCH_SIZE == 0 or len(collected) == total):
+            progress(len(collected), total)
+    return collected
@@ -0,0 +1,97 @@
+from heapq import nlargest
+from typing import Callable, Dict, Iterable, List
+
+
+class RecommendationEngine:
+    """ Suggests movies to users from the genres of the movies they reviewed, weighted by their ratings.
+
+        genre_movies() supplies the catalogue as (genre name, movie id, revenue) rows (see MovieCatalogue.genre_rows),
+        from which the top_k movies of every genre by revenue are kept. user_affinity(username) supplies a user's genre
+        affinity: the sum of the ratings the user gave to movies of each genre. The affinity of a user is read once and
+        then kept up to date by record_review(), which the repositories call from add_review.
+
+        A user gets one movie per genre they reviewed, strongest genre first: of the genre's top movies, the one
+        whose genres the user likes most, i.e. with the highest sum of the user's affinity over its genres. Movies
+        picked for several genres are suggested once, and the suggestions are ordered by that score. They are cached
+        per user until the user reviews another movie, and the top lists until invalidate() is called, which the
+        repositories do whenever movies or genres are added.
+    """
+
+    def __init__(self, genre_movies: Callable[[], Iterable[tuple]], user_affinity: Callable[[str], Dict[str, float]],
+                 top_k: int = 10):
+        self._genre_movies = genre_movies
+        self._user_affinity = user_affinity
+        self._top_k = top_k
+
+        # Built from genre_movies on first use
+        self._top_movies = None
+        self._movie_genres = None
+        self._revenues = None
+
+        self._affinities = dict()
+        self._suggestions = dict()
+
+    def top_movies(self, genre_name: str) -> List[int]:
+        """ Returns the ids of the top_k movies of the genre, highest revenue first """
+        self._build_top_movies()
+        return self._top_movies.get(genre_name, [])
+
+    def suggestions(self, username: str) -> List[int]:
+        """ Returns the ids of the movies suggested to the user, best first """
+        suggestions = self._suggestions.get(username)
+        if suggestions is None:
+            suggestions = self._suggestions[username] = self._rank(self._affinity(username))
+        return suggestions
+
+    def record_review(self, username: str, genre_names: Iterable[str], rating: int):
+        """ Adds a review the user gave to a movie of the given genres to the user's affinity """
+        affinity = self._affinities.get(username)
+        if affinity is not None:
+            for genre_name in genre_names:
+                affinity[genre_name] = affinity.get(genre_name, 0) + rating
+        self._suggestions.pop(username, None)
+
+    def invalidate(self):
+        self._top_movies = self._movie_genres = self._revenues = None
+        self._suggestions.clear()
+
+    def _affinity(self, username: str) -> Dict[str, float]:
+        affinity = self._affinities.get(username)
+        if affinity is None:
+            affinity = self._affinities[username] = dict(self._user_affinity(username))
+        return affinity
+
+    def _rank(self, affinity: Dict[str, float]) -> List[int]:
+        self._build_top_movies()
+
+        def score(movie_id: int) -> float:
+            return sum(affinity.get(genre_name, 0) for genre_name in self._movie_genres[movie_id])
+
+        def preference(movie_id: int) -> tuple:
+            # Ties go to the higher revenue, then to the lower id
+            return score(movie_id), self._revenues[movie_id], -movie_id
+
+        picks = dict()
+        for genre_name in sorted(affinity, key=lambda name: (-affinity[name], name)):
+            candidates = self._top_movies.get(genre_name)
+            if candidates:
+                pick = max(candidates, key=preference)
+                picks.setdefault(pick, preference(pick))
+        return sorted(picks, key=picks.get, reverse=True)
+
+    def _build_top_movies(self):
+        if self._top_movies is not None:
+            return
+        genre_revenues = dict()
+        movie_genres = dict()
+        revenues = dict()
+        for genre_name, movie_id, revenue in self._genre_movies():
+            revenue = revenue if revenue is not None else 0
+            genre_revenues.setdefault(genre_name, list()).append((revenue, -movie_id))
+            movie_genres.setdefault(movie_id, set()).add(genre_name)
+            revenues[movie_id] = revenue
+
+        self._top_movies = {genre_name: [-negated_id for _, negated_id in nlargest(self._top_k, entries)]
+                            for genre_name, entries in genre_revenues.items()}
+        self._movie_genres = movie_genres
+        self._revenues = revenues
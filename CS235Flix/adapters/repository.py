@@ -4,6 +4,15 @@ from CS235Flix.domainmodel.model import User, Actor, Director, Genre, Movie, Rev
 
 repo_instance = None
 
+# Eager-loading profiles. The methods returning movies accept load=<profile>, naming what the caller is about to read,
+# so that a database-backed repository can fetch those relationships for all of the movies in a fixed number of
+# queries instead of lazily, movie by movie. Repositories holding their objects in memory ignore the profile.
+# The card, detail and admin profiles share their names with the DTO projections of CS235Flix.movies.services.
+LOAD_CARD = 'card'        # no relationships
+LOAD_DETAIL = 'detail'    # director, actors, genres and reviews (with their authors)
+LOAD_ADMIN = 'admin'      # as detail, plus the movies classified by each genre
+LOAD_SIDEBAR = 'sidebar'  # director and actors
+
 
 class RepositoryException(Exception):
 
@@ -11,6 +20,98 @@ class RepositoryException(Exception):
         pass
 
 
+class MovieQuery:
+    """ Names a list of movies that AbstractRepository.page() reads a page at a time.
+
+        Each list has a fixed order, in which every movie has a key: a tuple ending with the movie's id. The movies of
+        a genre, an actor or a director are ordered by id, the movies of a release year by title, and the matches of a
+        title search best match first (see AbstractRepository.search_movie_by_title). Keys are only meaningful to
+        the repository that returned them; callers pass them back to page() as they are.
+    """
+
+    GENRE = 'genre'
+    RELEASE_YEAR = 'release_year'
+    ACTOR = 'actor'
+    DIRECTOR = 'director'
+    ACTOR_AND_DIRECTOR = 'actor_and_director'
+    TITLE = 'title'
+
+    # The types of the parts of the keys of each kind of list
+    KEY_TYPES = {
+        GENRE: (int,),
+        RELEASE_YEAR: (str, int),
+        ACTOR: (int,),
+        DIRECTOR: (int,),
+        ACTOR_AND_DIRECTOR: (int,),
+        TITLE: (int, int, int, str, int),
+    }
+
+    def __init__(self, kind: str, *values):
+        if kind not in self.KEY_TYPES:
+            raise ValueError("Unknown movie query: {}".format(kind))
+        self.kind = kind
+        self.values = values
+
+    @classmethod
+    def genre(cls, genre_name: str) -> 'MovieQuery':
+        return cls(cls.GENRE, genre_name)
+
+    @classmethod
+    def release_year(cls, release_year: int) -> 'MovieQuery':
+        return cls(cls.RELEASE_YEAR, release_year)
+
+    @classmethod
+    def actor(cls, actor_fullname: str) -> 'MovieQuery':
+        return cls(cls.ACTOR, actor_fullname)
+
+    @classmethod
+    def director(cls, director_fullname: str) -> 'MovieQuery':
+        return cls(cls.DIRECTOR, director_fullname)
+
+    @classmethod
+    def actor_and_director(cls, actor_fullname: str, director_fullname: str) -> 'MovieQuery':
+        return cls(cls.ACTOR_AND_DIRECTOR, actor_fullname, director_fullname)
+
+    @classmethod
+    def title(cls, title: str) -> 'MovieQuery':
+        return cls(cls.TITLE, title)
+
+    def is_key(self, key) -> bool:
+        """ Returns True if key has the shape of the keys of this list, e.g. after being read back from a URL """
+        key_types = self.KEY_TYPES[self.kind]
+        return (isinstance(key, tuple) and len(key) == len(key_types) and
+                all(isinstance(part, part_type) for part, part_type in zip(key, key_types)))
+
+    def __eq__(self, other):
+        return isinstance(other, MovieQuery) and (self.kind, self.values) == (other.kind, other.values)
+
+    def __hash__(self):
+        return hash((self.kind, self.values))
+
+    def __repr__(self):
+        return '<MovieQuery {} {}>'.format(self.kind, self.values)
+
+
+class Page:
+    """ A page of the movies of a MovieQuery: the movies in the order of the list, their keys, and whether the list
+        has movies before and after the page
+    """
+
+    def __init__(self, movies: List[Movie], keys: List[tuple], has_previous: bool, has_next: bool):
+        self.movies = movies
+        self.keys = keys
+        self.has_previous = has_previous
+        self.has_next = has_next
+
+    @property
+    def first_key(self):
+        return self.keys[0] if len(self.keys) > 0 else None
+
+    @property
+    def last_key(self):
+        return self.keys[-1] if len(self.keys) > 0 else None
+
+
 class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
@@ -77,6 +178,20 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def check_if_actors_worked_together(self, actor: Actor, colleague: Actor) -> bool:
+        """ Returns True if actor and colleague played in the same movie (or were recorded as colleagues),
+            otherwise returns False
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_colleagues(self, actor: Actor) -> int:
+        """ Returns the number of distinct colleagues of the given actor
+            Returns None if the actor does not exist in the repository
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_total_number_of_actors(self) -> int:
         """ Returns the number of Actors in the repository """
@@ -138,7 +253,7 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movies_by_release_year(self, target_year: int) -> List[Movie]:
+    def get_movies_by_release_year(self, target_year: int, load: str = None) -> List[Movie]:
         """ Return a list of Movies tha were released in the target_year
 
             If there are no Movies on the given year, this method returns an empty list.
@@ -146,39 +261,64 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movies_played_by_an_actor(self, actor_fullname:str) -> List[Movie]:
+    def get_movies_played_by_an_actor(self, actor_fullname:str, load: str = None) -> List[Movie]:
         """ Returns a list of movies played by the actor.
             Returns an empty list if the supplied actor does not exist or the actor hasn't played any movie
         """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movies_directed_by_a_director(self, director_fullname:str) -> List[Movie]:
+    def get_movies_directed_by_a_director(self, director_fullname:str, load: str = None) -> List[Movie]:
         """ Returns a list of movies directed by the director
             Returns an empty list of the supplied directed does not exist or the director didn't direct any movie
         """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_top_6_highest_revenue_movies(self) -> List[Movie]:
+    def get_top_6_highest_revenue_movies(self, load: str = None) -> List[Movie]:
         """ Returns a list of the top 5 highest revenue movies in the repository """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def search_movies_by_actor_and_director(self, actor_fullname: str, director_name: str) -> List[Movie]:
+    def get_movies_by_runtime(self, min_minutes: int = None, max_minutes: int = None, load: str = None) -> List[Movie]:
+        """ Returns the movies whose runtime lies within [min_minutes, max_minutes], ordered by id.
+            Either bound may be None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def search_movies_by_actor_and_director(self, actor_fullname: str, director_name: str,
+                                            load: str = None) -> List[Movie]:
         """ Returns a list of movies played by a specific actor AND directed by the specific director
             Returns an empty list when the search criteria returns nothing
         """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def search_movie_by_title(self, title: str) -> List[Movie]:
-        """ Returns a list of movies that matches the title
+    def search_movie_by_title(self, title: str, load: str = None) -> List[Movie]:
+        """ Returns the movies whose title contains title, ignoring case, best match first: an exact match, then
+            titles starting with title, then titles with a word starting with title, then the rest.
             Returns an empty list if no matched movie title found
         """
         raise NotImplementedError
 
 
+    @abc.abstractmethod
+    def page(self, query: MovieQuery, after_key: tuple = None, limit: int = 10, reverse: bool = False,
+             load: str = None) -> Page:
+        """ Returns the page of up to limit movies of the query's list that follow the movie with after_key, or the
+            first page when after_key is None. With reverse=True the list is read from its end instead: the page holds
+            the movies before after_key (the last page when after_key is None), still in the order of the list.
+            The cost of a page follows its size rather than the length of the list, except for title searches, whose
+            matches are ranked as a whole.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def count(self, query: MovieQuery) -> int:
+        """ Returns the number of movies in the query's list, cached until the catalogue version changes """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_latest_movie(self):
         """ Return the latest Movie, ordered by release year, from the repository.
@@ -217,7 +357,7 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movie_by_index(self, index:int):
+    def get_movie_by_index(self, index:int, load: str = None):
         """ Returns a Movie with the given index
             Returns None if the movie does not exist in the repository
         """
@@ -280,7 +420,7 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movies_by_index(self, ids_list):
+    def get_movies_by_index(self, ids_list, load: str = None):
         """ Returns a list of Movies, whose index match those in ids_list, from the repository "
             If there are no matches, this method returns an empty list
         """
@@ -298,6 +438,13 @@ class AbstractRepository(abc.ABC):
         if review.movie is None or review not in review.movie.reviews:
             raise RepositoryException("Review not correctly attached to a Movie")
 
+    @abc.abstractmethod
+    def get_movie_review_version(self, movie_id: int) -> int:
+        """ Returns a number that changes whenever a Review of the Movie with movie_id is added through the
+            repository, so that pages showing the movie's reviews can be cached until it changes
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_reviews(self) -> List[Review]:
         """ Returns reviews stored in the repository """
@@ -334,12 +481,16 @@ class AbstractRepository(abc.ABC):
 
     @abc.abstractmethod
     def get_top_movie_by_genre(self, genre:Genre) -> Movie:
-        """ Returnes a movie with the highest revenue classified by the genre """
+        """ Returnes a movie with the highest revenue classified by the genre
+            Returns None if no movie is classified by the genre
+        """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_suggestion_for_user(self, username: str) -> List[Movie]:
-        """ Returns a list of movies recommend for the user
+    def get_suggestion_for_user(self, username: str, load: str = None) -> List[Movie]:
+        """ Returns a list of movies recommend for the user, best first: for each genre of the movies the user
+            reviewed, one of the genre's highest revenue movies, ranked by the user's ratings of its genres.
+            Returns an empty list if the user does not exist or has not reviewed any movies
         """
         raise NotImplementedError
 
@@ -352,3 +503,26 @@ class AbstractRepository(abc.ABC):
     def get_latest_year(self) -> int:
         """ Returns the latest release year of a movie in the repository """
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_catalogue_version(self) -> int:
+        """ Returns a number that changes whenever a Movie or Genre is added through the repository, so that data
+            derived from the catalogue can be cached until it changes
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_catalogue(self):
+        """ Returns the columnar MovieCatalogue (see CS235Flix.adapters.catalogue) of the repository's movies, which
+            answers the revenue, release year, runtime and genre queries with vectorised operations.
+            Without one set by set_catalogue, it is built from what the repository stores, where the columns that are
+            not stored are null.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_catalogue(self, catalogue):
+        """ Replaces the catalogue, typically with one read from movies.csv (see MovieCatalogue.from_csv), which
+            knows which values are missing. Movies added afterwards are queued on it
+        """
+        raise NotImplementedError
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+
+from CS235Flix.adapters import catalogue, indexes, memory_repository, recommendations
+from CS235Flix.adapters.memory_repository import MemoryRepository
+from CS235Flix.domainmodel import model
+
+# A child of the application's logger, so that its records go wherever app.logger's do
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'CS235FLIX-SNAPSHOT\n'
+
+# Bump whenever the layout of MemoryRepository.export_tables() changes, so that older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+SOURCE_FILES = ('movies.csv', 'users.csv', 'reviews.csv')
+
+# The modules defining the classes a snapshot pickles. Changing any of them invalidates existing snapshots, even when
+# SNAPSHOT_VERSION was not bumped
+CODE_MODULES = (model, memory_repository, indexes, catalogue, recommendations)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def source_checksum(data_path: str) -> str:
+    """ SHA-256 over the names and contents of the CSV files a memory repository is populated from """
+    digest = hashlib.sha256()
+    for file_name in SOURCE_FILES:
+        digest.update(file_name.encode('utf-8'))
+        with open(os.path.join(data_path, file_name), mode='rb') as infile:
+            for block in iter(lambda: infile.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def code_fingerprint() -> str:
+    """ SHA-256 over the source of CODE_MODULES """
+    digest = hashlib.sha256()
+    for module in CODE_MODULES:
+        with open(module.__file__, mode='rb') as infile:
+            digest.update(infile.read())
+    return digest.hexdigest()
+
+
+def save_snapshot(repo: MemoryRepository, snapshot_path: str, checksum: str):
+    """ Writes repo to snapshot_path: a magic line, a JSON header line with the format version, the fingerprint of
+        the code, the checksum of the source files and the SHA-256 of the payload, then the payload: the pickled
+        tables of MemoryRepository.export_tables().
+
+        The snapshot is written to a temporary file first and moved into place, so readers never see a partial file.
+    """
+    payload = pickle.dumps(repo.export_tables(), protocol=pickle.HIGHEST_PROTOCOL)
+    header = json.dumps({'version': SNAPSHOT_VERSION, 'code': code_fingerprint(), 'checksum': checksum,
+                         'payload': hashlib.sha256(payload).hexdigest()}).encode('utf-8') + b'\n'
+    temporary_path = snapshot_path + '.tmp'
+    with open(temporary_path, mode='wb') as outfile:
+        outfile.write(SNAPSHOT_MAGIC)
+        outfile.write(header)
+        outfile.write(payload)
+    os.replace(temporary_path, snapshot_path)
+
+
+def read_snapshot_header(snapshot_file) -> dict:
+    if snapshot_file.readline() != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a CS235Flix snapshot")
+    try:
+        return json.loads(snapshot_file.readline().decode('utf-8'))
+    except ValueError:
+        raise SnapshotError("Corrupt snapshot header")
+
+
+def load_snapshot(snapshot_path: str, checksum: str) -> MemoryRepository:
+    """ Returns the repository stored at snapshot_path.
+
+        Raises SnapshotError if the file is not a snapshot, was written by another format version or other code, was
+        taken from source files whose checksum differs from checksum, or its payload is damaged.
+    """
+    with open(snapshot_path, mode='rb') as infile, mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        header = read_snapshot_header(mapped)
+        if header.get('version') != SNAPSHOT_VERSION:
+            raise SnapshotError("Snapshot format version {} is not supported".format(header.get('version')))
+        if header.get('code') != code_fingerprint():
+            raise SnapshotError("Snapshot was written by different code")
+        if header.get('checksum') != checksum:
+            raise SnapshotError("Snapshot was taken from different data files")
+        with memoryview(mapped) as view, view[mapped.tell():] as payload:
+            if hashlib.sha256(payload).hexdigest() != header.get('payload'):
+                raise SnapshotError("Snapshot payload does not match its checksum")
+        try:
+            tables = pickle.load(mapped)
+        except (pickle.UnpicklingError, EOFError) as error:
+            raise SnapshotError("Corrupt snapshot: {}".format(error))
+    return MemoryRepository.from_tables(tables)
+
+
+def load_or_populate(data_path: str, snapshot_path: str, populate) -> MemoryRepository:
+    """ Restores the repository from snapshot_path when it matches the files in data_path. Otherwise builds it with
+        populate(data_path, repo) and writes a fresh snapshot for the next start. A snapshot that cannot be restored,
+        for whatever reason, is logged and rebuilt rather than keeping the application from starting.
+    """
+    checksum = source_checksum(data_path)
+    if os.path.exists(snapshot_path):
+        try:
+            return load_snapshot(snapshot_path, checksum)
+        except Exception:
+            logger.warning("Ignoring memory repository snapshot %s", snapshot_path, exc_info=True)
+
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    save_snapshot(repo, snapshot_path, checksum)
+    return repo
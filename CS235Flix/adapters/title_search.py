@@ -0,0 +1,109 @@
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from CS235Flix.adapters.indexes import TitleSearchIndex, fold_title
+
+# FTS5 index over movies.title, kept in sync with the movies table by triggers. Like the bulk loader's progress table
+# it is created outside the ORM metadata, the first time a title is searched, so that it never shows up among the
+# application's tables
+TITLE_SEARCH_TABLE = 'movie_title_search'
+
+TITLE_SEARCH_TRIGGERS = {
+    'movie_title_search_insert': 'AFTER INSERT ON movies BEGIN '
+                                 'INSERT INTO movie_title_search (rowid, title) VALUES (new.id, new.title); END',
+    'movie_title_search_delete': 'AFTER DELETE ON movies BEGIN '
+                                 'INSERT INTO movie_title_search (movie_title_search, rowid, title) '
+                                 "VALUES ('delete', old.id, old.title); END",
+    'movie_title_search_update': 'AFTER UPDATE OF id, title ON movies BEGIN '
+                                 'INSERT INTO movie_title_search (movie_title_search, rowid, title) '
+                                 "VALUES ('delete', old.id, old.title); "
+                                 'INSERT INTO movie_title_search (rowid, title) VALUES (new.id, new.title); END',
+}
+
+# The ranking of indexes.title_match_rank, followed by the title and id to break ties. Together they are the key of a
+# match when the results are read a page at a time. Titles are folded by the fold_title SQL function, which is
+# indexes.fold_title itself: SQLite's own lower() only folds ASCII letters
+RANK_COLUMNS = ("CASE WHEN fold_title(movies.title) = :query THEN 0 WHEN instr(fold_title(movies.title), :query) = 1 "
+                "THEN 1 WHEN instr(' ' || fold_title(movies.title), ' ' || :query) > 0 THEN 2 ELSE 3 END",
+                "instr(fold_title(movies.title), :query)", "length(fold_title(movies.title))", "movies.title",
+                "movies.id")
+RANK_ORDER = ', '.join(RANK_COLUMNS)
+
+
+def register_fold_title(engine: Engine):
+    """ Makes fold_title() available to the SQL of the engine's SQLite connections, including those pooled already """
+    if not event.contains(engine, 'checkout', _create_fold_title):
+        event.listen(engine, 'checkout', _create_fold_title)
+
+
+def _create_fold_title(dbapi_connection, connection_record, connection_proxy):
+    # Created once per connection; the record's info is emptied when its connection is replaced
+    if 'fold_title' not in connection_record.info and isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('fold_title', 1, lambda text: None if text is None else fold_title(text),
+                                         deterministic=True)
+        connection_record.info['fold_title'] = True
+
+
+def install_title_search(engine: Engine) -> bool:
+    """ Creates the title search table and its triggers and indexes the stored titles, unless they all exist already,
+        and registers fold_title() with the engine. A table left without some of its triggers, as when the movies
+        table is dropped and created again, is dropped and built afresh.
+        Returns False if the SQLite library lacks FTS5 or its trigram tokenizer (SQLite 3.34 and later).
+    """
+    register_fold_title(engine)
+    names = (TITLE_SEARCH_TABLE,) + tuple(TITLE_SEARCH_TRIGGERS)
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT name FROM sqlite_master WHERE name IN ({})'.format(', '.join('?' * len(names))), names)
+        if len(cursor.fetchall()) == len(names):
+            return True
+        drop_title_search(cursor)
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE {} USING fts5(title, content='movies', content_rowid='id', "
+                           "tokenize='trigram')".format(TITLE_SEARCH_TABLE))
+        except sqlite3.OperationalError:
+            return False
+        for name, definition in TITLE_SEARCH_TRIGGERS.items():
+            cursor.execute('CREATE TRIGGER {} {}'.format(name, definition))
+        cursor.execute("INSERT INTO {0} ({0}) VALUES ('rebuild')".format(TITLE_SEARCH_TABLE))
+        connection.commit()
+    finally:
+        connection.rollback()
+        connection.close()
+    return True
+
+
+def drop_title_search(cursor):
+    """ Drops the title search table and its triggers; the next title search creates them afresh """
+    for name in TITLE_SEARCH_TRIGGERS:
+        cursor.execute('DROP TRIGGER IF EXISTS {}'.format(name))
+    cursor.execute('DROP TABLE IF EXISTS {}'.format(TITLE_SEARCH_TABLE))
+
+
+def title_search_statement(title: str, indexed: bool) -> tuple:
+    """ Returns the SELECT of the ranked ids of the movies whose title contains title, and its parameters.
+
+        Queries of three or more characters are matched through the trigram index as a quoted phrase, which matches
+        anywhere in a title regardless of case. Shorter queries, or a database without the index, fall back to a
+        scan of the titles.
+    """
+    source, parameters = title_search_source(title, indexed)
+    return 'SELECT movies.id ' + source + ' ORDER BY ' + RANK_ORDER, parameters
+
+
+def title_search_source(title: str, indexed: bool) -> tuple:
+    """ Returns the FROM and WHERE clauses selecting the movies whose title contains title, and their parameters,
+        which include the :query that RANK_COLUMNS refer to
+    """
+    query = fold_title(title)
+    parameters = {'query': query}
+    if indexed and len(query) >= TitleSearchIndex.NGRAM_LENGTH:
+        source = ('FROM {0} JOIN movies ON movies.id = {0}.rowid WHERE {0} MATCH :phrase'
+                  .format(TITLE_SEARCH_TABLE))
+        parameters['phrase'] = '"{}"'.format(query.replace('"', '""'))
+    else:
+        source = 'FROM movies WHERE instr(fold_title(movies.title), :query) > 0'
+    return source, parameters
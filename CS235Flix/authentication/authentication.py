@@ -61,12 +61,9 @@ def login():
 
     if form.validate_on_submit():
         # Successful POST, i.e. the username and password have passed validation checking.
-        # Use the service layer to lookup the user.
+        # Use the service layer to lookup and authenticate the user.
         try:
-            user = services.get_user(form.username.data, repo.repo_instance)
-
-            # Authenticate user.
-            services.authenticate_user(user['username'], form.password.data, repo.repo_instance)
+            user = services.authenticate_user(form.username.data, form.password.data, repo.repo_instance)
 
             # Initialise session and redirect the user to the home page.
             session.clear()
@@ -0,0 +1,72 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CredentialCache:
+    """ Bounded, short-lived record of credentials that recently passed check_password_hash.
+
+        Entries are keyed by an HMAC of the username, the password and the stored password hash under a key generated
+        per process, so plain passwords are never kept and a changed password hash never matches an old entry. At most
+        max_entries are kept, evicting the least recently used, and each entry expires ttl_seconds after it was added.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, clock=time.monotonic):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._salt = os.urandom(32)
+        self._entries = OrderedDict()
+        self._keys_by_username = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_verified(self, username: str, password: str, password_hash: str) -> bool:
+        key = self._key(username, password, password_hash)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            _, expires_at = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def remember(self, username: str, password: str, password_hash: str):
+        key = self._key(username, password, password_hash)
+        with self._lock:
+            self._entries[key] = (username, self._clock() + self._ttl_seconds)
+            self._entries.move_to_end(key)
+            self._keys_by_username.setdefault(username, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, username: str):
+        """ Forgets every verified credential of username, e.g. after its password changed """
+        with self._lock:
+            for key in self._keys_by_username.pop(username, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_username.clear()
+
+    def _key(self, username: str, password: str, password_hash: str) -> bytes:
+        message = '\0'.join((username, password, password_hash)).encode('utf-8')
+        return hmac.new(self._salt, message, hashlib.sha256).digest()
+
+    def _remove(self, key: bytes):
+        username, _ = self._entries.pop(key)
+        keys = self._keys_by_username.get(username)
+        if keys is not None:
+            keys.discard(key)
+            if len(keys) == 0:
+                del self._keys_by_username[username]
@@ -3,8 +3,12 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from CS235Flix.adapters.repository import AbstractRepository
+from CS235Flix.authentication.credential_cache import CredentialCache
 from CS235Flix.domainmodel.model import User
 
+# Credentials that recently passed check_password_hash, so that repeated logins skip the slow key derivation
+verified_credentials = CredentialCache(max_entries=1024, ttl_seconds=300)
+
 
 class NameNotUniqueException(Exception):
     pass
@@ -32,7 +36,7 @@ def add_user(username: str, password: str, repo: AbstractRepository):
     # Creat and store the new User, with password encrypted
     user = User(username, password_hash)
     repo.add_user(user)
-
+    invalidate_credentials(user.username)
 
 
 def get_user(username: str, repo: AbstractRepository):
@@ -44,13 +48,24 @@ def get_user(username: str, repo: AbstractRepository):
 
 
 def authenticate_user(username: str, password: str, repo: AbstractRepository):
-    authenticated = False
-
+    """ Returns the user, as a dictionary, if password matches. Looks the user up once and raises
+        UnknownUserException or AuthenticationException when the login fails.
+    """
     user = repo.get_user(username)
-    if user is not None:
-        authenticated = check_password_hash(user.password, password)
-    if not authenticated:
-        raise AuthenticationException
+    if user is None:
+        raise UnknownUserException
+
+    if not verified_credentials.is_verified(user.username, password, user.password):
+        if not check_password_hash(user.password, password):
+            raise AuthenticationException
+        verified_credentials.remember(user.username, password, user.password)
+
+    return user_to_dict(user)
+
+
+def invalidate_credentials(username: str):
+    # Must be called whenever the password of username changes
+    verified_credentials.invalidate(username)
 
 
 # ===================================================
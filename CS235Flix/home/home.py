@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, current_app, render_template
 import CS235Flix.adapters.repository as repo
 import CS235Flix.utilities.utilities as utilities
 from flask import url_for
@@ -7,8 +7,6 @@ from wtforms import TextAreaField, HiddenField, SubmitField, DecimalField
 from wtforms.validators import DataRequired, Length, ValidationError, NumberRange
 from CS235Flix.movies.movies import SearchForm, SearchByTitleForm
 from CS235Flix.movies.services import get_top_6_movies_by_revenue
-import imdb
-access = imdb.IMDb()
 home_blueprint = Blueprint(
     'home_bp', __name__
 )
@@ -20,8 +18,9 @@ def home():
     for movie in top_6_picks:
         movie['view_review_url'] = url_for('home_bp.home')
         movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['id'])
-        possible_movies = access.search_movie(movie['title'])
-        movie['cover_url'] = possible_movies[0]['cover url']
+        # Covers come from the cover art cache, which looks up missing ones in the background
+        cover_url = current_app.extensions['cover_art'].cover_url(movie['id'], movie['title'], movie['release_year'])
+        movie['cover_url'] = cover_url or url_for('static', filename='images/no-cover.svg')
 
     return render_template(
         'home/home.html',
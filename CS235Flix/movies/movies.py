@@ -9,10 +9,11 @@ from flask_wtf import FlaskForm
 from wtforms import TextAreaField, HiddenField, SubmitField
 from wtforms.fields.html5 import SearchField, DecimalField
 from wtforms.validators import DataRequired, Length, ValidationError, NumberRange
-from CS235Flix.movies.services import NonExistentActorException, NonExistentDirectorException, NoSearchResultsException
 
 import CS235Flix.adapters.repository as repo
+from CS235Flix.adapters.repository import MovieQuery
 import CS235Flix.utilities.utilities as utilities
+from CS235Flix.utilities.response_cache import cached_page, record_shown_movies
 import CS235Flix.movies.services as services
 
 from CS235Flix.authentication.authentication import login_required
@@ -25,9 +26,14 @@ movies_blueprint = Blueprint(
 
 
 @movies_blueprint.route('/movies_by_release_year', methods=['GET', 'POST'])
+@cached_page
 def movies_by_release_year():
-    # Read query parameters
+    movies_per_page = 10
+
+    # Read query parameters. A page follows the movie whose key is after, or precedes it when reverse is set
     target_year = request.args.get('year')
+    after = request.args.get('after')
+    reverse = request.args.get('reverse') == '1'
     movie_to_show_reviews = request.args.get('view_reviews_for')
 
     earliest_year = services.get_earliest_year(repo=repo.repo_instance)
@@ -47,38 +53,43 @@ def movies_by_release_year():
         # Convert movie_to_show_reviews from string to int
         movie_to_show_reviews = int(movie_to_show_reviews)
 
-    # Fetch movie(s) from the target year. This call also returns the previous and next release year for movies
-    # immediately before and after the target year
-    movies, previous_year, next_year = services.get_movies_by_release_year(target_year, repo.repo_instance)
+    # Fetch the page of movies from the target year, ordered by title
+    query = MovieQuery.release_year(target_year)
+    page = services.get_page_of_movies(query, repo.repo_instance, after, reverse, movies_per_page)
+    movies = page['movies']
 
-    num_of_movies_found = len(movies)
-    first_page_url = None
-    # last_page_url = None
+    num_of_movies_found = services.count_movies(query, repo.repo_instance)
+    # The first and last buttons lead to the latest and the earliest year; the next button leads to the following
+    # page of the year, or from its last page to the year before, and the previous button the other way
+    first_page_url = url_for('movies_bp.movies_by_release_year', year=latest_year)
+    last_page_url = url_for('movies_bp.movies_by_release_year', year=earliest_year)
     previous_page_url = None
     next_page_url = None
-    last_page_url = url_for('movies_bp.movies_by_release_year', year=earliest_year)  # year=int(oldest_movie['release_year'])
-    first_page_url = url_for('movies_bp.movies_by_release_year', year=latest_year)  # int(latest_movie['release_year'])
-
-    if num_of_movies_found > 0:
-        previous_year = int(movies[0]['release_year']) - 1
-        next_year = int(movies[0]['release_year']) + 1
-
-        next_page_url = url_for('movies_bp.movies_by_release_year', year=previous_year)  # previous_year
 
-        previous_page_url = url_for('movies_bp.movies_by_release_year', year=next_year)
+    if len(movies) > 0:
+        previous_year = target_year - 1
+        next_year = target_year + 1
 
-        if previous_year < earliest_year:
-            next_page_url = None
+        if page['has_next']:
+            next_page_url = url_for('movies_bp.movies_by_release_year', year=target_year, after=page['last_key'])
+        elif previous_year >= earliest_year:
+            next_page_url = url_for('movies_bp.movies_by_release_year', year=previous_year)
 
-        if next_year > latest_year:
-            previous_page_url = None
+        if page['has_previous']:
+            previous_page_url = url_for('movies_bp.movies_by_release_year', year=target_year,
+                                        after=page['first_key'], reverse=1)
+        elif next_year <= latest_year:
+            previous_page_url = url_for('movies_bp.movies_by_release_year', year=next_year, reverse=1)
 
         # Construct urls for viewing movie reviews and adding reviews
         for movie in movies:
-            movie['view_review_url'] = url_for('movies_bp.movies_by_release_year', year=target_year,
-                                               view_reviews_for=movie['id'])
+            movie['view_review_url'] = url_for('movies_bp.movies_by_release_year', year=target_year, after=after,
+                                               reverse=reverse_argument(reverse), view_reviews_for=movie['id'])
             movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['id'])
 
+        # Cached pages are dropped when one of these movies is reviewed
+        record_shown_movies(movies)
+
         # Generate the webpage to display the movie
         return render_template(
             'movies/movies.html',
@@ -103,12 +114,14 @@ def movies_by_release_year():
 
 
 @movies_blueprint.route('/movies_by_genre', methods=['GET'])
+@cached_page
 def movies_by_genre():
     movies_per_page = 10
 
-    # Read query parameter.
+    # Read query parameters. A page follows the movie whose key is after, or precedes it when reverse is set
     genre_name = request.args.get('genre')
-    cursor = request.args.get('cursor')
+    after = request.args.get('after')
+    reverse = request.args.get('reverse') == '1'
     movie_to_show_reviews = request.args.get('view_reviews_for')
 
     if movie_to_show_reviews is None:
@@ -118,57 +131,30 @@ def movies_by_genre():
         # Convert movie_to_show_reviews from string to int
         movie_to_show_reviews = int(movie_to_show_reviews)
 
-    if cursor is None:
-        # None cursor query parameter, so initialise cursor to start the begining
-        cursor = 0
-    else:
-        # Convert cursor from string to int
-        cursor = int(cursor)
-
-    # Retrieve movie ids for movies that are classified with genre_name
-    movie_ids = services.get_movie_ids_for_genre(genre_name, repo.repo_instance)
-    num_of_movies_found = len(movie_ids)
+    # Retrieve the page of movies classified with genre_name to display on the Web page.
+    query = MovieQuery.genre(genre_name)
+    page = services.get_page_of_movies(query, repo.repo_instance, after, reverse, movies_per_page)
+    movies = page['movies']
+    num_of_movies_found = services.count_movies(query, repo.repo_instance)
 
-    # Retrieve the batch of articles to display on the Web page.
-    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
-
-    first_page_url = None
-    last_page_url = None
-    previous_page_url = None
-    next_page_url = None
-
-    if cursor > 0:
-        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
-        previous_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor - movies_per_page)
-        first_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name)
-
-    if cursor + movies_per_page < len(movie_ids):
-        # There are further movies, so generate URLs for the 'next' and last navigation buttons.
-        next_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor + movies_per_page)
-
-        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
-        if len(movie_ids) % movies_per_page == 0:
-            last_cursor -= movies_per_page
-
-        last_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=last_cursor)
+    # Generate URLs for the navigation buttons.
+    first_page_url, previous_page_url, next_page_url, last_page_url = \
+        page_navigation_urls('movies_bp.movies_by_genre', page, genre=genre_name)
 
     # Construct urls for viewing movie reviews and adding reviews
     for movie in movies:
-        movie['view_review_url'] = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor,
-                                           view_reviews_for=movie['id'])
+        movie['view_review_url'] = url_for('movies_bp.movies_by_genre', genre=genre_name, after=after,
+                                           reverse=reverse_argument(reverse), view_reviews_for=movie['id'])
         movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['id'])
-    print(cursor)
-    current_page = cursor
-    if current_page + 10 < num_of_movies_found:
-        current_page += 10
-    else:
-        current_page += (num_of_movies_found - current_page)
+
+    # Cached pages are dropped when one of these movies is reviewed
+    record_shown_movies(movies)
 
     # Generate the webpage to display the movies
     return render_template(
         'movies/movies.html',
         title='Movies',
-        movies_title='Movies classified as ' + genre_name + " - (showing " + str(current_page) + " of " +  str(num_of_movies_found) + " results)",
+        movies_title='Movies classified as ' + genre_name + " - (" + str(num_of_movies_found) + " results found)",
         movies=movies,
         form=SearchForm(),
         handler_url=url_for('movies_bp.search'),
@@ -247,10 +233,15 @@ def review_on_movie():
 
 
 @movies_blueprint.route('/search_movies_by_actor_and_or_director', methods=['GET'])
+@cached_page
 def search_movies_by_actor_and_or_director():
+    movies_per_page = 10
+
     # Read query parameters
     target_actor = request.args.get('actor')
     target_director = request.args.get('director')
+    after = request.args.get('after')
+    reverse = request.args.get('reverse') == '1'
     movie_to_show_reviews = request.args.get('view_reviews_for')
     movies = list()
     if movie_to_show_reviews is None:
@@ -265,42 +256,44 @@ def search_movies_by_actor_and_or_director():
         target_actor = ""
     if target_director is None:
         target_director = ""
+    query = None
     if len(target_director) == 0 and len(target_actor) != 0:
         title_message = "Movies played by " + target_actor
-        try:
-            movies = services.search_movie_by_actor_fullname(actor_fullname=target_actor, repo=repo.repo_instance)
-        except NonExistentActorException:
-            pass
+        query = MovieQuery.actor(target_actor)
     elif len(target_director) != 0 and len(target_actor) == 0:
         title_message = "Movies directed by " + target_director
-        try:
-            movies = services.search_movie_directed_by_director_fullname(director_fullname=target_director,
-                                                                         repo=repo.repo_instance)
-        except NonExistentDirectorException:
-            pass
+        query = MovieQuery.director(target_director)
     elif len(target_director) != 0 and len(target_actor) != 0:
         title_message = "Movies played by " + target_actor + ", and directed by " + target_director
-        try:
-            movies = services.search_movie_by_actor_and_director(actor_fullname=target_actor,
-                                                                 director_fullname=target_director,
-                                                                 repo=repo.repo_instance)
-        except NoSearchResultsException:
-            pass
+        query = MovieQuery.actor_and_director(target_actor, target_director)
+
     first_page_url = None
     last_page_url = None
     previous_page_url = None
     next_page_url = None
+    num_of_movies_found = 0
+
+    if query is not None:
+        page = services.get_page_of_movies(query, repo.repo_instance, after, reverse, movies_per_page)
+        movies = page['movies']
+        num_of_movies_found = services.count_movies(query, repo.repo_instance)
+        first_page_url, previous_page_url, next_page_url, last_page_url = \
+            page_navigation_urls('movies_bp.search_movies_by_actor_and_or_director', page, actor=target_actor,
+                                 director=target_director)
 
-    # There is at least one movie played by the target actor
     for movie in movies:
         movie['view_review_url'] = url_for('movies_bp.search_movies_by_actor_and_or_director', actor=target_actor,
+                                           director=target_director, after=after, reverse=reverse_argument(reverse),
                                            view_reviews_for=movie['id'])
         movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['id'])
 
+    # Cached pages are dropped when one of these movies is reviewed
+    record_shown_movies(movies)
+
     return render_template(
         'movies/movies.html',
         title='Movies',
-        movies_title=title_message + " - (" + str(len(movies)) + " results found)",
+        movies_title=title_message + " - (" + str(num_of_movies_found) + " results found)",
         movies=movies,
         form=SearchForm(),
         handler_url=url_for('movies_bp.search'),
@@ -340,10 +333,14 @@ def search():
 
 
 @movies_blueprint.route('/search_movies_by_title', methods=['GET'])
+@cached_page
 def search_movies_by_title():
+    movies_per_page = 10
+
     target_title = request.args.get('title')
+    after = request.args.get('after')
+    reverse = request.args.get('reverse') == '1'
     movie_to_show_reviews = request.args.get('view_reviews_for')
-    movies = list()
 
     if movie_to_show_reviews is None:
         # No view-reviews query parameter, so set to a non-existent article id.
@@ -355,25 +352,27 @@ def search_movies_by_title():
     if target_title is None:
         target_title = ""
 
-    try:
-        movies = services.search_movie_by_title(title=target_title, repo=repo.repo_instance)
-    except NoSearchResultsException:
-        pass
+    # Retrieve the page of matching movies, best match first
+    query = MovieQuery.title(target_title)
+    page = services.get_page_of_movies(query, repo.repo_instance, after, reverse, movies_per_page)
+    movies = page['movies']
+    num_of_movies_found = services.count_movies(query, repo.repo_instance)
 
-    first_page_url = None
-    last_page_url = None
-    previous_page_url = None
-    next_page_url = None
+    first_page_url, previous_page_url, next_page_url, last_page_url = \
+        page_navigation_urls('movies_bp.search_movies_by_title', page, title=target_title)
 
     for movie in movies:
-        movie['view_review_url'] = url_for('movies_bp.search_movies_by_title', title=target_title,
-                                           view_reviews_for=movie['id'])
+        movie['view_review_url'] = url_for('movies_bp.search_movies_by_title', title=target_title, after=after,
+                                           reverse=reverse_argument(reverse), view_reviews_for=movie['id'])
         movie['add_review_url'] = url_for('movies_bp.review_on_movie', movie=movie['id'])
 
+    # Cached pages are dropped when one of these movies is reviewed
+    record_shown_movies(movies)
+
     return render_template(
         'movies/movies.html',
         title='Movies',
-        movies_title='Search results of "' + target_title + '" - (' + str(len(movies)) + ' results found)',
+        movies_title='Search results of "' + target_title + '" - (' + str(num_of_movies_found) + ' results found)',
         movies=movies,
         form=SearchForm(),
         handler_url=url_for('movies_bp.search'),
@@ -457,6 +456,30 @@ def suggest_movie():
     )
 
 
+def page_navigation_urls(endpoint: str, page: dict, **arguments) -> tuple:
+    """ Returns the URLs of the first, previous, next and last pages around page, None where there is no such page.
+        Previous pages are read backwards from the first movie of page, and the last page backwards from the end.
+    """
+    first_page_url = previous_page_url = next_page_url = last_page_url = None
+
+    if page['has_previous']:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        previous_page_url = url_for(endpoint, after=page['first_key'], reverse=1, **arguments)
+        first_page_url = url_for(endpoint, **arguments)
+
+    if page['has_next']:
+        # There are further movies, so generate URLs for the 'next' and last navigation buttons.
+        next_page_url = url_for(endpoint, after=page['last_key'], **arguments)
+        last_page_url = url_for(endpoint, reverse=1, **arguments)
+
+    return first_page_url, previous_page_url, next_page_url, last_page_url
+
+
+def reverse_argument(reverse: bool):
+    # url_for leaves out arguments that are None
+    return 1 if reverse else None
+
+
 class ProfanityFree:
     def __init__(self, message=None):
         if not message:
@@ -1,9 +1,20 @@
 # CS235Flix/movies/services.py
 
+import base64
+import binascii
+import json
 from typing import List, Iterable
-from CS235Flix.adapters.repository import AbstractRepository
+from CS235Flix.adapters.repository import AbstractRepository, MovieQuery, LOAD_ADMIN, LOAD_CARD, LOAD_DETAIL
 from CS235Flix.domainmodel.model import Movie, Review, Genre, make_review, Actor, Director
 
+# DTO projection profiles, named after the eager-loading profile that fetches what each of them reads.
+# card:   what a movie tile on the home page shows
+# detail: what the movie listings and the review page show; genres carry only their name
+# admin:  every field, including the ids of all movies classified by each genre
+CARD = LOAD_CARD
+DETAIL = LOAD_DETAIL
+ADMIN = LOAD_ADMIN
+
 
 class NonExistentMovieException(Exception):
     pass
@@ -43,13 +54,13 @@ def add_review(review_text: str, username: str, movie_id: int, rating: int, repo
     repo.add_review(review)
 
 
-def get_movie(movie_id: int, repo: AbstractRepository):
-    movie = repo.get_movie_by_index(movie_id)
+def get_movie(movie_id: int, repo: AbstractRepository, profile: str = DETAIL):
+    movie = repo.get_movie_by_index(movie_id, load=profile)
 
     if movie is None:
         raise NonExistentMovieException
 
-    return movie_to_dict(movie)
+    return movie_to_dict(movie, profile)
 
 
 def get_latest_movie(repo: AbstractRepository):
@@ -64,7 +75,7 @@ def get_oldest_movie(repo: AbstractRepository):
 
 
 def get_movies_by_release_year(year, repo: AbstractRepository):
-    movies = repo.get_movies_by_release_year(target_year=year)
+    movies = repo.get_movies_by_release_year(target_year=year, load=DETAIL)
 
     movies_dto = list()
     prev_year = next_year = None
@@ -85,7 +96,7 @@ def get_movie_ids_for_genre(genre_name: str, repo: AbstractRepository):
 
 
 def get_movies_by_id(id_list, repo: AbstractRepository):
-    movies = repo.get_movies_by_index(id_list)
+    movies = repo.get_movies_by_index(id_list, load=DETAIL)
 
     # Convert Movies to dictionary form
     movies_as_dict = movies_to_dict(movies)
@@ -104,7 +115,7 @@ def get_reviews_for_movie(movie_id, repo: AbstractRepository):
 
 def search_movie_by_actor_fullname(actor_fullname: str, repo: AbstractRepository):
 
-    movies = repo.get_movies_played_by_an_actor(actor_fullname=actor_fullname)
+    movies = repo.get_movies_played_by_an_actor(actor_fullname=actor_fullname, load=DETAIL)
     if len(movies) == 0:
         raise NonExistentActorException
 
@@ -113,7 +124,7 @@ def search_movie_by_actor_fullname(actor_fullname: str, repo: AbstractRepository
 
 
 def search_movie_directed_by_director_fullname(director_fullname: str, repo: AbstractRepository):
-    movies = repo.get_movies_directed_by_a_director(director_fullname=director_fullname)
+    movies = repo.get_movies_directed_by_a_director(director_fullname=director_fullname, load=DETAIL)
     if len(movies) == 0:
         raise NonExistentDirectorException
     movies_as_dict = movies_to_dict(movies)
@@ -121,7 +132,7 @@ def search_movie_directed_by_director_fullname(director_fullname: str, repo: Abs
 
 
 def search_movie_by_actor_and_director(actor_fullname: str, director_fullname: str, repo: AbstractRepository):
-    movies = repo.search_movies_by_actor_and_director(actor_fullname, director_fullname)
+    movies = repo.search_movies_by_actor_and_director(actor_fullname, director_fullname, load=DETAIL)
     if len(movies) == 0:
         raise NoSearchResultsException
 
@@ -130,7 +141,7 @@ def search_movie_by_actor_and_director(actor_fullname: str, director_fullname: s
 
 
 def search_movie_by_title(title:str, repo:AbstractRepository):
-    movies = repo.search_movie_by_title(title)
+    movies = repo.search_movie_by_title(title, load=DETAIL)
     if len(movies) == 0:
         raise NoSearchResultsException
 
@@ -138,17 +149,58 @@ def search_movie_by_title(title:str, repo:AbstractRepository):
     return movies_as_dict
 
 
+def get_page_of_movies(query: MovieQuery, repo: AbstractRepository, after: str = None, reverse: bool = False,
+                       movies_per_page: int = 10):
+    """ Returns a page of the movies of query, following the movie whose key is after (see encode_page_key), or
+        preceding it when reverse is True. The page's first and last keys are returned encoded, for the URLs of the
+        previous and next pages.
+    """
+    page = repo.page(query, decode_page_key(after, query), movies_per_page, reverse=reverse, load=DETAIL)
+
+    return {
+        'movies': movies_to_dict(page.movies),
+        'first_key': encode_page_key(page.first_key),
+        'last_key': encode_page_key(page.last_key),
+        'has_previous': page.has_previous,
+        'has_next': page.has_next,
+    }
+
+
+def count_movies(query: MovieQuery, repo: AbstractRepository):
+    return repo.count(query)
+
+
+def encode_page_key(key: tuple):
+    # Keys go into URLs as URL-safe base64 of their JSON form
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii')
+
+
+def decode_page_key(text: str, query: MovieQuery):
+    """ Returns the key encoded in text, or None (i.e. from the start of the list) if text is not a key of query """
+    if text is None:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(text.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+    if not isinstance(key, list) or not query.is_key(tuple(key)):
+        return None
+    return tuple(key)
+
+
 def get_top_6_movies_by_revenue(repo:AbstractRepository):
-    movies = repo.get_top_6_highest_revenue_movies()
+    movies = repo.get_top_6_highest_revenue_movies(load=CARD)
     if len(movies) == 0:
         raise NoSearchResultsException
 
-    movies_as_dict = movies_to_dict(movies)
+    movies_as_dict = movies_to_dict(movies, CARD)
     return movies_as_dict
 
 
 def get_suggestions_for_a_user(username: str, repo: AbstractRepository):
-    movies = repo.get_suggestion_for_user(username=username)
+    movies = repo.get_suggestion_for_user(username=username, load=DETAIL)
     movies_as_dict = movies_to_dict(movies)
     return movies_as_dict
 
@@ -168,24 +220,33 @@ def get_latest_year(repo:AbstractRepository):
 # ============================================
 
 
-def movie_to_dict(movie: Movie):
+def movie_to_dict(movie: Movie, profile: str = DETAIL):
+    """ Projects movie onto the fields of the given profile: CARD, DETAIL or ADMIN """
+    if profile not in (CARD, DETAIL, ADMIN):
+        raise ValueError("Unknown projection profile: {}".format(profile))
+
     movie_dict = {
         'id': movie.id,
         'title': movie.title,
         'release_year': movie.release_year,
+        'revenue': movie.revenue
+    }
+    if profile == CARD:
+        return movie_dict
+
+    movie_dict.update({
         'description': movie.description,
         'director': movie.director.director_full_name,
         'actors': actors_to_dict(movie.actors),
-        'genres': genres_to_dict(movie.genres),
+        'genres': genres_to_dict(movie.genres, profile),
         'runtime_minutes': movie.runtime_minutes,
-        'reviews': reviews_to_dict(movie.reviews),
-        'revenue': movie.revenue
-    }
+        'reviews': reviews_to_dict(movie.reviews)
+    })
     return movie_dict
 
 
-def movies_to_dict(movies: Iterable[Movie]):
-    return [movie_to_dict(movie) for movie in movies]
+def movies_to_dict(movies: Iterable[Movie], profile: str = DETAIL):
+    return [movie_to_dict(movie, profile) for movie in movies]
 
 
 def actor_to_dict(actor: Actor):
@@ -199,17 +260,19 @@ def actors_to_dict(actors: Iterable[Actor]):
     return [actor_to_dict(actor) for actor in actors]
 
 
-def genre_to_dict(genre: Genre):
+def genre_to_dict(genre: Genre, profile: str = DETAIL):
     genre_dict = {
-        'genre_name': genre.genre_name,
-        'number_of_classified_movies': genre.number_of_classified_movies,
-        'classified_movies': [movie.id for movie in genre.classified_movies]
+        'genre_name': genre.genre_name
     }
+    if profile == ADMIN:
+        # Lists every movie of the genre, so its size grows with the catalogue rather than with the page
+        genre_dict['number_of_classified_movies'] = genre.number_of_classified_movies
+        genre_dict['classified_movies'] = [movie.id for movie in genre.classified_movies]
     return genre_dict
 
 
-def genres_to_dict(genres: Iterable[Genre]):
-    return [genre_to_dict(genre) for genre in genres]
+def genres_to_dict(genres: Iterable[Genre], profile: str = DETAIL):
+    return [genre_to_dict(genre, profile) for genre in genres]
 
 
 def review_to_dict(review: Review):
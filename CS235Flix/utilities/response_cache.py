@@ -0,0 +1,215 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlencode
+
+from flask import Response, current_app, g, request, session
+from flask_wtf.csrf import generate_csrf
+
+import CS235Flix.adapters.repository as repo
+
+
+class LruCacheBackend:
+    """ In-process cache of up to max_entries values, dropping the least recently used first """
+
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+class LocalRedis:
+    """ In-process stand-in for the few commands of a redis-py client that RedisCacheBackend uses, for tests and
+        deployments without a Redis server. Like redis-py, it stores and returns bytes.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._values = dict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._values[name]
+                return None
+            return value
+
+    def set(self, name: str, value, ex: int = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self._lock:
+            self._values[name] = (value, None if ex is None else self._clock() + ex)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._values.pop(name, None) is not None for name in names)
+
+
+class RedisCacheBackend:
+    """ Keeps the values in Redis, or anything answering get and set(name, value, ex=seconds) like a redis-py
+        client, so that several processes share them. Expiry is left to Redis.
+    """
+
+    def __init__(self, client, prefix: str = 'cs235flix:page:'):
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(self._prefix + key)
+        return None if value is None else value.decode('utf-8')
+
+    def set(self, key: str, value: str, ttl_seconds: float):
+        self._client.set(self._prefix + key, value.encode('utf-8'), ex=max(int(ttl_seconds), 1))
+
+
+def create_backend(name: str, max_entries: int = 1024, redis_url: str = None):
+    """ Returns the backend named 'lru' or 'redis', or None for 'none'. redis-py is only needed for a redis_url """
+    if name == 'lru':
+        return LruCacheBackend(max_entries)
+    if name == 'redis':
+        if redis_url is None:
+            return RedisCacheBackend(LocalRedis())
+        import redis
+        return RedisCacheBackend(redis.Redis.from_url(redis_url))
+    if name == 'none':
+        return None
+    raise ValueError("Unknown response cache backend: {}".format(name))
+
+
+class ResponseCache:
+    """ Caches the rendered pages of the views decorated with cached_page.
+
+        A page is keyed by its path, its query arguments in sorted order and the one thing it shows of the session,
+        the user name in the navigation bar, so that every anonymous visitor is served the same page. A CSRF token
+        rendered into the page's forms is stored as a placeholder, which is filled in with the token of the request
+        served; pages without one leave the session alone. A cached page is served only while the catalogue version
+        and the review version of every movie it shows (see record_shown_movies) are those it was rendered with, and
+        for at most ttl_seconds.
+
+        The versions are counters the repository keeps in process, and start over when the process does, so keys
+        also carry a token drawn when the cache is created. A backend shared by several processes, or outliving
+        one, thus never serves a page to a process whose versions cannot tell whether the page is stale.
+
+        Every page, cached or not, carries a strong ETag, so that a request whose If-None-Match names the current
+        page gets a 304 without a body. The ETag of a page with a form stands for the page and the session's CSRF
+        token, rather than for the signed token rendered into it, which changes on every request.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 600.0):
+        self._backend = backend
+        self._ttl_seconds = ttl_seconds
+        self._token = uuid.uuid4().hex
+        self._csrf_placeholder = 'csrf-token-' + self._token
+        self.hits = 0
+        self.misses = 0
+
+    def respond(self, view: Callable, args: tuple, kwargs: dict) -> Response:
+        key = self._key()
+        response = self._cached_response(key)
+        if response is None:
+            self.misses += 1
+            g.shown_movie_ids = list()
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                page = self._page_without_csrf_token(response.get_data(as_text=True))
+                response.set_etag(self._etag(page))
+                self._store(key, response, page, g.shown_movie_ids)
+            response.headers['X-Cache'] = 'MISS'
+        else:
+            self.hits += 1
+            response.headers['X-Cache'] = 'HIT'
+        return response.make_conditional(request)
+
+    def _key(self) -> str:
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return hashlib.sha1(json.dumps([self._token, request.path, query, session.get('username')]).encode('utf-8')) \
+            .hexdigest()
+
+    def _page_without_csrf_token(self, page: str) -> str:
+        # The view's forms put the request's signed token in g when they were created, whether they render it or not
+        token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if token is None or not current_app.config.get('WTF_CSRF_ENABLED', True):
+            return page
+        return page.replace(token, self._csrf_placeholder)
+
+    def _etag(self, page: str) -> str:
+        if self._csrf_placeholder in page:
+            page += session.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'), '')
+        return hashlib.sha1(page.encode('utf-8')).hexdigest()
+
+    def _cached_response(self, key: str) -> Optional[Response]:
+        value = self._backend.get(key)
+        if value is None:
+            return None
+        entry = json.loads(value)
+        if entry['catalogue_version'] != repo.repo_instance.get_catalogue_version():
+            return None
+        for movie_id, review_version in entry['review_versions']:
+            if repo.repo_instance.get_movie_review_version(movie_id) != review_version:
+                return None
+
+        page = entry['body']
+        body = page.replace(self._csrf_placeholder, generate_csrf()) if self._csrf_placeholder in page else page
+        response = Response(body, content_type=entry['content_type'])
+        response.set_etag(self._etag(page))
+        return response
+
+    def _store(self, key: str, response: Response, page: str, movie_ids: Iterable[int]):
+        entry = {
+            'body': page,
+            'content_type': response.content_type,
+            'catalogue_version': repo.repo_instance.get_catalogue_version(),
+            'review_versions': [(movie_id, repo.repo_instance.get_movie_review_version(movie_id))
+                                for movie_id in dict.fromkeys(movie_ids)],
+        }
+        self._backend.set(key, json.dumps(entry), self._ttl_seconds)
+
+
+def cached_page(view: Callable) -> Callable:
+    """ Serves GET requests of the view from the app's response cache, if it has one """
+
+    @functools.wraps(view)
+    def cached_view(*args, **kwargs):
+        response_cache = current_app.extensions.get('response_cache')
+        if response_cache is None or request.method != 'GET':
+            return view(*args, **kwargs)
+        return response_cache.respond(view, args, kwargs)
+
+    return cached_view
+
+
+def record_shown_movies(movies: Iterable[dict]):
+    """ Called by cached views with the movies a page shows, so that the page is dropped once one is reviewed """
+    if 'shown_movie_ids' in g:
+        g.shown_movie_ids.extend(movie['id'] for movie in movies)
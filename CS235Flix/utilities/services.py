@@ -3,7 +3,7 @@
 from typing import Iterable, List
 import random
 
-from CS235Flix.adapters.repository import AbstractRepository
+from CS235Flix.adapters.repository import AbstractRepository, LOAD_SIDEBAR
 from CS235Flix.domainmodel.model import Movie
 
 
@@ -17,13 +17,13 @@ def get_genre_names(repo:AbstractRepository) -> List[str]:
 def get_random_movies(quantity, repo:AbstractRepository):
     movie_count = repo.get_total_number_of_movies_in_repo()
 
-    if quantity >= movie_count:
+    if quantity > movie_count:
         # Reduce the quantity of movie ids to generate if the repository has an insufficient number of movies
-        quantity = movie_count - 1
+        quantity = movie_count
 
     # Pick distinct and random movie
-    random_ids = random.sample(range(1, movie_count), quantity)
-    movies = repo.get_movies_by_index(random_ids)
+    random_ids = random.sample(range(1, movie_count + 1), quantity)
+    movies = repo.get_movies_by_index(random_ids, load=LOAD_SIDEBAR)
 
     return movies_to_dict(movies)
 
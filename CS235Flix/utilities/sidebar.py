@@ -0,0 +1,101 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+from flask import Flask, url_for
+
+import CS235Flix.adapters.repository as repo
+import CS235Flix.utilities.services as services
+
+
+class SidebarProvider:
+    """ Serves the genre links and random movie picks shown beside every page, without going to the repository.
+
+        The genre URL map is built once per catalogue version (see AbstractRepository.get_catalogue_version). Random
+        picks come from a pool of pool_size movies, already converted to dictionaries and held in shuffled order;
+        each call takes the next picks from the pool as from a ring buffer. Once the pool is rotate_seconds old, or
+        the catalogue has changed, the next call starts a background thread that samples a new pool and swaps it in,
+        while calls go on being served from the current one. Only the first call waits for a pool.
+
+        Release year links are built on first use and cached per year, since url_for needs a request context.
+    """
+
+    def __init__(self, app: Flask, pool_size: int = 100, rotate_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._app = app
+        self._pool_size = pool_size
+        self._rotate_seconds = rotate_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._genre_urls = None
+        self._genre_urls_version = None
+        self._year_urls = dict()
+
+        self._pool = list()
+        self._pool_version = None
+        self._pool_built_at = None
+        self._next_pick = 0
+        self._refresh_thread = None
+
+    def genre_urls(self) -> Dict[str, str]:
+        """ Returns the URL of the page of every genre, by genre name. The map is shared and must not be changed """
+        version = repo.repo_instance.get_catalogue_version()
+        if self._genre_urls is None or self._genre_urls_version != version:
+            genre_urls = dict()
+            for genre_name in services.get_genre_names(repo.repo_instance):
+                genre_urls[genre_name] = url_for('movies_bp.movies_by_genre', genre=genre_name)
+            self._genre_urls, self._genre_urls_version = genre_urls, version
+        return self._genre_urls
+
+    def selected_movies(self, quantity: int = 10) -> List[dict]:
+        """ Returns up to quantity distinct movies from the pool, each with the URL of its release year as 'id' """
+        if self._pool_version is None:
+            self.refresh()
+        elif self._pool_is_stale():
+            self._refresh_in_background()
+
+        with self._lock:
+            pool = self._pool
+            quantity = min(quantity, len(pool))
+            start = self._next_pick
+            self._next_pick = (start + quantity) % len(pool) if len(pool) > 0 else 0
+        picks = [dict(pool[(start + offset) % len(pool)]) for offset in range(quantity)]
+
+        for movie in picks:
+            movie['id'] = self._year_url(int(movie['release_year']))
+        return picks
+
+    def refresh(self):
+        """ Samples a new pool of movies and swaps it in """
+        version = repo.repo_instance.get_catalogue_version()
+        pool = services.get_random_movies(self._pool_size, repo.repo_instance)
+        random.shuffle(pool)
+        with self._lock:
+            self._pool = pool
+            self._pool_version = version
+            self._pool_built_at = self._clock()
+            self._next_pick = 0
+
+    def _pool_is_stale(self) -> bool:
+        return (self._clock() - self._pool_built_at >= self._rotate_seconds or
+                self._pool_version != repo.repo_instance.get_catalogue_version())
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self._refresh_in_app_context, daemon=True)
+            self._refresh_thread.start()
+
+    def _refresh_in_app_context(self):
+        # The app context gives the thread a database session of its own, removed when the context is torn down
+        with self._app.app_context():
+            self.refresh()
+
+    def _year_url(self, release_year: int) -> str:
+        year_url = self._year_urls.get(release_year)
+        if year_url is None:
+            year_url = self._year_urls[release_year] = url_for('movies_bp.movies_by_release_year', year=release_year)
+        return year_url
@@ -1,6 +1,12 @@
+import re
+
 import pytest
 
-from flask import session
+from flask import render_template_string, session
+
+from CS235Flix import create_app
+from CS235Flix.movies.services import encode_page_key
+from CS235Flix.utilities.response_cache import LocalRedis, RedisCacheBackend, ResponseCache, cached_page
 
 
 def test_register(client):  # Test the register method in authentication.py
@@ -67,6 +73,15 @@ def test_index(client):
     assert b'CS235' in response.data
 
 
+def test_index_serves_cached_cover_art(client):
+    client.application.extensions['cover_art'].wait()
+
+    response = client.get('/')
+    # Guardians of the Galaxy has a cover in the test covers file, Sing has none
+    assert b'https://covers.example.com/1.jpg' in response.data
+    assert b'/static/images/no-cover.svg' in response.data
+
+
 def test_login_required_to_review(client):
     response = client.post('/review')
     assert response.headers['Location'] == 'http://localhost/authentication/login'
@@ -148,6 +163,16 @@ def test_movies_with_genre(client):
     assert b"Don't Breathe" not in response.data  # The movie "Don't Breathe" is classified as Horror, but it is not in the testing data
 
 
+
+def test_movies_with_genre_read_on_from_the_after_key(client):
+    response = client.get('/movies_by_genre?genre=Action&after=' + encode_page_key((5,)))
+    assert response.status_code == 200
+
+    # Action is Guardians of the Galaxy (1), Suicide Squad (5), The Great Wall (6) and The Lost City of Z (9)
+    assert b"/review?movie=1'" not in response.data and b"/review?movie=5'" not in response.data
+    assert b"/review?movie=6'" in response.data and b"/review?movie=9'" in response.data
+    assert b'Movies classified as Action - (4 results found)' in response.data
+
 def test_search_by_actor_fullname(client):
     # Check that we can search movies by an actor fullname
     response = client.post('/search', data={'actor': "Chris Pratt"})
@@ -208,4 +233,105 @@ def test_can_suggest_movies_to_a_logged_in_user(client, auth):
 def test_repository_will_not_suggest_movies_un_logged_in_user(client):
     # Check that we can retrieve suggestions for the logged in user:
     response = client.get('/suggest')
-    assert response.headers['Location'] == 'http://localhost/authentication/login'
\ No newline at end of file
+    assert response.headers['Location'] == 'http://localhost/authentication/login'
+
+def test_browse_pages_are_served_from_the_response_cache(client):
+    first = client.get('/movies_by_genre?genre=Action&cursor=0')
+    assert first.headers['X-Cache'] == 'MISS'
+
+    # The order of the query arguments does not matter
+    second = client.get('/movies_by_genre?cursor=0&genre=Action')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_cached_pages_are_not_served_to_another_process(client):
+    # A restarted or second process has its own review versions, so it must not trust the pages of the first
+    backend = RedisCacheBackend(LocalRedis())
+    client.application.extensions['response_cache'] = ResponseCache(backend)
+    client.get('/movies_by_release_year?year=2016')
+    client.application.extensions['response_cache'] = ResponseCache(backend)
+
+    assert client.get('/movies_by_release_year?year=2016').headers['X-Cache'] == 'MISS'
+    assert client.get('/movies_by_release_year?year=2016').headers['X-Cache'] == 'HIT'
+
+
+def test_browse_pages_answer_a_matching_if_none_match_with_304(client):
+    etag = client.get('/movies_by_release_year?year=2016').headers['ETag']
+
+    response = client.get('/movies_by_release_year?year=2016', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get('/movies_by_release_year?year=2016', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+
+
+def test_reviewing_a_movie_drops_the_cached_pages_showing_it(client, auth):
+    url = '/search_movies_by_title?title=Guardians&view_reviews_for=1'
+    auth.login()
+    client.get(url)
+    assert client.get(url).headers['X-Cache'] == 'HIT'
+    assert client.get('/movies_by_release_year?year=2016').headers['X-Cache'] == 'MISS'
+
+    client.post('/review', data={'review': 'what a great movie!', 'rating': 10, 'movie_id': 1})
+
+    response = client.get(url)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert b'what a great movie!' in response.data
+    # Guardians of the Galaxy was released in 2014, so the 2016 page stays cached
+    assert client.get('/movies_by_release_year?year=2016').headers['X-Cache'] == 'HIT'
+
+
+def test_cached_pages_are_kept_apart_per_user(client, auth):
+    client.get('/movies_by_release_year?year=2016')
+    auth.login()
+
+    response = client.get('/movies_by_release_year?year=2016')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert b'thorke' in response.data
+
+
+@pytest.fixture
+def csrf_app():
+    return create_app({
+        'TESTING': True,
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': 'Tests/data/database',
+        'COVER_ART_PROVIDER': 'local'
+    })
+
+
+def rendered_csrf_token(response):
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', response.get_data(as_text=True)).group(1)
+
+
+def test_cached_pages_are_shared_by_visitors_with_their_own_csrf_tokens(csrf_app):
+    first_client, second_client = csrf_app.test_client(), csrf_app.test_client()
+
+    first = first_client.get('/movies_by_genre?genre=Action')
+    assert first.headers['X-Cache'] == 'MISS'
+    second = second_client.get('/movies_by_genre?genre=Action')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert rendered_csrf_token(second) != rendered_csrf_token(first)
+
+    def search(client, csrf_token):
+        return client.post('/search_by_title', data={'title': 'Split', 'csrf_token': csrf_token}).status_code
+
+    assert search(second_client, rendered_csrf_token(second)) == 302
+    assert search(second_client, rendered_csrf_token(first)) == 200
+
+    # The page stands for the page and the visitor's CSRF token, not the signed token that changes on every request
+    assert second_client.get('/movies_by_genre?genre=Action').headers['ETag'] == second.headers['ETag']
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_cached_pages_without_a_form_leave_the_session_alone(csrf_app):
+    csrf_app.add_url_rule('/plain_page', 'plain_page', cached_page(lambda: render_template_string('<p>Movies</p>')))
+    first_client, second_client = csrf_app.test_client(), csrf_app.test_client()
+
+    assert first_client.get('/plain_page').headers['X-Cache'] == 'MISS'
+    response = second_client.get('/plain_page')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert 'Set-Cookie' not in response.headers
@@ -1,4 +1,4 @@
-from CS235Flix.domainmodel.model import Actor
+from CS235Flix.domainmodel.model import Actor, Movie, make_movie_actor_association
 
 
 class TestActorMethods:
@@ -43,4 +43,23 @@ class TestActorMethods:
         actor1.add_actor_colleague(actor2)
         assert actor1.check_if_this_actor_worked_with(actor2) == True
         assert actor2.check_if_this_actor_worked_with(actor1) == True
-        assert actor1.check_if_this_actor_worked_with(actor3) == False
\ No newline at end of file
+        assert actor1.check_if_this_actor_worked_with(actor3) == False
+
+    def test_add_actor_colleague_only_once(self):
+        actor1 = Actor("Angelina Jolie")
+        actor2 = Actor("Brad Pitt")
+        actor1.add_actor_colleague(actor2)
+        actor2.add_actor_colleague(actor1)
+        assert actor1.get_number_of_colleagues() == 1
+        assert actor2.get_number_of_colleagues() == 1
+
+    def test_colleagues_include_co_stars(self):
+        actor1 = Actor("Chris Pratt")
+        actor2 = Actor("Jennifer Lawrence")
+        movie = Movie("Passengers", 2016, 10)
+        for actor in [actor1, actor2]:
+            make_movie_actor_association(movie, actor)
+
+        assert actor1.check_if_this_actor_worked_with(actor2) == True
+        assert list(actor2.actor_colleague) == [actor1]
+        assert actor1.get_number_of_colleagues() == 1
@@ -1,4 +1,4 @@
-from CS235Flix.domainmodel.model import Genre
+from CS235Flix.domainmodel.model import Genre, Movie, SMALL_LIST_LENGTH
 
 
 class TestGenreMethods:
@@ -25,4 +25,31 @@ class TestGenreMethods:
 
     def test_hash(self):
         genre1 = Genre("Horror")
-        assert hash(genre1) == hash("Horror")
\ No newline at end of file
+        assert hash(genre1) == hash("Horror")
+
+    def test_add_movie_only_once(self):
+        genre1 = Genre("Horror")
+        movie1 = Movie("Split", 2016, 3)
+        genre1.add_Movie(movie1)
+        genre1.add_Movie(Movie("Split", 2016, 3))
+        assert genre1.number_of_classified_movies == 1
+        assert genre1.is_applied_to(movie1) == True
+        assert genre1.is_applied_to(Movie("Sing", 2016, 4)) == False
+
+    def test_membership_index_stays_in_step_with_classified_movies(self):
+        genre1 = Genre("Horror")
+        movies = [Movie("Movie {}".format(index), 2016) for index in range(SMALL_LIST_LENGTH + 2)]
+        for movie in movies:
+            genre1.add_Movie(movie)
+
+        # The companion set is updated in place rather than rebuilt on every add
+        lookup = genre1._Genre__classified_movie_lookup
+        genre1.add_Movie(Movie("Another Movie", 2016))
+        assert genre1._Genre__classified_movie_lookup is lookup
+        assert genre1.number_of_classified_movies == SMALL_LIST_LENGTH + 3
+
+    def test_short_list_has_no_membership_index(self):
+        genre1 = Genre("Horror")
+        genre1.add_Movie(Movie("Split", 2016, 3))
+        assert genre1.is_applied_to(Movie("Split", 2016, 3)) == True
+        assert getattr(genre1, '_Genre__classified_movie_lookup', None) is None
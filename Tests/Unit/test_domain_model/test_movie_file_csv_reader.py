@@ -18,4 +18,23 @@ class TestMovieFileCSVReader:
         assert len(movie_file_reader.dataset_of_ratings) == 1000
         assert len(movie_file_reader.dataset_of_votes) == 1000
         assert len(movie_file_reader.dataset_of_revenue) == 872
-        assert len(movie_file_reader.dataset_of_metadata) == 838
\ No newline at end of file
+        assert len(movie_file_reader.dataset_of_metadata) == 838
+
+    def test_stream_records(self):
+        filename = 'CS235Flix/adapters/datafiles/movies.csv'
+        movie_file_reader = MovieFileCSVReader(filename)
+        records = movie_file_reader.stream_records()
+
+        first_record = next(records)
+        assert first_record.id == 1
+        assert first_record.title == "Guardians of the Galaxy"
+        assert first_record.genres == ["Action", "Adventure", "Sci-Fi"]
+        assert first_record.actors == ["Chris Pratt", "Vin Diesel", "Bradley Cooper", "Zoe Saldana"]
+        assert first_record.release_year == 2014
+        assert first_record.revenue == 333.13
+
+        # Unparsable values are None rather than dropping the record
+        remaining_records = list(records)
+        assert len(remaining_records) == 999
+        assert sum(record.revenue is None for record in remaining_records) == 128
+        assert len(movie_file_reader.dataset_of_movies) == 0
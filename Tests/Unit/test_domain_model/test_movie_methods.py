@@ -1,4 +1,4 @@
-from CS235Flix.domainmodel.model import Movie, Actor, Director
+from CS235Flix.domainmodel.model import Movie, Actor, Director, Genre
 import pytest
 class TestMovieMethods:
     def test_init(self):
@@ -57,4 +57,34 @@ class TestMovieMethods:
         movie3 = Movie("Wrong", 1800, 2)
         assert movie1.release_year == 2016
         assert movie2.release_year is None
-        assert movie3.release_year is None
\ No newline at end of file
+        assert movie3.release_year is None
+
+    def test_has_actor(self):
+        movie1 = Movie("Moana", 2016, 2)
+        movie1.add_actor(Actor("Dwayne Johnson"))
+        assert movie1.has_actor(Actor("Dwayne Johnson")) == True
+        assert movie1.has_actor(Actor("Rachel House")) == False
+
+        movie1.remove_actor(Actor("Dwayne Johnson"))
+        assert movie1.has_actor(Actor("Dwayne Johnson")) == False
+
+    def test_add_and_remove_genre(self):
+        movie1 = Movie("Moana", 2016, 2)
+        assert movie1.add_genre(Genre("Animation")) == True
+        assert movie1.add_genre(Genre("Animation")) == False
+        assert movie1.number_of_genres == 1
+        assert movie1.is_classified_as(Genre("Animation")) == True
+
+        movie1.remove_genre(Genre("Animation"))
+        assert movie1.number_of_genres == 0
+        assert movie1.is_classified_as(Genre("Animation")) == False
+
+    def test_has_actor_after_replacing_an_actor_of_a_long_cast(self):
+        movie1 = Movie("Moana", 2016, 2)
+        for number in range(10):
+            movie1.add_actor(Actor("Actor {}".format(number)))
+
+        movie1.remove_actor(Actor("Actor 0"))
+        movie1.add_actor(Actor("Dwayne Johnson"))
+        assert movie1.has_actor(Actor("Dwayne Johnson")) == True
+        assert movie1.has_actor(Actor("Actor 0")) == False
@@ -26,4 +26,23 @@ class TestUserMethods:
         review = Review(user1, movie1, "This is a great movie!", 9, date.fromisoformat('2020-03-15'))
         user1.add_review(review)
 
-        assert user1.reviews == [review]
\ No newline at end of file
+        assert user1.reviews == [review]
+
+    def test_watched_movies_are_changed_only_through_the_user(self):
+        user1 = User('user1', 'pw12345')
+        movie1 = Movie("Star War", 19879, 1)
+        movie1.set_runtime_minutes(120)
+        user1.watched_movies.append(movie1)
+        assert user1.watched_movies == []
+
+        user1.watch_movie(movie1)
+        user1.watch_movie(movie1)
+        assert user1.watched_movies == [movie1]
+
+    def test_add_review_only_once(self):
+        user1 = User('user1', 'pw12345')
+        movie1 = Movie("Star War", 19879, 1)
+        review = Review(user1, movie1, "This is a great movie!", 9, date.fromisoformat('2020-03-15'))
+        user1.add_review(review)
+        user1.add_review(Review(user1, movie1, "This is a great movie!", 9, date.fromisoformat('2020-03-15')))
+        assert user1.reviews == [review]
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from CS235Flix.adapters.catalogue import MovieCatalogue
+from CS235Flix.domainmodel.model import Genre, Movie
+
+TEST_MOVIES_CSV = os.path.join("Tests", "data", "memory", "movies.csv")
+
+
+@pytest.fixture
+def catalogue():
+    return MovieCatalogue.from_csv(TEST_MOVIES_CSV)
+
+
+def test_catalogue_is_keyed_by_movie_id(catalogue):
+    assert len(catalogue) == 10
+    assert catalogue.movie_ids == list(range(1, 11))
+    assert 3 in catalogue
+    assert 11 not in catalogue
+    assert catalogue.value(1, 'revenue') == 333.13
+    assert catalogue.value(1, 'votes') == 757074
+
+
+def test_catalogue_records_unparsable_values_as_nulls(catalogue):
+    # Mindhorn has no revenue, but its other columns are still read
+    assert catalogue.value(8, 'revenue') is None
+    assert catalogue.value(8, 'rating') == 6.4
+    assert catalogue.column('revenue').count() == 9
+    assert catalogue.column('rating').count() == 10
+
+
+def test_catalogue_top_k(catalogue):
+    assert catalogue.top_k('revenue', 3) == [1, 5, 4]
+    assert catalogue.top_k('rating', 2) == [7, 1]
+    assert len(catalogue.top_k('revenue', 20)) == 9
+    assert catalogue.top_k('revenue', 0) == []
+
+
+def test_catalogue_top_k_breaks_ties_by_movie_id(catalogue):
+    # Prometheus and Passengers are both rated 7.0
+    assert catalogue.top_k('rating', 6)[-2:] == [9, 2]
+    assert catalogue.top_k('rating', 7)[-2:] == [2, 10]
+
+
+def test_catalogue_year_histogram(catalogue):
+    assert catalogue.year_histogram() == {2012: 1, 2014: 1, 2016: 8}
+
+
+def test_catalogue_navigates_between_release_years(catalogue):
+    assert (catalogue.earliest_year(), catalogue.latest_year()) == (2012, 2016)
+    assert catalogue.previous_year(2014) == 2012
+    assert catalogue.previous_year(2015) == 2014
+    assert catalogue.previous_year(2012) is None
+    assert catalogue.next_year(2012) == 2014
+    assert catalogue.next_year(2016) is None
+
+    catalogue.add_movie(Movie("Moana", 2017, 11))
+    assert catalogue.next_year(2016) == 2017
+    assert catalogue.year_histogram()[2017] == 1
+    assert MovieCatalogue().earliest_year() is None
+
+
+def test_catalogue_filter_range(catalogue):
+    assert catalogue.filter_range('runtime_minutes', low=125) == [7, 9]
+    assert catalogue.filter_range('runtime_minutes', low=100, high=110) == [4, 6]
+    assert catalogue.filter_range('revenue', high=50) == [6, 9]
+
+
+def test_catalogue_genre_aggregates(catalogue):
+    assert catalogue.movie_ids_for_genre('Comedy') == [4, 7, 8]
+    assert catalogue.movie_ids_for_genre('Western') == []
+    assert catalogue.genre_aggregate('revenue', 'count')['Comedy'] == 2
+    assert catalogue.genre_aggregate('revenue', 'sum')['Comedy'] == pytest.approx(421.38)
+    assert catalogue.genre_aggregate('rating')['Comedy'] == pytest.approx(7.3)
+    with pytest.raises(ValueError):
+        catalogue.genre_aggregate('rating', 'median')
+    assert sorted(row for row in catalogue.genre_rows('revenue') if row[0] == 'Comedy') == \
+        [('Comedy', 4, 270.32), ('Comedy', 7, 151.06), ('Comedy', 8, None)]
+
+
+def test_catalogue_merges_added_movies(catalogue):
+    movie = Movie("Moana", 2016, 11)
+    movie.set_revenue(248.75)
+    movie.add_genre(Genre("Animation"))
+    movie.add_genre(Genre("Western"))
+    catalogue.add_movie(movie)
+    catalogue.add_movie(Movie("Split", 2016, 3))
+
+    assert len(catalogue) == 11
+    assert catalogue.value(11, 'revenue') == 248.75
+    assert catalogue.value(11, 'rating') is None
+    assert catalogue.value(3, 'revenue') == 138.12
+    assert catalogue.movie_ids_for_genre('Animation') == [4, 11]
+    assert catalogue.movie_ids_for_genre('Western') == [11]
+    assert catalogue.year_histogram()[2016] == 9
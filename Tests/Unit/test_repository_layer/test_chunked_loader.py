@@ -0,0 +1,53 @@
+import os
+
+from CS235Flix.adapters.chunked_loader import StageTimer, parse_chunks, read_chunk_rows, split_into_chunks
+from CS235Flix.adapters.memory_repository import MemoryRepository, load_movies_actors_directors_genre_description, \
+    parse_movie_chunk
+
+TEST_DATA_PATH = os.path.join("Tests", "data", "memory")
+TEST_MOVIES_CSV = os.path.join(TEST_DATA_PATH, "movies.csv")
+
+
+def test_chunks_cover_every_data_row_once():
+    chunks = split_into_chunks(TEST_MOVIES_CSV, 4)
+    assert len(chunks) == 4
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+
+    rows = [row for start, end in chunks for row in read_chunk_rows(TEST_MOVIES_CSV, start, end)]
+    assert [int(row[0]) for row in rows] == list(range(1, 11))
+
+
+def test_more_chunks_than_rows_are_collapsed():
+    chunks = split_into_chunks(TEST_MOVIES_CSV, 50)
+    assert len(chunks) <= 10
+    rows = [row for start, end in chunks for row in read_chunk_rows(TEST_MOVIES_CSV, start, end)]
+    assert len(rows) == 10
+
+
+def test_rows_are_split_on_line_endings_only(tmp_path):
+    csv_path = tmp_path / "movies.csv"
+    csv_path.write_bytes("id,Description\r\n1,Form\x0cfeed\r\n2,\"Line\u2028separator\"\n".encode('utf-8'))
+
+    (start, end), = split_into_chunks(str(csv_path), 1)
+    assert read_chunk_rows(str(csv_path), start, end) == [['1', 'Form\x0cfeed'], ['2', 'Line\u2028separator']]
+
+
+def test_process_pool_parses_like_a_single_process():
+    sequential = parse_chunks(TEST_MOVIES_CSV, parse_movie_chunk)
+    parallel = parse_chunks(TEST_MOVIES_CSV, parse_movie_chunk, workers=2, number_of_chunks=3)
+    assert parallel == sequential
+    assert sequential[7][:2] == (8, "Mindhorn")
+    assert sequential[7][-1] == 0
+
+
+def test_loader_links_movies_and_reports_stage_timings():
+    repo = MemoryRepository()
+    timer = StageTimer()
+    timings = load_movies_actors_directors_genre_description(TEST_DATA_PATH, repo, timer=timer)
+
+    assert set(timings) == {'parse movies', 'create movies', 'link movies'}
+    assert repo.get_total_number_of_movies_in_repo() == 10
+    movie = repo.get_movie_by_index(1)
+    assert movie.director.director_full_name == "James Gunn"
+    assert [genre.genre_name for genre in movie.genres] == ["Action", "Adventure", "Sci-Fi"]
+    assert movie in repo.get_actor("Chris Pratt").played_movies
@@ -0,0 +1,122 @@
+import pytest
+
+from CS235Flix.adapters import cover_art as cover_art_module
+from CS235Flix.adapters.cover_art import CoverArtCache, CoverArtProvider, LocalCoverArtProvider
+
+COVERS_FILE = 'Tests/data/database/covers.csv'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingProvider(CoverArtProvider):
+    def __init__(self, failing=False):
+        self.lookups = list()
+        self.failing = failing
+
+    def cover_url(self, movie_id, title, release_year):
+        self.lookups.append(movie_id)
+        if self.failing:
+            raise IOError("IMDb is unreachable")
+        return 'https://covers.example.com/{}-{}.jpg'.format(movie_id, len(self.lookups))
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cover-art-cache.json')
+
+
+def test_covers_are_looked_up_in_the_background_once(cache_path):
+    provider = RecordingProvider()
+    cover_art = CoverArtCache(provider, cache_path)
+
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) is None
+    cover_art.wait()
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) == 'https://covers.example.com/1-1.jpg'
+    assert provider.lookups == [1]
+
+
+def test_cached_covers_survive_a_restart(cache_path):
+    cover_art = CoverArtCache(RecordingProvider(), cache_path)
+    cover_art.cover_url(1, 'Guardians of the Galaxy', 2014)
+    cover_art.cover_url(2, 'Prometheus', 2012)
+    cover_art.wait()
+
+    provider = RecordingProvider()
+    restarted = CoverArtCache(provider, cache_path)
+    assert restarted.cover_url(2, 'Prometheus', 2012) == 'https://covers.example.com/2-2.jpg'
+    restarted.wait()
+    assert provider.lookups == []
+
+
+@pytest.mark.parametrize('contents', ['{"1": ["https://covers', '[["https://covers.example.com/1.jpg", 1000.0]]',
+                                      '{"1": "https://covers.example.com/1.jpg"}'])
+def test_corrupt_cache_files_start_an_empty_cache(cache_path, contents):
+    with open(cache_path, 'w', encoding='utf-8') as outfile:
+        outfile.write(contents)
+
+    provider = RecordingProvider()
+    cover_art = CoverArtCache(provider, cache_path)
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) is None
+    cover_art.wait()
+    assert provider.lookups == [1]
+
+
+def test_unreadable_cache_files_start_an_empty_cache(cache_path, monkeypatch):
+    with open(cache_path, 'w', encoding='utf-8') as outfile:
+        outfile.write('{"1": ["https://covers.example.com/1.jpg", 1000.0]}')
+
+    def unreadable(path, mode='r', **kwargs):
+        if 'r' in mode:
+            raise PermissionError(path)
+        return open(path, mode, **kwargs)
+
+    monkeypatch.setattr(cover_art_module, 'open', unreadable, raising=False)
+    provider = RecordingProvider()
+    cover_art = CoverArtCache(provider, cache_path)
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) is None
+    cover_art.wait()
+    assert provider.lookups == [1]
+
+
+def test_stale_covers_are_served_while_they_are_refreshed(cache_path):
+    clock = FakeClock()
+    provider = RecordingProvider()
+    cover_art = CoverArtCache(provider, cache_path, ttl_seconds=60, clock=clock)
+    cover_art.cover_url(1, 'Guardians of the Galaxy', 2014)
+    cover_art.wait()
+
+    clock.now += 60
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) == 'https://covers.example.com/1-1.jpg'
+    cover_art.wait()
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) == 'https://covers.example.com/1-2.jpg'
+
+
+def test_failed_lookups_are_retried_later(cache_path):
+    clock = FakeClock()
+    provider = RecordingProvider(failing=True)
+    cover_art = CoverArtCache(provider, cache_path, retry_seconds=300, clock=clock)
+    cover_art.cover_url(1, 'Guardians of the Galaxy', 2014)
+    cover_art.wait()
+
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) is None
+    cover_art.wait()
+    assert provider.lookups == [1]
+
+    clock.now += 300
+    provider.failing = False
+    cover_art.cover_url(1, 'Guardians of the Galaxy', 2014)
+    cover_art.wait()
+    assert cover_art.cover_url(1, 'Guardians of the Galaxy', 2014) == 'https://covers.example.com/1-2.jpg'
+
+
+def test_local_provider_reads_covers_from_a_file():
+    provider = LocalCoverArtProvider(COVERS_FILE)
+    assert provider.cover_url(1, 'Guardians of the Galaxy', 2014) == 'https://covers.example.com/1.jpg'
+    assert provider.cover_url(8, 'Mindhorn', 2016) is None
+    assert LocalCoverArtProvider().cover_url(1, 'Guardians of the Galaxy', 2014) is None
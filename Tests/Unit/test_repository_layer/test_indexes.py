@@ -0,0 +1,96 @@
+from CS235Flix.adapters.indexes import PagedListIndex, ReleaseYearIndex, TitleSearchIndex, keyset_slice
+
+
+def make_release_year_index():
+    year_index = ReleaseYearIndex()
+    year_index.add(2016, 3, sort_key="Split")
+    year_index.add(2014, 1, sort_key="Guardians of the Galaxy")
+    year_index.add(2016, 7, sort_key="La La Land")
+    year_index.add(2012, 2, sort_key="Prometheus")
+    return year_index
+
+
+def test_release_year_index_keeps_distinct_years_in_order():
+    year_index = make_release_year_index()
+    assert year_index.years == [2012, 2014, 2016]
+    assert year_index.earliest_year() == 2012
+    assert year_index.latest_year() == 2016
+
+
+def test_release_year_index_orders_movie_ids_by_sort_key_within_a_year():
+    year_index = make_release_year_index()
+    assert year_index.movie_ids(2016) == [7, 3]
+    assert year_index.movie_ids(2030) == []
+
+
+def test_release_year_index_finds_previous_and_next_years():
+    year_index = make_release_year_index()
+    assert year_index.previous_year(2014) == 2012
+    assert year_index.next_year(2014) == 2016
+    assert year_index.previous_year(2015) == 2014
+    assert year_index.previous_year(2012) is None
+    assert year_index.next_year(2016) is None
+
+
+def test_empty_release_year_index_has_no_years():
+    year_index = ReleaseYearIndex()
+    assert year_index.earliest_year() is None
+    assert year_index.latest_year() is None
+    assert year_index.previous_year(2016) is None
+
+
+def make_title_search_index():
+    title_index = TitleSearchIndex()
+    for movie_id, title in enumerate(["Guardians of the Galaxy", "Prometheus", "The Great Wall", "The Lost City of Z",
+                                      "Split", "The"], start=1):
+        title_index.add(movie_id, title)
+    return title_index
+
+
+def test_title_search_index_ranks_exact_then_prefix_then_word_then_inner_matches():
+    assert make_title_search_index().search("THE ") == [6, 3, 4, 1, 2]
+
+
+def test_title_search_index_matches_queries_shorter_than_a_trigram():
+    title_index = make_title_search_index()
+    assert title_index.search("z") == [4]
+    assert title_index.search("sp") == [5]
+
+
+def test_title_search_index_checks_candidates_for_the_whole_query():
+    # "A Wall, Ball Street" has every trigram of "wall street" without containing it
+    title_index = TitleSearchIndex()
+    title_index.add(1, "A Wall, Ball Street")
+    title_index.add(2, "Wall Street")
+    assert title_index.search("wall street") == [2]
+    assert title_index.search("the gal") == []
+
+
+def test_keyset_slice_reads_pages_forwards_and_backwards():
+    keys = [(movie_id,) for movie_id in range(1, 8)]
+
+    assert keyset_slice(keys, None, 3) == ([(1,), (2,), (3,)], False, True)
+    assert keyset_slice(keys, (3,), 3) == ([(4,), (5,), (6,)], True, True)
+    assert keyset_slice(keys, (6,), 3) == ([(7,)], True, False)
+    assert keyset_slice(keys, None, 3, reverse=True) == ([(5,), (6,), (7,)], True, False)
+    assert keyset_slice(keys, (4,), 3, reverse=True) == ([(1,), (2,), (3,)], False, True)
+    # A key that is no longer in the list still marks where the next page starts
+    assert keyset_slice([(1,), (3,)], (2,), 3) == ([(3,)], True, False)
+
+
+def test_paged_list_index_sorts_lists_once_until_invalidated():
+    built = list()
+    paged_lists = PagedListIndex()
+
+    def build():
+        built.append(True)
+        return [(3,), (1,), (2,)]
+
+    assert paged_lists.keys('Action', build) == [(1,), (2,), (3,)]
+    assert paged_lists.keys('Action', build) == [(1,), (2,), (3,)]
+    assert len(built) == 1
+    assert paged_lists.keys('Unknown', lambda: []) == []
+
+    paged_lists.invalidate()
+    paged_lists.keys('Action', build)
+    assert len(built) == 2
@@ -3,8 +3,8 @@ from typing import List
 
 import pytest
 
-from CS235Flix.adapters.repository import RepositoryException
-from CS235Flix.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList
+from CS235Flix.adapters.repository import MovieQuery, RepositoryException
+from CS235Flix.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList, make_review
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -234,6 +234,17 @@ def test_repository_returns_a_list_of_movies_by_title(in_memory_repo):
     assert "The Lost City of Z" in list_of_movies_titles
 
 
+def test_repository_ranks_movies_by_title(in_memory_repo):
+    assert [movie.id for movie in in_memory_repo.search_movie_by_title("THE")] == [6, 9, 1, 2]
+
+
+def test_repository_searches_the_titles_of_added_movies(in_memory_repo):
+    movie = Movie('Avengers: Endgame', 2019, 11)
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.search_movie_by_title('endgame') == [movie]
+
+
 def test_repository_can_retrieve_movies_for_a_indexes_list(in_memory_repo):
     movies = in_memory_repo.get_movies_by_index([1, 3, 7, 10])
 
@@ -421,10 +432,212 @@ def test_repository_can_suggest_desired_movies_to_a_user(in_memory_repo):
     assert in_memory_repo.get_movie_by_index(1) in suggestions
 
 
+
+def test_repository_suggestions_follow_the_users_new_reviews(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    split = in_memory_repo.get_movie_by_index(3)
+    assert in_memory_repo.get_suggestion_for_user('thorke') == [in_memory_repo.get_movie_by_index(1)]
+
+    in_memory_repo.add_review(make_review(review_text="Tense", user=user, movie=split, rating=10))
+
+    # Guardians of the Galaxy is rated 9 over three genres, Split 10 over two
+    assert in_memory_repo.get_suggestion_for_user('thorke') == [in_memory_repo.get_movie_by_index(1), split]
+    assert in_memory_repo.get_suggestion_for_user('fakeuser') == []
+
 def test_earliest_year(in_memory_repo):
 
     assert in_memory_repo.get_earliest_year() == 2012
 
 
 def test_latest_year(in_memory_repo):
-    assert in_memory_repo.get_latest_year() == 2016
\ No newline at end of file
+    assert in_memory_repo.get_latest_year() == 2016
+
+
+def test_repository_retrieves_a_user_regardless_of_username_case(in_memory_repo):
+    assert in_memory_repo.get_user('FMercury') is in_memory_repo.get_user('fmercury')
+
+
+def test_repository_retrieves_movies_by_actor_and_director_names_regardless_of_case(in_memory_repo):
+    movies_by_actor = in_memory_repo.get_movies_played_by_an_actor('  chris PRATT ')
+    assert [movie.title for movie in movies_by_actor] == ["Guardians of the Galaxy", "Passengers"]
+
+    movies_by_director = in_memory_repo.get_movies_directed_by_a_director('james gunn')
+    assert [movie.title for movie in movies_by_director] == ["Guardians of the Galaxy"]
+
+
+def test_repository_keeps_the_first_actor_added_under_a_name(in_memory_repo):
+    actor = in_memory_repo.get_actor("Chris Pratt")
+    in_memory_repo.add_actor(Actor("Chris Pratt"))
+    assert in_memory_repo.get_actor("Chris Pratt") is actor
+
+
+def test_repository_checks_movie_existence_by_title_and_release_year(in_memory_repo):
+    assert in_memory_repo.check_movie_existence(Movie("Guardians of the Galaxy", 2014)) is True
+    assert in_memory_repo.check_movie_existence(Movie("Guardians of the Galaxy", 2015)) is False
+
+
+def test_repository_keeps_movie_order_after_retrieving_top_revenue_and_latest_movies(in_memory_repo):
+    in_memory_repo.get_top_6_highest_revenue_movies()
+    in_memory_repo.get_latest_movie()
+
+    movie = in_memory_repo.get_movie_by_index(1)
+    assert in_memory_repo.get_release_year_of_previous_movie(movie) == 2012
+    assert in_memory_repo.get_release_year_of_next_movie(movie) == 2016
+    assert in_memory_repo.get_oldest_movie().title == "Prometheus"
+
+
+def test_repository_can_retrieve_the_top_k_movies_by_any_key(in_memory_repo):
+    longest_movies = in_memory_repo.top_k(key=lambda movie: movie.runtime_minutes, k=2)
+    assert [movie.runtime_minutes for movie in longest_movies] == [141, 128]
+
+    top_revenue = in_memory_repo.top_k(key=lambda movie: movie.revenue, k=6)
+    assert top_revenue == in_memory_repo.get_top_6_highest_revenue_movies()
+
+
+def test_repository_includes_a_newly_added_movie_in_the_top_revenue_movies(in_memory_repo):
+    movie = Movie("Avengers: Endgame", 2019, 1050)
+    movie.set_revenue(858.37)
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.get_top_6_highest_revenue_movies()[0] is movie
+    assert in_memory_repo.get_latest_movie() is movie
+
+
+def test_repository_returns_movies_of_a_year_ordered_by_title(in_memory_repo):
+    titles = [movie.title for movie in in_memory_repo.get_movies_by_release_year(2016)]
+    assert titles == sorted(titles)
+    assert len(titles) == 8
+
+
+def test_repository_updates_year_range_when_a_movie_is_added(in_memory_repo):
+    in_memory_repo.add_movie(Movie("Avengers: Endgame", 2019, 1050))
+
+    assert in_memory_repo.get_latest_year() == 2019
+    assert in_memory_repo.get_release_year_of_next_movie(in_memory_repo.get_movie_by_index(7)) == 2019
+
+
+def test_repository_can_retrieve_the_colleagues_of_an_actor(in_memory_repo):
+    chris_pratt = in_memory_repo.get_actor("Chris Pratt")
+
+    colleagues = in_memory_repo.get_actor_colleague(chris_pratt)
+    assert len(colleagues) == 6
+    assert Actor("Zoe Saldana") in colleagues and Actor("Jennifer Lawrence") in colleagues
+    assert in_memory_repo.get_number_of_colleagues(chris_pratt) == 6
+    assert in_memory_repo.check_if_actors_worked_together(chris_pratt, Actor("Vin Diesel")) is True
+    assert in_memory_repo.check_if_actors_worked_together(chris_pratt, Actor("Matt Damon")) is False
+    assert in_memory_repo.get_actor_colleague(Actor("Fake Actor")) is None
+
+
+def test_actor_colleagues_are_derived_from_played_movies(in_memory_repo):
+    chris_pratt = in_memory_repo.get_actor("Chris Pratt")
+
+    assert chris_pratt.check_if_this_actor_worked_with(Actor("Bradley Cooper")) is True
+    assert chris_pratt.check_if_this_actor_worked_with(chris_pratt) is False
+    assert chris_pratt.get_number_of_colleagues() == 6
+
+
+def test_repository_exposes_a_columnar_catalogue(in_memory_repo):
+    catalogue = in_memory_repo.get_catalogue()
+    assert len(catalogue) == in_memory_repo.get_total_number_of_movies_in_repo()
+    assert in_memory_repo.get_movies_by_index(catalogue.top_k('revenue', 6)) == \
+        in_memory_repo.get_top_6_highest_revenue_movies()
+    assert catalogue.value(1, 'revenue') == 333.13
+    # Read from movies.csv: Mindhorn has no revenue, and every movie has a rating, votes and a metascore
+    assert catalogue.value(8, 'revenue') is None
+    assert catalogue.column('revenue').count() == 9
+    assert catalogue.value(1, 'metascore') == 76
+    assert catalogue.column('votes').count() == 10
+
+    in_memory_repo.add_movie(Movie("Avengers: Endgame", 2019, 1050))
+    assert catalogue.year_histogram()[2019] == 1
+
+
+def test_repository_answers_revenue_year_runtime_and_genre_queries_from_the_catalogue(in_memory_repo):
+    assert [movie.id for movie in in_memory_repo.get_top_6_highest_revenue_movies()] == [1, 5, 4, 7, 3, 2]
+    assert [movie.id for movie in in_memory_repo.get_movies_by_runtime(100, 110)] == [4, 6]
+    assert [movie.id for movie in in_memory_repo.get_movies_by_runtime(min_minutes=125)] == [7, 9]
+    assert in_memory_repo.count(MovieQuery.genre('Comedy')) == 3
+    assert in_memory_repo.count(MovieQuery.release_year(2016)) == 8
+    assert in_memory_repo.count(MovieQuery.release_year(2013)) == 0
+
+    movie = Movie('Moana', 2017, 11)
+    movie.set_runtime_minutes(107)
+    movie.add_genre(Genre('Comedy'))
+    in_memory_repo.add_movie(movie)
+    assert in_memory_repo.get_latest_year() == 2017
+    assert in_memory_repo.get_release_year_of_next_movie(in_memory_repo.get_movie_by_index(3)) == 2017
+    assert [movie.id for movie in in_memory_repo.get_movies_by_runtime(100, 110)] == [4, 6, 11]
+    assert in_memory_repo.get_movie_indexes_for_genre('Comedy') == [4, 7, 8, 11]
+
+
+def test_repository_pages_through_the_movies_of_a_genre(in_memory_repo):
+    query = MovieQuery.genre('Action')
+    first_page = in_memory_repo.page(query, limit=3)
+    assert [movie.id for movie in first_page.movies] == [1, 5, 6]
+    assert (first_page.has_previous, first_page.has_next) == (False, True)
+
+    second_page = in_memory_repo.page(query, first_page.last_key, 3)
+    assert [movie.id for movie in second_page.movies] == [9]
+    assert (second_page.has_previous, second_page.has_next) == (True, False)
+
+    assert in_memory_repo.page(query, second_page.first_key, 3, reverse=True).keys == first_page.keys
+    assert [movie.id for movie in in_memory_repo.page(query, limit=3, reverse=True).movies] == [5, 6, 9]
+    assert in_memory_repo.count(query) == 4
+
+
+def test_repository_pages_through_the_movies_of_a_year_by_title(in_memory_repo):
+    query = MovieQuery.release_year(2016)
+    titles = list()
+    page = in_memory_repo.page(query, limit=3)
+    titles.extend(movie.title for movie in page.movies)
+    while page.has_next:
+        page = in_memory_repo.page(query, page.last_key, 3)
+        titles.extend(movie.title for movie in page.movies)
+
+    assert titles == [movie.title for movie in in_memory_repo.get_movies_by_release_year(2016)]
+    assert in_memory_repo.count(query) == 8
+
+
+def test_repository_pages_through_searches_by_name_and_title(in_memory_repo):
+    assert [movie.id for movie in in_memory_repo.page(MovieQuery.actor('chris pratt')).movies] == [1, 10]
+    assert [movie.id for movie in in_memory_repo.page(MovieQuery.director('James Gunn')).movies] == [1]
+    assert [movie.id for movie in
+            in_memory_repo.page(MovieQuery.actor_and_director('Ryan Gosling', 'Damien Chazelle')).movies] == [7]
+
+    title_query = MovieQuery.title('the')
+    first_page = in_memory_repo.page(title_query, limit=2)
+    second_page = in_memory_repo.page(title_query, first_page.last_key, 2)
+    assert [movie.id for movie in first_page.movies + second_page.movies] == \
+        [movie.id for movie in in_memory_repo.search_movie_by_title('the')]
+
+    assert in_memory_repo.page(MovieQuery.actor('Fake Actor')).movies == []
+    assert in_memory_repo.count(MovieQuery.director('Fake Director')) == 0
+
+
+def test_repository_pages_include_movies_added_since_the_last_page(in_memory_repo):
+    query = MovieQuery.genre('Action')
+    assert in_memory_repo.count(query) == 4
+
+    action = [genre for genre in in_memory_repo.get_genres() if genre.genre_name == 'Action'][0]
+    movie = Movie("Avengers: Endgame", 2019, 1050)
+    movie.add_genre(action)
+    action.add_Movie(movie)
+    in_memory_repo.add_movie(movie)
+
+    assert in_memory_repo.count(query) == 5
+    assert [movie.id for movie in in_memory_repo.page(query, (9,), 10).movies] == [1050]
+
+
+def test_repository_caches_counts_until_the_catalogue_changes(in_memory_repo, monkeypatch):
+    query = MovieQuery.title('the')
+    assert in_memory_repo.count(query) == 4
+
+    listed = list()
+    keys = in_memory_repo._keys
+    monkeypatch.setattr(in_memory_repo, '_keys', lambda query: listed.append(query) or keys(query))
+    assert in_memory_repo.count(query) == 4
+    assert listed == []
+
+    in_memory_repo.add_movie(Movie('The Avengers', 2012, 11))
+    assert in_memory_repo.count(query) == 5
+    assert listed == [query]
@@ -0,0 +1,47 @@
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from CS235Flix.adapters.memory_repository import MemoryRepository, load_users
+from CS235Flix.adapters.password_hashing import hash_password, hash_passwords, is_password_hash
+
+
+def test_recognises_werkzeug_password_hashes():
+    assert is_password_hash(generate_password_hash("cLQ^C#oFXloS")) is True
+    assert is_password_hash("cLQ^C#oFXloS") is False
+    assert is_password_hash("pbkdf2:sha256$$") is False
+    assert is_password_hash("mvNNbc1eLA$i") is False
+
+
+def test_pre_hashed_passwords_are_kept_only_when_asked_for():
+    password_hash = generate_password_hash("cLQ^C#oFXloS")
+    assert hash_password(password_hash, pre_hashed=True) == password_hash
+    assert check_password_hash(hash_password("cLQ^C#oFXloS", pre_hashed=True), "cLQ^C#oFXloS")
+
+    # Without pre_hashed, a plain password shaped like a hash is hashed like any other
+    assert check_password_hash(hash_password(password_hash), password_hash)
+
+
+def test_hash_passwords_in_a_process_pool_keeps_order_and_reports_progress():
+    passwords = ["password{}".format(index) for index in range(70)]
+    passwords[3] = generate_password_hash("already hashed")
+    progress = list()
+
+    hashed_passwords = hash_passwords(passwords, workers=2, progress=lambda done, total: progress.append(done),
+                                      pre_hashed=True)
+    assert len(hashed_passwords) == 70
+    assert hashed_passwords[3] == passwords[3]
+    assert check_password_hash(hashed_passwords[69], "password69")
+    assert progress == [64, 70]
+
+
+def test_load_users_accepts_pre_hashed_passwords(tmp_path):
+    password_hash = generate_password_hash("mvNNbc1eLA$i")
+    (tmp_path / "users.csv").write_text("id,username,password\n1,thorke,cLQ^C#oFXloS\n2,fmercury,{}\n"
+                                        .format(password_hash))
+    repo = MemoryRepository()
+
+    users = load_users(str(tmp_path), repo, pre_hashed=True)
+    assert check_password_hash(users[1].password, "cLQ^C#oFXloS")
+    assert repo.get_user("fmercury").password == password_hash
+
+    users = load_users(str(tmp_path), MemoryRepository())
+    assert check_password_hash(users[2].password, password_hash)
@@ -0,0 +1,56 @@
+from CS235Flix.adapters.recommendations import RecommendationEngine
+
+
+GENRE_MOVIES = [
+    ('Action', 1, 300.0), ('Adventure', 1, 300.0),
+    ('Action', 2, 200.0),
+    ('Action', 3, 100.0), ('Comedy', 3, 100.0),
+    ('Comedy', 4, 500.0),
+]
+
+
+class CallCounter:
+    def __init__(self, function):
+        self.calls = 0
+        self._function = function
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self._function(*args, **kwargs)
+
+
+def make_engine(affinities):
+    genre_movies = CallCounter(lambda: GENRE_MOVIES)
+    user_affinity = CallCounter(lambda username: affinities.get(username, {}))
+    return RecommendationEngine(genre_movies, user_affinity, top_k=2), genre_movies, user_affinity
+
+
+def test_engine_keeps_the_top_k_movies_of_every_genre_by_revenue():
+    engine, _, _ = make_engine({})
+    assert engine.top_movies('Action') == [1, 2]
+    assert engine.top_movies('Comedy') == [4, 3]
+    assert engine.top_movies('Horror') == []
+
+
+def test_engine_picks_per_genre_the_movie_whose_genres_the_user_rated_highest():
+    engine, _, _ = make_engine({'ann': {'Comedy': 9, 'Action': 2}})
+
+    # Comedy: movie 3 scores 9 + 2 against 9 for the higher revenue movie 4. Action: movies 1 and 2 score 2 each,
+    # and movie 1 has the higher revenue
+    assert engine.suggestions('ann') == [3, 1]
+    assert engine.suggestions('bob') == []
+
+
+def test_engine_caches_suggestions_until_the_user_reviews_again():
+    engine, genre_movies, user_affinity = make_engine({'ann': {'Comedy': 9, 'Action': 2}})
+    assert engine.suggestions('ann') is engine.suggestions('ann')
+
+    engine.record_review('ann', ['Adventure'], 10)
+    assert engine.suggestions('ann') == [1, 3]
+    # The affinity was updated in place rather than read again, and the top lists were kept
+    assert user_affinity.calls == 1
+    assert genre_movies.calls == 1
+
+    engine.invalidate()
+    assert engine.suggestions('ann') == [1, 3]
+    assert genre_movies.calls == 2
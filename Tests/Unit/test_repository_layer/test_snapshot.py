@@ -0,0 +1,103 @@
+import os
+import shutil
+
+import pytest
+
+from CS235Flix.adapters import memory_repository, snapshot
+from CS235Flix.adapters.snapshot import SnapshotError, load_or_populate, load_snapshot, save_snapshot, \
+    source_checksum
+from CS235Flix.domainmodel.model import Actor
+
+TEST_DATA_PATH = os.path.join("Tests", "data", "memory")
+
+
+def test_snapshot_restores_the_linked_repository(in_memory_repo, tmp_path):
+    snapshot_path = str(tmp_path / "repository.snapshot")
+    checksum = source_checksum(TEST_DATA_PATH)
+    save_snapshot(in_memory_repo, snapshot_path, checksum)
+
+    restored_repo = load_snapshot(snapshot_path, checksum)
+    assert restored_repo.get_total_number_of_movies_in_repo() == in_memory_repo.get_total_number_of_movies_in_repo()
+    assert restored_repo.get_total_number_of_actors() == in_memory_repo.get_total_number_of_actors()
+    assert restored_repo.get_total_number_of_reviews() == in_memory_repo.get_total_number_of_reviews()
+    assert restored_repo.get_top_6_highest_revenue_movies() == in_memory_repo.get_top_6_highest_revenue_movies()
+
+    movie = restored_repo.get_movie_by_index(1)
+    assert movie.director.director_full_name == "James Gunn"
+    assert movie.description == in_memory_repo.get_movie_by_index(1).description
+    assert Actor("Vin Diesel") in list(movie.actors)
+    assert restored_repo.get_user("thorke").password == in_memory_repo.get_user("thorke").password
+    assert restored_repo.get_suggestion_for_user("thorke") == [movie]
+    assert restored_repo.get_catalogue().top_k('revenue', 1) == [1]
+
+
+def test_snapshot_is_rejected_when_the_data_files_change(in_memory_repo, tmp_path):
+    snapshot_path = str(tmp_path / "repository.snapshot")
+    save_snapshot(in_memory_repo, snapshot_path, source_checksum(TEST_DATA_PATH))
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot_path, "a different checksum")
+
+
+def test_snapshot_is_rejected_when_the_code_changes(in_memory_repo, tmp_path, monkeypatch):
+    snapshot_path = str(tmp_path / "repository.snapshot")
+    checksum = source_checksum(TEST_DATA_PATH)
+    save_snapshot(in_memory_repo, snapshot_path, checksum)
+
+    monkeypatch.setattr(snapshot, 'code_fingerprint', lambda: "a different fingerprint")
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot_path, checksum)
+
+
+def test_snapshot_is_rejected_when_its_payload_is_damaged(in_memory_repo, tmp_path):
+    snapshot_path = tmp_path / "repository.snapshot"
+    checksum = source_checksum(TEST_DATA_PATH)
+    save_snapshot(in_memory_repo, str(snapshot_path), checksum)
+    contents = bytearray(snapshot_path.read_bytes())
+    contents[-10] ^= 0xff
+    snapshot_path.write_bytes(bytes(contents))
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(snapshot_path), checksum)
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    snapshot_path = tmp_path / "repository.snapshot"
+    snapshot_path.write_bytes(b"not a snapshot\n")
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(snapshot_path), source_checksum(TEST_DATA_PATH))
+
+
+def test_load_or_populate_writes_and_then_reuses_the_snapshot(tmp_path):
+    data_path = str(tmp_path / "data")
+    shutil.copytree(TEST_DATA_PATH, data_path)
+    snapshot_path = str(tmp_path / "repository.snapshot")
+    populate_calls = list()
+
+    def populate(path, repo):
+        populate_calls.append(path)
+        memory_repository.populate(path, repo)
+
+    load_or_populate(data_path, snapshot_path, populate)
+    repo = load_or_populate(data_path, snapshot_path, populate)
+    assert len(populate_calls) == 1
+    assert repo.get_total_number_of_movies_in_repo() == 10
+
+    # Editing a source file invalidates the snapshot
+    with open(os.path.join(data_path, "users.csv"), mode="a") as users_file:
+        users_file.write("\n")
+    load_or_populate(data_path, snapshot_path, populate)
+    assert len(populate_calls) == 2
+
+
+def test_load_or_populate_rebuilds_a_snapshot_that_fails_to_load(tmp_path, monkeypatch):
+    snapshot_path = str(tmp_path / "repository.snapshot")
+    load_or_populate(TEST_DATA_PATH, snapshot_path, memory_repository.populate)
+
+    def load_snapshot(path, checksum):
+        raise AttributeError("a class of the snapshot was renamed")
+
+    monkeypatch.setattr(snapshot, 'load_snapshot', load_snapshot)
+    repo = load_or_populate(TEST_DATA_PATH, snapshot_path, memory_repository.populate)
+    assert repo.get_total_number_of_movies_in_repo() == 10
@@ -0,0 +1,53 @@
+from CS235Flix.authentication.credential_cache import CredentialCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_remembered_credentials_are_verified():
+    cache = CredentialCache()
+    cache.remember('thorke', 'cLQ^C#oFXloS', 'hash-1')
+
+    assert cache.is_verified('thorke', 'cLQ^C#oFXloS', 'hash-1') is True
+    assert cache.is_verified('thorke', 'wrong password', 'hash-1') is False
+    # A changed password hash never matches an entry made for the old one
+    assert cache.is_verified('thorke', 'cLQ^C#oFXloS', 'hash-2') is False
+
+
+def test_credentials_expire():
+    clock = FakeClock()
+    cache = CredentialCache(ttl_seconds=60, clock=clock)
+    cache.remember('thorke', 'cLQ^C#oFXloS', 'hash-1')
+
+    clock.now = 59
+    assert cache.is_verified('thorke', 'cLQ^C#oFXloS', 'hash-1') is True
+    clock.now = 60
+    assert cache.is_verified('thorke', 'cLQ^C#oFXloS', 'hash-1') is False
+    assert len(cache) == 0
+
+
+def test_least_recently_used_credentials_are_evicted():
+    cache = CredentialCache(max_entries=2)
+    cache.remember('thorke', 'password1', 'hash-1')
+    cache.remember('fmercury', 'password2', 'hash-2')
+    assert cache.is_verified('thorke', 'password1', 'hash-1') is True
+
+    cache.remember('mjackson', 'password3', 'hash-3')
+    assert len(cache) == 2
+    assert cache.is_verified('fmercury', 'password2', 'hash-2') is False
+    assert cache.is_verified('thorke', 'password1', 'hash-1') is True
+
+
+def test_invalidate_forgets_a_user():
+    cache = CredentialCache()
+    cache.remember('thorke', 'password1', 'hash-1')
+    cache.remember('fmercury', 'password2', 'hash-2')
+
+    cache.invalidate('thorke')
+    assert cache.is_verified('thorke', 'password1', 'hash-1') is False
+    assert cache.is_verified('fmercury', 'password2', 'hash-2') is True
@@ -0,0 +1,54 @@
+import pytest
+
+from CS235Flix.utilities.response_cache import LocalRedis, LruCacheBackend, RedisCacheBackend, create_backend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_backend_drops_the_least_recently_used_value():
+    backend = LruCacheBackend(max_entries=2)
+    backend.set('a', 'page a', ttl_seconds=60)
+    backend.set('b', 'page b', ttl_seconds=60)
+    assert backend.get('a') == 'page a'
+
+    backend.set('c', 'page c', ttl_seconds=60)
+    assert backend.get('b') is None
+    assert backend.get('a') == 'page a'
+    assert backend.get('c') == 'page c'
+
+
+def test_lru_backend_values_expire():
+    clock = FakeClock()
+    backend = LruCacheBackend(clock=clock)
+    backend.set('a', 'page a', ttl_seconds=60)
+
+    clock.now = 59
+    assert backend.get('a') == 'page a'
+    clock.now = 60
+    assert backend.get('a') is None
+
+
+def test_redis_backend_round_trips_through_a_redis_client():
+    clock = FakeClock()
+    client = LocalRedis(clock=clock)
+    backend = RedisCacheBackend(client)
+    backend.set('a', 'página a', ttl_seconds=60)
+
+    assert backend.get('a') == 'página a'
+    assert client.get('cs235flix:page:a') == 'página a'.encode('utf-8')
+    clock.now = 60
+    assert backend.get('a') is None
+
+
+def test_backends_are_created_by_name():
+    assert isinstance(create_backend('lru'), LruCacheBackend)
+    assert isinstance(create_backend('redis'), RedisCacheBackend)
+    assert create_backend('none') is None
+    with pytest.raises(ValueError):
+        create_backend('memcached')
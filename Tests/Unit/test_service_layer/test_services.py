@@ -1,6 +1,7 @@
 from datetime import date
 import pytest
 
+from CS235Flix.adapters.repository import MovieQuery
 from CS235Flix.authentication.services import AuthenticationException
 from CS235Flix.movies import services as movies_services
 from CS235Flix.authentication import services as auth_services
@@ -49,6 +50,32 @@ def test_authentication_with_invalid_credentials(in_memory_repo):
         auth_services.authenticate_user(new_username, '0987654321', in_memory_repo)
 
 
+def test_authentication_returns_the_user(in_memory_repo):
+    auth_services.add_user('pmccartney', 'abcd1A23', in_memory_repo)
+
+    user_as_dict = auth_services.authenticate_user('PMcCartney', 'abcd1A23', in_memory_repo)
+    assert user_as_dict['username'] == 'pmccartney'
+
+
+def test_authentication_with_unknown_user(in_memory_repo):
+    with pytest.raises(auth_services.UnknownUserException):
+        auth_services.authenticate_user('nobody', 'abcd1A23', in_memory_repo)
+
+
+def test_repeated_authentication_skips_password_hash_check(in_memory_repo, monkeypatch):
+    auth_services.add_user('pmccartney', 'abcd1A23', in_memory_repo)
+    auth_services.authenticate_user('pmccartney', 'abcd1A23', in_memory_repo)
+
+    def fail_check_password_hash(password_hash, password):
+        raise AssertionError("check_password_hash should not be called")
+    monkeypatch.setattr(auth_services, 'check_password_hash', fail_check_password_hash)
+    assert auth_services.authenticate_user('pmccartney', 'abcd1A23', in_memory_repo)['username'] == 'pmccartney'
+
+    # A wrong password is never answered from the cache
+    with pytest.raises(AssertionError):
+        auth_services.authenticate_user('pmccartney', '0987654321', in_memory_repo)
+
+
 def test_can_add_review(in_memory_repo):
     movie_id = 2
     review_text = 'What a great movie!'
@@ -115,6 +142,34 @@ def test_can_get_a_movie(in_memory_repo):
     assert 'Sci-Fi' in genres
 
 
+def test_detail_profile_lists_only_genre_names(in_memory_repo):
+    movie_as_dict = movies_services.get_movie(movie_id=1, repo=in_memory_repo)
+
+    for genre in movie_as_dict['genres']:
+        assert genre.keys() == {'genre_name'}
+
+
+def test_admin_profile_lists_classified_movies(in_memory_repo):
+    movie_as_dict = movies_services.get_movie(movie_id=1, repo=in_memory_repo, profile=movies_services.ADMIN)
+
+    genres = {genre['genre_name']: genre for genre in movie_as_dict['genres']}
+    assert 1 in genres['Action']['classified_movies']
+    assert genres['Action']['number_of_classified_movies'] == len(genres['Action']['classified_movies'])
+
+
+def test_card_profile_carries_only_what_a_movie_tile_shows(in_memory_repo):
+    movie_as_dict = movies_services.get_movie(movie_id=1, repo=in_memory_repo, profile=movies_services.CARD)
+
+    assert movie_as_dict == {'id': 1, 'title': 'Guardians of the Galaxy', 'release_year': 2014, 'revenue': 333.13}
+
+
+def test_unknown_projection_profile_is_rejected(in_memory_repo):
+    movie = in_memory_repo.get_movie_by_index(1)
+
+    with pytest.raises(ValueError):
+        movies_services.movie_to_dict(movie, 'everything')
+
+
 def test_cannot_get_movie_with_non_existent_id(in_memory_repo):
     movie_id = 33
 
@@ -317,3 +372,24 @@ def test_getting_latest_year(in_memory_repo):
 
 
 
+
+
+def test_get_page_of_movies_follows_the_encoded_keys(in_memory_repo):
+    query = MovieQuery.release_year(2016)
+    first_page = movies_services.get_page_of_movies(query, in_memory_repo, movies_per_page=5)
+    second_page = movies_services.get_page_of_movies(query, in_memory_repo, first_page['last_key'], movies_per_page=5)
+    previous_page = movies_services.get_page_of_movies(query, in_memory_repo, second_page['first_key'], reverse=True,
+                                                       movies_per_page=5)
+
+    assert len(first_page['movies']) == 5 and len(second_page['movies']) == 3
+    assert (second_page['has_previous'], second_page['has_next']) == (True, False)
+    assert previous_page['movies'] == first_page['movies']
+    assert movies_services.count_movies(query, in_memory_repo) == 8
+
+
+def test_get_page_of_movies_starts_over_for_keys_it_cannot_read(in_memory_repo):
+    query = MovieQuery.release_year(2016)
+    first_page = movies_services.get_page_of_movies(query, in_memory_repo)
+
+    for after in ['not a key', movies_services.encode_page_key((7,)), movies_services.encode_page_key(('Sing', '4'))]:
+        assert movies_services.get_page_of_movies(query, in_memory_repo, after)['movies'] == first_page['movies']
@@ -0,0 +1,97 @@
+import pytest
+
+import CS235Flix.adapters.repository as repo
+import CS235Flix.utilities.services as services
+from CS235Flix import create_app
+from CS235Flix.domainmodel.model import Genre
+from CS235Flix.utilities.sidebar import SidebarProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CallCounter:
+    def __init__(self, function):
+        self.calls = 0
+        self._function = function
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self._function(*args, **kwargs)
+
+
+@pytest.fixture
+def app():
+    return create_app({
+        'TESTING': True,
+        'REPOSITORY': 'memory',
+        'TEST_DATA_PATH': 'Tests/data/database',
+        'WTF_CSRF_ENABLED': False
+    })
+
+
+def test_genre_urls_are_built_once_per_catalogue_version(app, monkeypatch):
+    get_genre_names = CallCounter(services.get_genre_names)
+    monkeypatch.setattr(services, 'get_genre_names', get_genre_names)
+    sidebar = SidebarProvider(app)
+
+    with app.test_request_context():
+        genre_urls = sidebar.genre_urls()
+        assert genre_urls['Action'] == '/movies_by_genre?genre=Action'
+        assert sidebar.genre_urls() is genre_urls
+        assert get_genre_names.calls == 1
+
+        repo.repo_instance.add_genre(Genre('Documentary'))
+        assert 'Documentary' in sidebar.genre_urls()
+        assert get_genre_names.calls == 2
+
+
+def test_selected_movies_cycle_through_the_pool(app, monkeypatch):
+    get_random_movies = CallCounter(services.get_random_movies)
+    monkeypatch.setattr(services, 'get_random_movies', get_random_movies)
+    sidebar = SidebarProvider(app, pool_size=6)
+
+    with app.test_request_context():
+        first_picks = sidebar.selected_movies(4)
+        second_picks = sidebar.selected_movies(4)
+
+    assert get_random_movies.calls == 1
+    first_titles = [movie['title'] for movie in first_picks]
+    second_titles = [movie['title'] for movie in second_picks]
+    assert len(set(first_titles)) == 4
+    # The ring of 6 movies wraps around after the first two picks of the second call
+    assert len(set(first_titles + second_titles)) == 6
+    assert second_titles[2:] == first_titles[:2]
+    assert first_picks[0]['id'] == '/movies_by_release_year?year={}'.format(first_picks[0]['release_year'])
+
+
+def test_selected_movies_never_exceed_the_catalogue(app):
+    with app.test_request_context():
+        assert len(SidebarProvider(app, pool_size=100).selected_movies(20)) == 10
+
+
+def test_pool_is_replaced_in_the_background_once_it_is_old(app, monkeypatch):
+    get_random_movies = CallCounter(services.get_random_movies)
+    monkeypatch.setattr(services, 'get_random_movies', get_random_movies)
+    clock = FakeClock()
+    sidebar = SidebarProvider(app, pool_size=5, rotate_seconds=60, clock=clock)
+
+    with app.test_request_context():
+        sidebar.selected_movies(2)
+        clock.now = 59
+        sidebar.selected_movies(2)
+        assert get_random_movies.calls == 1
+
+        clock.now = 60
+        # Served from the old pool while the new one is sampled
+        assert len(sidebar.selected_movies(2)) == 2
+        sidebar._refresh_thread.join()
+        assert get_random_movies.calls == 2
+
+        sidebar.selected_movies(2)
+        assert get_random_movies.calls == 2
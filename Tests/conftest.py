@@ -94,6 +94,8 @@ def client():
         'REPOSITORY': 'memory',  # Set to 'memory' or 'database' depending on desired repository.
         'TEST_DATA_PATH': TEST_DATA_PATH_DATABASE,
         # Path for loading test data into the repository.  use TEST_DATA_PATH_MEMORY if using memory repository
+        'COVER_ART_PROVIDER': 'local',  # Serve cover art from a file rather than looking it up on IMDb.
+        'COVER_ART_FILE': TEST_DATA_PATH_DATABASE + '/covers.csv',
         'WTF_CSRF_ENABLED': False  # test_client will not send a CSRF token, so disable validation.
     })
 
@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import create_engine
+
+from CS235Flix.adapters.bulk_loader import BulkLoader, PROGRESS_TABLE, load_in_progress
+from CS235Flix.adapters.orm import metadata
+
+TEST_DATA_PATH = 'Tests/data/database'
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptedLoader(BulkLoader):
+    """ Fails while writing the given batch of movies, as if the process had been stopped """
+
+    def __init__(self, engine, batch_size, failing_batch):
+        super().__init__(engine, batch_size)
+        self._batches_left = failing_batch
+
+    def _write_movies(self, cursor, batch):
+        self._batches_left -= 1
+        if self._batches_left == 0:
+            raise Interrupted()
+        super()._write_movies(cursor, batch)
+
+
+def new_engine(path):
+    engine = create_engine('sqlite:///{}'.format(path))
+    metadata.create_all(engine)
+    return engine
+
+
+def table_contents(engine):
+    # Passwords are salted when hashed, so two loads never store the same hash
+    return {table.name: engine.execute('SELECT {} FROM {} ORDER BY id'.format(
+                ', '.join(column.name for column in table.columns if column.name != 'password'), table.name)).fetchall()
+            for table in metadata.sorted_tables}
+
+
+@pytest.fixture
+def loaded_engine(tmp_path):
+    engine = new_engine(tmp_path / 'reference.db')
+    BulkLoader(engine).load(TEST_DATA_PATH)
+    return engine
+
+
+def test_batch_size_does_not_change_the_rows_loaded(tmp_path, loaded_engine):
+    engine = new_engine(tmp_path / 'batched.db')
+    BulkLoader(engine, batch_size=2).load(TEST_DATA_PATH)
+
+    assert table_contents(engine) == table_contents(loaded_engine)
+
+
+def test_load_reports_the_rows_of_every_table(tmp_path):
+    report = BulkLoader(new_engine(tmp_path / 'report.db'), batch_size=4).load(TEST_DATA_PATH)
+
+    assert report['movies']['rows'] == 10
+    assert report['users']['rows'] == 3
+    assert report['reviews']['rows'] == 3
+    assert report['genres']['rows'] == 14
+    assert report['indexes']['rows'] == sum(len(table.indexes) for table in metadata.sorted_tables)
+    assert all(load['seconds'] >= 0 for load in report.values())
+
+
+def test_load_reports_the_progress_of_hashing_passwords(tmp_path):
+    progress = list()
+    BulkLoader(new_engine(tmp_path / 'progress.db'), batch_size=2,
+               progress=lambda done, total: progress.append((done, total))).load(TEST_DATA_PATH)
+
+    assert progress == [(2, 3), (3, 3)]
+
+
+def test_load_restores_the_journal_settings_and_builds_the_indexes(tmp_path):
+    engine = new_engine(tmp_path / 'settings.db')
+    BulkLoader(engine).load(TEST_DATA_PATH)
+
+    connection = engine.raw_connection()
+    try:
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+        index_names = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        connection.close()
+    assert {index.name for table in metadata.sorted_tables for index in table.indexes} <= index_names
+    assert not load_in_progress(engine)
+
+
+def test_interrupted_load_resumes_after_the_last_committed_batch(tmp_path, loaded_engine):
+    engine = new_engine(tmp_path / 'interrupted.db')
+    with pytest.raises(Interrupted):
+        InterruptedLoader(engine, batch_size=3, failing_batch=3).load(TEST_DATA_PATH)
+
+    assert load_in_progress(engine)
+    assert engine.execute('SELECT rows_done FROM {}'.format(PROGRESS_TABLE)).fetchall() == [(6,)]
+    assert engine.execute('SELECT COUNT(*) FROM movies').scalar() == 6
+
+    report = BulkLoader(engine, batch_size=3).load(TEST_DATA_PATH)
+
+    assert report['movies']['rows'] == 4
+    assert table_contents(engine) == table_contents(loaded_engine)
+    assert not load_in_progress(engine)
+
+
+def test_load_starts_over_when_the_tables_no_longer_match_the_progress(tmp_path, loaded_engine):
+    engine = new_engine(tmp_path / 'emptied.db')
+    with pytest.raises(Interrupted):
+        InterruptedLoader(engine, batch_size=3, failing_batch=3).load(TEST_DATA_PATH)
+    engine.execute('DELETE FROM movie_actors')
+    engine.execute('DELETE FROM movie_genres')
+    engine.execute('DELETE FROM movies')
+
+    BulkLoader(engine, batch_size=3).load(TEST_DATA_PATH)
+
+    assert table_contents(engine) == table_contents(loaded_engine)
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import clear_mappers
+
+from CS235Flix import create_app
+from CS235Flix.adapters.connection_pool import PoolMetrics, TimedQueuePool, TimedSingletonThreadPool, \
+    engine_pool_arguments
+
+
+def pooled_engine(tmp_path, **pool_settings):
+    database_uri = 'sqlite:///{}'.format(tmp_path / 'pool.db')
+    return create_engine(database_uri, connect_args={"check_same_thread": False},
+                         **engine_pool_arguments(database_uri, 'queue', **pool_settings))
+
+
+def test_pool_class_follows_the_database_uri():
+    assert engine_pool_arguments('sqlite://')['poolclass'] is TimedSingletonThreadPool
+    assert engine_pool_arguments('sqlite:///:memory:')['poolclass'] is TimedSingletonThreadPool
+    assert engine_pool_arguments('sqlite:///cs235flix.db', pool_size=3, max_overflow=2) == {
+        'poolclass': TimedQueuePool, 'pool_size': 3, 'max_overflow': 2, 'pool_timeout': 30.0}
+
+
+def test_unknown_pool_class_is_rejected():
+    with pytest.raises(ValueError):
+        engine_pool_arguments('sqlite:///cs235flix.db', 'everything')
+
+
+def test_connections_are_reused_across_checkouts(tmp_path):
+    engine = pooled_engine(tmp_path)
+    metrics = PoolMetrics(engine)
+    for _ in range(3):
+        engine.execute('SELECT 1')
+
+    report = metrics.report()
+    assert report['connections_opened'] == 1
+    assert report['checkouts'] == 3
+    assert report['checked_out'] == 0
+    assert report['overflow_checkouts'] == 0
+
+
+def test_overflow_checkouts_are_counted(tmp_path):
+    engine = pooled_engine(tmp_path, pool_size=1, max_overflow=1)
+    metrics = PoolMetrics(engine)
+    first, second = engine.connect(), engine.connect()
+
+    report = metrics.report()
+    assert report['checked_out'] == 2
+    assert report['overflow_checkouts'] == 1
+    assert report['peak_overflow'] == 1
+    first.close()
+    second.close()
+
+
+def test_checkout_wait_is_measured(tmp_path):
+    engine = pooled_engine(tmp_path, pool_size=1, max_overflow=0)
+    metrics = PoolMetrics(engine)
+    held = engine.connect()
+
+    def release_later():
+        time.sleep(0.2)
+        held.close()
+
+    releaser = threading.Thread(target=release_later)
+    releaser.start()
+    engine.connect().close()
+    releaser.join()
+
+    assert metrics.report()['max_wait_seconds'] >= 0.1
+
+
+@pytest.fixture
+def database_app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'REPOSITORY': 'database',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///{}'.format(tmp_path / 'cs235flix-test.db'),
+        'SQLALCHEMY_ECHO': False,
+        'TEST_DATA_PATH': 'Tests/data/database',
+        'WTF_CSRF_ENABLED': False
+    })
+    yield app
+    clear_mappers()
+
+
+def test_requests_return_their_connection_to_the_pool(database_app):
+    client = database_app.test_client()
+    metrics = database_app.extensions['pool_metrics']
+    opened = metrics.report()['connections_opened']
+
+    for year in (2014, 2016, 2014):
+        assert client.get('/movies_by_release_year?year={}'.format(year)).status_code == 200
+
+    report = metrics.report()
+    assert report['checked_out'] == 0
+    assert report['connections_opened'] == opened
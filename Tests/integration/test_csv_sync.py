@@ -0,0 +1,199 @@
+import csv
+import shutil
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import clear_mappers
+
+from CS235Flix import create_app
+from CS235Flix.adapters import csv_sync
+from CS235Flix.adapters.bulk_loader import BulkLoader
+from CS235Flix.adapters.csv_sync import CsvSync
+from CS235Flix.adapters.orm import metadata
+from CS235Flix.adapters.title_search import install_title_search, title_search_statement
+
+TEST_DATA_PATH = 'Tests/data/database'
+
+
+def new_engine(path):
+    engine = create_engine('sqlite:///{}'.format(path))
+    metadata.create_all(engine)
+    return engine
+
+
+def table_contents(engine):
+    # Passwords are salted when hashed, and association rows are renumbered when a movie's links are rewritten
+    contents = dict()
+    for table in metadata.sorted_tables:
+        columns = [column.name for column in table.columns if column.name != 'password']
+        if table.name.startswith('movie_'):
+            columns.remove('id')
+        contents[table.name] = sorted(engine.execute('SELECT {} FROM {}'.format(', '.join(columns), table.name)))
+    return contents
+
+
+def edit_csv(path, edit):
+    with open(path, encoding='utf-8-sig') as infile:
+        rows = list(csv.reader(infile))
+    rows = [rows[0]] + edit(rows[1:])
+    with open(path, 'w', newline='', encoding='utf-8') as outfile:
+        csv.writer(outfile).writerows(rows)
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(TEST_DATA_PATH, str(path))
+    return path
+
+
+@pytest.fixture
+def synced_engine(tmp_path, data_path):
+    engine = new_engine(tmp_path / 'synced.db')
+    CsvSync(engine).sync(str(data_path))
+    return engine
+
+
+def test_first_sync_inserts_what_a_full_load_writes(tmp_path, synced_engine):
+    loaded_engine = new_engine(tmp_path / 'loaded.db')
+    BulkLoader(loaded_engine).load(TEST_DATA_PATH)
+
+    assert table_contents(synced_engine) == table_contents(loaded_engine)
+
+
+def test_sync_of_unchanged_files_writes_nothing(synced_engine, data_path, monkeypatch):
+    hashed = list()
+    monkeypatch.setattr(csv_sync, 'hash_passwords', lambda passwords, *args: hashed.extend(passwords) or [])
+    contents = table_contents(synced_engine)
+
+    report = CsvSync(synced_engine).sync(str(data_path))
+
+    assert report['movies'] == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 10, 'skipped': 0}
+    assert report['users'] == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 3, 'skipped': 0}
+    assert report['reviews'] == {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 3, 'skipped': 0}
+    assert hashed == []
+    assert table_contents(synced_engine) == contents
+
+
+def test_sync_applies_only_the_changed_lines(synced_engine, data_path):
+    def edit_movies(rows):
+        # Split loses its Horror genre, Mindhorn is removed
+        rows[2][2] = 'Thriller'
+        return [row for row in rows if row[1] != 'Mindhorn']
+
+    edit_csv(str(data_path / 'movies.csv'), edit_movies)
+    edit_csv(str(data_path / 'reviews.csv'), lambda rows: rows + [['4', '1', '3', 'Scary!', '7', '2020-03-01']])
+
+    report = CsvSync(synced_engine).sync(str(data_path))
+
+    assert report['movies'] == {'inserted': 0, 'updated': 1, 'deleted': 1, 'unchanged': 8, 'skipped': 0}
+    assert report['reviews'] == {'inserted': 1, 'updated': 0, 'deleted': 0, 'unchanged': 3, 'skipped': 0}
+    assert synced_engine.execute('SELECT COUNT(*) FROM movies').scalar() == 9
+    assert synced_engine.execute("SELECT COUNT(*) FROM genres WHERE name = 'Horror'").scalar() == 0
+    assert synced_engine.execute("SELECT COUNT(*) FROM directors WHERE name = 'Sean Foley'").scalar() == 0
+    assert synced_engine.execute(
+        "SELECT genres.name FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id "
+        "WHERE movie_genres.movie_id = 3").fetchall() == [('Thriller',)]
+    assert synced_engine.execute('SELECT review_text FROM reviews WHERE id = 4').scalar() == 'Scary!'
+
+
+def test_sync_rehashes_only_changed_passwords(synced_engine, data_path):
+    passwords = dict(synced_engine.execute('SELECT username, password FROM users').fetchall())
+
+    def edit_users(rows):
+        rows[0][2] = 'aNewPassword1'
+        return rows
+
+    edit_csv(str(data_path / 'users.csv'), edit_users)
+    report = CsvSync(synced_engine).sync(str(data_path))
+
+    assert report['users'] == {'inserted': 0, 'updated': 1, 'deleted': 0, 'unchanged': 2, 'skipped': 0}
+    updated_passwords = dict(synced_engine.execute('SELECT username, password FROM users').fetchall())
+    assert updated_passwords['thorke'] != passwords['thorke']
+    assert updated_passwords['fmercury'] == passwords['fmercury']
+
+
+def test_sync_keeps_rows_added_through_the_application(synced_engine, data_path):
+    synced_engine.execute("INSERT INTO users (id, username, password) VALUES (99, 'newuser', 'hash')")
+    synced_engine.execute("INSERT INTO reviews (id, user_id, movie_id, review_text, ratings, timestamp) "
+                          "VALUES (99, 99, 2, 'Great!', 9, '2020-04-01')")
+
+    report = CsvSync(synced_engine).sync(str(data_path))
+
+    assert report['users']['deleted'] == 0
+    assert report['reviews']['deleted'] == 0
+    assert synced_engine.execute('SELECT username FROM users WHERE id = 99').scalar() == 'newuser'
+    assert synced_engine.execute('SELECT review_text FROM reviews WHERE id = 99').scalar() == 'Great!'
+
+
+def test_sync_skips_lines_whose_key_is_taken_by_an_application_row(synced_engine, data_path):
+    synced_engine.execute("INSERT INTO reviews (id, user_id, movie_id, review_text, ratings, timestamp) "
+                          "VALUES (4, 2, 2, 'Mine', 8, '2020-04-01')")
+    edit_csv(str(data_path / 'reviews.csv'), lambda rows: rows + [['4', '1', '3', 'Scary!', '7', '2020-03-01']])
+
+    assert CsvSync(synced_engine).sync(str(data_path))['reviews']['skipped'] == 1
+    assert CsvSync(synced_engine).sync(str(data_path))['reviews']['skipped'] == 1
+    assert synced_engine.execute('SELECT review_text FROM reviews WHERE id = 4').scalar() == 'Mine'
+
+
+def test_sync_deletes_the_reviews_of_deleted_movies(synced_engine, data_path):
+    synced_engine.execute("INSERT INTO reviews (id, user_id, movie_id, review_text, ratings, timestamp) "
+                          "VALUES (99, 2, 3, 'Scary!', 7, '2020-04-01')")
+    edit_csv(str(data_path / 'movies.csv'), lambda rows: [row for row in rows if row[0] != '3'])
+
+    report = CsvSync(synced_engine).sync(str(data_path))
+
+    assert report['reviews']['deleted'] == 1
+    assert synced_engine.execute('SELECT COUNT(*) FROM reviews WHERE movie_id = 3').scalar() == 0
+    assert synced_engine.execute('SELECT COUNT(*) FROM reviews').scalar() == 3
+
+
+def test_first_sync_of_a_loaded_database_rewrites_it_once(tmp_path, data_path):
+    engine = new_engine(tmp_path / 'loaded.db')
+    BulkLoader(engine).load(str(data_path))
+    contents = table_contents(engine)
+
+    assert CsvSync(engine).sync(str(data_path))['movies']['updated'] == 10
+    assert CsvSync(engine).sync(str(data_path))['movies']['unchanged'] == 10
+    assert table_contents(engine) == contents
+
+
+def test_sync_keeps_the_title_search_index_up_to_date(synced_engine, data_path):
+    assert install_title_search(synced_engine)
+
+    def edit_movies(rows):
+        rows[2][1] = 'Split Decision'
+        return [row for row in rows if row[1] != 'Mindhorn']
+
+    edit_csv(str(data_path / 'movies.csv'), edit_movies)
+    CsvSync(synced_engine).sync(str(data_path))
+
+    def search(title):
+        statement, parameters = title_search_statement(title, indexed=True)
+        return [row[0] for row in synced_engine.execute(statement, parameters)]
+
+    assert search('split dec') == [3]
+    assert search('mindhorn') == []
+
+
+def test_app_started_in_sync_mode_serves_the_synced_data(tmp_path, data_path):
+    config = {
+        'TESTING': True,
+        'REPOSITORY': 'database',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///{}'.format(tmp_path / 'cs235flix-test.db'),
+        'SQLALCHEMY_ECHO': False,
+        'DATABASE_SYNC': True,
+        'TEST_DATA_PATH': str(data_path),
+        'WTF_CSRF_ENABLED': False
+    }
+    try:
+        create_app(config)
+        edit_csv(str(data_path / 'movies.csv'), lambda rows: [row for row in rows if row[1] != 'Mindhorn'])
+        client = create_app(config).test_client()
+
+        response = client.get('/movies_by_release_year?year=2016')
+        assert response.status_code == 200
+        assert b'Split' in response.data
+        assert b'Mindhorn' not in response.data
+    finally:
+        clear_mappers()
@@ -1,10 +1,13 @@
 from datetime import date, datetime
+import os
 
 import pytest
+from sqlalchemy import inspect
 
-from CS235Flix.adapters.database_repository import SqlAlchemyRepository
+from CS235Flix.adapters.catalogue import MovieCatalogue
+from CS235Flix.adapters.database_repository import QueryCounter, SqlAlchemyRepository
 from CS235Flix.domainmodel.model import User, Genre, Actor, Director, Movie, Review, make_review
-from CS235Flix.adapters.repository import RepositoryException
+from CS235Flix.adapters.repository import MovieQuery, RepositoryException
 
 
 def test_repository_can_add_a_user(session_factory):
@@ -62,6 +65,55 @@ def test_repository_can_check_existence_of_actor(session_factory):
     assert repo.check_actor_existence_in_repo(Actor("Matt Damon")) is True
 
 
+def test_repository_can_check_existence_of_director_and_movie(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    assert repo.check_director_existence_in_repo(Director("Fake Director")) is False
+    assert repo.check_director_existence_in_repo(Director("James Gunn")) is True
+    assert repo.check_movie_existence(Movie("Guardians of the Galaxy", 2015)) is False
+    assert repo.check_movie_existence(Movie("Guardians of the Galaxy", 2014)) is True
+
+
+def test_existence_checks_issue_at_most_one_query(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    counter = QueryCounter(session_factory.kw['bind'])
+    try:
+        assert repo.check_actor_existence_in_repo(Actor("Matt Damon")) is True
+        assert repo.check_genre_existence(Genre("Fake Genre")) is False
+        assert counter.count == 2
+
+        # Entities loaded through the repository's session are known to exist without asking the database
+        movie = repo.get_movie_by_index(1)
+        counter.count = 0
+        assert repo.check_movie_existence(movie) is True
+        assert repo.get_movie_release_year(movie) == 2014
+        assert counter.count == 0
+    finally:
+        counter.detach()
+
+
+def test_repository_can_retrieve_the_colleagues_of_an_actor(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    chris_pratt = repo.get_actor("Chris Pratt")
+
+    colleagues = repo.get_actor_colleague(chris_pratt)
+    assert len(colleagues) == 6
+    assert Actor("Zoe Saldana") in colleagues and Actor("Jennifer Lawrence") in colleagues
+    assert repo.get_number_of_colleagues(chris_pratt) == 6
+    assert repo.check_if_actors_worked_together(chris_pratt, Actor("Vin Diesel")) is True
+    assert repo.check_if_actors_worked_together(chris_pratt, Actor("Matt Damon")) is False
+    assert repo.get_actor_colleague(Actor("Fake Actor")) is None
+
+
+def test_repository_loads_cached_colleagues_into_the_current_session(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    repo.get_actor_colleague(repo.get_actor("Chris Pratt"))
+    repo.reset_session()
+
+    colleagues = repo.get_actor_colleague(repo.get_actor("Chris Pratt"))
+    assert len(colleagues) == 6
+    assert all(inspect(colleague).persistent for colleague in colleagues)
+
+
 def test_repository_can_retrieve_correct_actor_count(session_factory):
     repo = SqlAlchemyRepository(session_factory)
     assert repo.get_total_number_of_actors() == 39
@@ -274,6 +326,55 @@ def test_repository_returns_a_list_of_movies_by_title(session_factory):
     assert "The Lost City of Z" in list_of_movies_titles
 
 
+def test_repository_ranks_movies_by_title(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    assert [movie.id for movie in repo.search_movie_by_title("THE")] == [6, 9, 1, 2]
+
+    # Queries shorter than a trigram are answered without the full-text index
+    assert [movie.id for movie in repo.search_movie_by_title("z")] == [9]
+
+
+def test_repository_folds_non_ascii_titles_like_the_memory_repository(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    repo.add_movie(Movie('The Élite', 2019, 11))
+    repo.add_movie(Movie('Élite Squad', 2007, 12))
+
+    assert [movie.id for movie in repo.search_movie_by_title('élite')] == [12, 11]
+    assert [movie.id for movie in repo.search_movie_by_title('ÉL')] == [12, 11]
+
+
+def test_title_search_index_follows_changes_to_the_movies_table(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    assert [movie.id for movie in repo.search_movie_by_title('mindhorn')] == [8]
+    session = session_factory()
+    session.execute("UPDATE movies SET title = 'Mindhorn Returns' WHERE id = 8")
+    session.execute("DELETE FROM movie_actors WHERE movie_id = 6")
+    session.execute("DELETE FROM movie_genres WHERE movie_id = 6")
+    session.execute("DELETE FROM movies WHERE id = 6")
+    session.commit()
+
+    movie = Movie('Avengers: Endgame', 2019, 11)
+    repo.add_movie(movie)
+
+    assert [movie.id for movie in repo.search_movie_by_title('mindhorn return')] == [8]
+    assert [movie.id for movie in repo.search_movie_by_title('the')] == [9, 1, 2]
+    assert repo.search_movie_by_title('endgame') == [movie]
+
+
+def test_title_search_index_is_rebuilt_when_its_triggers_are_missing(session_factory):
+    assert [movie.id for movie in SqlAlchemyRepository(session_factory).search_movie_by_title('mindhorn')] == [8]
+    session = session_factory()
+    session.execute('DROP TRIGGER movie_title_search_update')
+    session.execute("UPDATE movies SET title = 'Mindhorn Returns' WHERE id = 8")
+    session.commit()
+
+    repo = SqlAlchemyRepository(session_factory)
+    assert [movie.id for movie in repo.search_movie_by_title('mindhorn return')] == [8]
+    session.execute("UPDATE movies SET title = 'Mindhorn' WHERE id = 8")
+    session.commit()
+    assert repo.search_movie_by_title('mindhorn return') == []
+
+
 def test_repository_can_get_the_latest_movie(session_factory):
     repo = SqlAlchemyRepository(session_factory)
     movie = repo.get_latest_movie()
@@ -318,6 +419,26 @@ def test_repository_returns_none_when_there_are_no_next_movies(session_factory):
     assert next_year is None
 
 
+def test_repository_returns_movies_of_a_year_ordered_by_title(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    titles = [movie.title for movie in repo.get_movies_by_release_year(2016)]
+    assert titles == sorted(titles)
+    assert len(titles) == 8
+
+
+def test_repository_updates_year_range_when_a_movie_is_added(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    assert repo.get_latest_year() == 2016
+
+    movie = Movie("Avengers: Endgame", 2019)
+    movie.set_description("The Avengers assemble once more.")
+    movie.set_runtime_minutes(181)
+    repo.add_movie(movie)
+
+    assert repo.get_latest_year() == 2019
+    assert repo.get_movies_by_release_year(2019) == [movie]
+
+
 def test_repository_can_retrieve_correct_movie_count(session_factory):
     repo = SqlAlchemyRepository(session_factory)
     number_of_movies = repo.get_total_number_of_movies_in_repo()
@@ -518,6 +639,18 @@ def test_repository_can_suggest_desired_movies_to_a_user(session_factory):
     assert repo.get_movie_by_index(1) in suggestions
 
 
+
+def test_repository_suggestions_follow_the_users_new_reviews(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    user = repo.get_user('thorke')
+    split = repo.get_movie_by_index(3)
+    assert repo.get_suggestion_for_user('thorke') == [repo.get_movie_by_index(1)]
+
+    repo.add_review(make_review(review_text="Tense", user=user, movie=split, rating=10))
+
+    assert repo.get_suggestion_for_user('thorke') == [repo.get_movie_by_index(1), repo.get_movie_by_index(3)]
+    assert repo.get_suggestion_for_user('fakeuser') == []
+
 def test_earliest_year(session_factory):
     repo = SqlAlchemyRepository(session_factory)
     assert repo.get_earliest_year() == 2012
@@ -525,4 +658,105 @@ def test_earliest_year(session_factory):
 
 def test_latest_year(session_factory):
     repo = SqlAlchemyRepository(session_factory)
-    assert repo.get_latest_year() == 2016
\ No newline at end of file
+    assert repo.get_latest_year() == 2016
+
+def test_repository_exposes_a_columnar_catalogue(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    catalogue = repo.get_catalogue()
+
+    assert len(catalogue) == repo.get_total_number_of_movies_in_repo()
+    assert catalogue.top_k('revenue', 2) == [1, 5]
+    assert catalogue.year_histogram() == {2012: 1, 2014: 1, 2016: 8}
+    assert catalogue.movie_ids_for_genre('Fantasy') == [5, 6]
+    # Ratings are not stored in the database
+    assert catalogue.value(1, 'rating') is None
+
+
+def test_repository_answers_revenue_year_runtime_and_genre_queries_from_the_catalogue(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    repo.set_catalogue(MovieCatalogue.from_csv(os.path.join('Tests', 'data', 'database', 'movies.csv')))
+    assert repo.get_catalogue().value(1, 'rating') == 8.1
+    assert repo.get_catalogue().value(8, 'revenue') is None
+
+    counter = QueryCounter(session_factory.kw['bind'])
+    try:
+        assert repo.get_earliest_year() == 2012
+        assert repo.get_latest_year() == 2016
+        assert repo.get_release_year_of_previous_movie(repo.get_movie_by_index(3)) == 2014
+        assert repo.get_movie_indexes_for_genre('Comedy') == [4, 7, 8]
+        assert repo.count(MovieQuery.genre('Comedy')) == 3
+        assert repo.count(MovieQuery.release_year(2016)) == 8
+        assert counter.count == 1
+    finally:
+        counter.detach()
+
+    assert [movie.id for movie in repo.get_top_6_highest_revenue_movies()] == [1, 5, 4, 7, 3, 2]
+    assert [movie.id for movie in repo.get_movies_by_runtime(100, 110)] == [4, 6]
+
+    movie = Movie('Moana', 2017, 11)
+    movie.set_runtime_minutes(107)
+    repo.add_movie(movie)
+    assert repo.get_latest_year() == 2017
+    assert [movie.id for movie in repo.get_movies_by_runtime(100, 110)] == [4, 6, 11]
+
+
+def test_repository_pages_through_the_movies_of_a_genre(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+
+    query = MovieQuery.genre('Action')
+    first_page = repo.page(query, limit=3)
+    assert [movie.id for movie in first_page.movies] == [1, 5, 6]
+    assert (first_page.has_previous, first_page.has_next) == (False, True)
+
+    second_page = repo.page(query, first_page.last_key, 3)
+    assert [movie.id for movie in second_page.movies] == [9]
+    assert (second_page.has_previous, second_page.has_next) == (True, False)
+
+    previous_page = repo.page(query, second_page.first_key, 3, reverse=True)
+    assert previous_page.keys == first_page.keys
+    assert (previous_page.has_previous, previous_page.has_next) == (False, True)
+    assert [movie.id for movie in repo.page(query, limit=3, reverse=True).movies] == [5, 6, 9]
+    assert repo.count(query) == 4
+
+
+def test_repository_pages_through_years_and_searches_in_list_order(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+
+    query = MovieQuery.release_year(2016)
+    titles = list()
+    page = repo.page(query, limit=3)
+    titles.extend(movie.title for movie in page.movies)
+    while page.has_next:
+        page = repo.page(query, page.last_key, 3)
+        titles.extend(movie.title for movie in page.movies)
+    assert titles == [movie.title for movie in repo.get_movies_by_release_year(2016)]
+
+    title_query = MovieQuery.title('the')
+    first_page = repo.page(title_query, limit=2)
+    second_page = repo.page(title_query, first_page.last_key, 2)
+    assert [movie.id for movie in first_page.movies + second_page.movies] == \
+        [movie.id for movie in repo.search_movie_by_title('the')]
+    assert repo.count(title_query) == 4
+
+    assert [movie.id for movie in repo.page(MovieQuery.actor('chris pratt')).movies] == [1, 10]
+    assert [movie.id for movie in
+            repo.page(MovieQuery.actor_and_director('Ryan Gosling', 'Damien Chazelle')).movies] == [7]
+    assert repo.page(MovieQuery.director('Fake Director')).movies == []
+
+
+def test_repository_caches_counts_until_the_catalogue_changes(session_factory):
+    repo = SqlAlchemyRepository(session_factory)
+    query = MovieQuery.title('the')
+    assert repo.count(query) == 4
+
+    counter = QueryCounter(session_factory.kw['bind'])
+    try:
+        assert repo.count(query) == 4
+        assert counter.count == 0
+
+        repo.add_movie(Movie('The Avengers', 2012, 1001))
+        counter.count = 0
+        assert repo.count(query) == 5
+        assert counter.count == 1
+    finally:
+        counter.detach()
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy.orm import clear_mappers
+
+from CS235Flix import create_app
+from CS235Flix.adapters.database_repository import QueryCounter, SqlAlchemyRepository
+from CS235Flix.adapters.repository import LOAD_ADMIN, LOAD_DETAIL
+from CS235Flix.movies import services as movies_services
+
+
+def count_queries(engine, action):
+    counter = QueryCounter(engine)
+    try:
+        action()
+    finally:
+        counter.detach()
+    return counter.count
+
+
+def test_detail_profile_loads_a_page_of_movies_in_a_fixed_number_of_queries(session_factory):
+    engine = session_factory.kw['bind']
+
+    def queries_for(movie_ids):
+        repo = SqlAlchemyRepository(session_factory)
+        return count_queries(engine, lambda: movies_services.get_movies_by_id(movie_ids, repo))
+
+    assert queries_for([1, 2]) == queries_for(list(range(1, 11)))
+
+
+def test_lazy_loading_queries_grow_with_the_number_of_movies(session_factory):
+    engine = session_factory.kw['bind']
+
+    def queries_for(movie_ids):
+        repo = SqlAlchemyRepository(session_factory)
+        return count_queries(engine, lambda: movies_services.movies_to_dict(repo.get_movies_by_index(movie_ids)))
+
+    assert queries_for([1, 2]) < queries_for(list(range(1, 11)))
+
+
+def test_eager_loaded_movies_match_lazily_loaded_movies(session_factory):
+    lazy_movies = movies_services.movies_to_dict(SqlAlchemyRepository(session_factory).get_movies_by_index([1, 5]))
+    eager_movies = movies_services.movies_to_dict(
+        SqlAlchemyRepository(session_factory).get_movies_by_index([1, 5], load=LOAD_DETAIL))
+    assert eager_movies == lazy_movies
+
+
+def test_admin_profile_matches_lazily_loaded_movies(session_factory):
+    admin = movies_services.ADMIN
+    lazy_movies = movies_services.movies_to_dict(
+        SqlAlchemyRepository(session_factory).get_movies_by_index([1, 5]), admin)
+    eager_movies = movies_services.movies_to_dict(
+        SqlAlchemyRepository(session_factory).get_movies_by_index([1, 5], load=LOAD_ADMIN), admin)
+    assert eager_movies == lazy_movies
+
+
+def test_unknown_loading_profile_is_rejected(session_factory):
+    with pytest.raises(ValueError):
+        SqlAlchemyRepository(session_factory).get_movies_by_index([1], load='everything')
+
+
+@pytest.fixture
+def database_client(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'REPOSITORY': 'database',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///{}'.format(tmp_path / 'cs235flix-test.db'),
+        'SQLALCHEMY_ECHO': False,
+        'SQLALCHEMY_RECORD_QUERIES': True,
+        'TEST_DATA_PATH': 'Tests/data/database',
+        'WTF_CSRF_ENABLED': False,
+        # Measure the queries of rendering the pages rather than of serving them from the response cache
+        'RESPONSE_CACHE_BACKEND': 'none'
+    })
+    yield app.test_client()
+    clear_mappers()
+
+
+def test_pages_of_movies_cost_the_same_number_of_queries_per_request(database_client):
+    def query_count(url):
+        response = database_client.get(url)
+        assert response.status_code == 200
+        return int(response.headers['X-Query-Count'])
+
+    # Warm up the release year index, which is built on first use, and the counts of the lists, which are cached
+    for url in ['/movies_by_release_year?year=2014', '/movies_by_release_year?year=2016',
+                '/movies_by_genre?genre=Horror', '/movies_by_genre?genre=Adventure']:
+        query_count(url)
+
+    # One movie was released in 2014 and eight in 2016
+    assert query_count('/movies_by_release_year?year=2014') == query_count('/movies_by_release_year?year=2016')
+    # Horror classifies one movie and Adventure seven
+    assert query_count('/movies_by_genre?genre=Horror') == query_count('/movies_by_genre?genre=Adventure')
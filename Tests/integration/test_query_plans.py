@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+import re
+
+import pytest
+from sqlalchemy import event
+
+from CS235Flix.adapters.database_repository import SqlAlchemyRepository
+from CS235Flix.adapters.repository import MovieQuery
+from CS235Flix.domainmodel.model import Actor, Director, Genre, Movie
+
+
+@contextmanager
+def recorded_selects(engine):
+    statements = list()
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def scanned_tables(engine, statement, parameters):
+    """ Returns the tables that the EXPLAIN QUERY PLAN steps of statement read from end to end, directly or through one
+        of their indexes, rather than searching them. Full-text searches through a MATCH constraint count as searches.
+    """
+    plan = engine.execute('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    scanned = list()
+    for detail in (row[-1] for row in plan):
+        if not detail.startswith('SCAN') or 'CONSTANT ROW' in detail or VIRTUAL_TABLE_SEARCH.search(detail):
+            continue
+        words = detail.split()
+        scanned.append(words[2] if words[1] == 'TABLE' else words[1])
+    return scanned
+
+
+# A virtual table scan with a non-empty index string is the module searching its own index, e.g. fts5's MATCH
+VIRTUAL_TABLE_SEARCH = re.compile(r'VIRTUAL TABLE INDEX \d+:\S')
+
+# The queries that are meant to read a whole table, by the tables each of them may scan. Every other query may only
+# search tables and indexes
+YEAR_INDEX_SCANS = {'movies'}  # the release year index is loaded from the release year and title of every movie
+# Without a catalogue set by create_app, the repository loads one from every movie and every movie's genres before
+# answering the queries that go through it
+CATALOGUE_SCANS = {'movies', 'movie_genres'}
+ALLOWED_SCANS = {
+    'get_year_index': YEAR_INDEX_SCANS,
+    'get_movies_by_release_year': YEAR_INDEX_SCANS,
+    'get_catalogue': CATALOGUE_SCANS,
+    'get_release_year_of_previous_movie': CATALOGUE_SCANS,
+    'get_release_year_of_next_movie': CATALOGUE_SCANS,
+    'get_earliest_year': CATALOGUE_SCANS,
+    'get_latest_year': CATALOGUE_SCANS,
+    'get_top_6_highest_revenue_movies': CATALOGUE_SCANS,
+    'get_movies_by_runtime': CATALOGUE_SCANS,
+    'get_movie_indexes_for_genre': CATALOGUE_SCANS,
+    'count of a genre': CATALOGUE_SCANS,
+    'count of a year': CATALOGUE_SCANS,
+    'genre movies query': CATALOGUE_SCANS,
+    # Queries shorter than a trigram cannot use the full-text index and fall back to a scan of the titles
+    'search_movie_by_title, shorter than a trigram': {'movies'},
+}
+
+REPOSITORY_QUERIES = {
+    'get_user': lambda repo: repo.get_user('thorke'),
+    'get_user_reviews': lambda repo: repo.get_user_reviews(repo.get_user('thorke')),
+    'get_actor': lambda repo: repo.get_actor('Chris Pratt'),
+    'get_director': lambda repo: repo.get_director('James Gunn'),
+    'get_genre': lambda repo: repo.get_genre('Action'),
+    'get_movie': lambda repo: repo.get_movie('Split', 2016),
+    'get_movie_by_index': lambda repo: repo.get_movie_by_index(3),
+    'get_movies_by_index': lambda repo: repo.get_movies_by_index([1, 2, 3]),
+    'get_movie_genres': lambda repo: repo.get_movie_genres(repo.get_movie_by_index(1)),
+    'get_movie_actors': lambda repo: list(repo.get_movie_actors(repo.get_movie_by_index(1))),
+    'get_movie_director': lambda repo: repo.get_movie_director(repo.get_movie_by_index(1)),
+    'get_movie_reviews': lambda repo: list(repo.get_movie_reviews(repo.get_movie_by_index(1))),
+    'get_movies_played_by_an_actor': lambda repo: repo.get_movies_played_by_an_actor('Chris Pratt'),
+    'get_movies_directed_by_a_director': lambda repo: repo.get_movies_directed_by_a_director('Ridley Scott'),
+    'get_top_6_highest_revenue_movies': lambda repo: repo.get_top_6_highest_revenue_movies(),
+    'get_movies_by_runtime': lambda repo: repo.get_movies_by_runtime(100, 120),
+    'get_latest_movie': lambda repo: repo.get_latest_movie(),
+    'get_oldest_movie': lambda repo: repo.get_oldest_movie(),
+    'get_movie_indexes_for_genre': lambda repo: repo.get_movie_indexes_for_genre('Action'),
+    'co-star query': lambda repo: repo._query_co_stars('Chris Pratt'),
+    'user affinity query': lambda repo: repo._query_user_affinity('thorke'),
+    'check_actor_existence_in_repo': lambda repo: repo.check_actor_existence_in_repo(Actor('Matt Damon')),
+    'check_director_existence_in_repo': lambda repo: repo.check_director_existence_in_repo(Director('James Gunn')),
+    'check_genre_existence': lambda repo: repo.check_genre_existence(Genre('Action')),
+    'check_movie_existence': lambda repo: repo.check_movie_existence(Movie('Split', 2016)),
+    'page of a genre': lambda repo: repo.page(MovieQuery.genre('Action'), (1,), 2, reverse=True),
+    'page of a year': lambda repo: repo.page(MovieQuery.release_year(2016), ('La La Land', 7), 2),
+    'page of an actor': lambda repo: repo.page(MovieQuery.actor('Chris Pratt'), (1,), 2),
+    'page of a director': lambda repo: repo.page(MovieQuery.director('Ridley Scott'), (1,), 2),
+    'page of an actor and director': lambda repo: repo.page(
+        MovieQuery.actor_and_director('Chris Pratt', 'James Gunn'), (1,), 2),
+    'page of a title search': lambda repo: repo.page(MovieQuery.title('the'), None, 2),
+    'count of a genre': lambda repo: repo.count(MovieQuery.genre('Action')),
+    'count of a year': lambda repo: repo.count(MovieQuery.release_year(2016)),
+    'count of an actor': lambda repo: repo.count(MovieQuery.actor('Chris Pratt')),
+    'count of a director': lambda repo: repo.count(MovieQuery.director('Ridley Scott')),
+    'count of a title search': lambda repo: repo.count(MovieQuery.title('the')),
+    'search_movie_by_title': lambda repo: repo.search_movie_by_title('guardians'),
+    'search_movie_by_title, shorter than a trigram': lambda repo: repo.search_movie_by_title('th'),
+    'search_movies_by_actor_and_director': lambda repo: repo.search_movies_by_actor_and_director('Chris Pratt',
+                                                                                                  'James Gunn'),
+    'get_movies_by_release_year': lambda repo: repo.get_movies_by_release_year(2016),
+    'get_year_index': lambda repo: repo.get_year_index(),
+    'get_release_year_of_previous_movie': lambda repo: repo.get_release_year_of_previous_movie(
+        repo.get_movie_by_index(1)),
+    'get_release_year_of_next_movie': lambda repo: repo.get_release_year_of_next_movie(repo.get_movie_by_index(1)),
+    'get_earliest_year': lambda repo: repo.get_earliest_year(),
+    'get_latest_year': lambda repo: repo.get_latest_year(),
+    'get_catalogue': lambda repo: repo.get_catalogue(),
+    'genre movies query': lambda repo: list(repo._genre_movies()),
+}
+
+
+@pytest.mark.parametrize('query_name', sorted(REPOSITORY_QUERIES))
+def test_repository_queries_use_indexes(session_factory, query_name):
+    repo = SqlAlchemyRepository(session_factory)
+    engine = session_factory.kw['bind']
+
+    with recorded_selects(engine) as statements:
+        REPOSITORY_QUERIES[query_name](repo)
+
+    assert len(statements) > 0
+    for statement, parameters in statements:
+        assert set(scanned_tables(engine, statement, parameters)) <= ALLOWED_SCANS.get(query_name, set()), statement
@@ -0,0 +1,81 @@
+""" Latency benchmark for searching movies by title.
+
+Builds catalogues of synthetic three-word titles of growing size and reports the milliseconds per search for the
+full title of one movie, in memory and in SQLite, before and after the title index:
+  - memory scan:  the previous MemoryRepository search, lowering every title per query
+  - memory index: TitleSearchIndex
+  - sqlite like:  the previous SqlAlchemyRepository search, title LIKE '%x%'
+  - sqlite fts5:  the ranked statement over the trigram FTS5 table
+
+Run from the project root:
+    python -m benchmarks.title_search --sizes 10000 100000 1000000
+
+From 10,000 to 1,000,000 titles the scan grew from 1.6 ms to 176 ms and LIKE from 1.5 ms to 160 ms per search, while
+the index stayed at 0.02 to 0.04 ms in memory and 0.4 to 1.9 ms in SQLite. Searches matching many titles cost in
+proportion to the matches they rank.
+"""
+
+import argparse
+import random
+import string
+import time
+
+from sqlalchemy import create_engine
+
+from CS235Flix.adapters.indexes import TitleSearchIndex
+from CS235Flix.adapters.title_search import install_title_search, title_search_statement
+
+
+
+def synthetic_titles(number_of_titles: int) -> list:
+    randomiser = random.Random(235)
+    words = [''.join(randomiser.choice(string.ascii_lowercase) for _ in range(randomiser.randint(3, 9)))
+             for _ in range(20000)]
+    return [' '.join(randomiser.choice(words) for _ in range(3)).title() for _ in range(number_of_titles)]
+
+
+def milliseconds_per_call(function, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def run(sizes, repeats: int):
+    print('{:>10} {:>14} {:>14} {:>14} {:>14} {:>8}'.format('titles', 'memory scan', 'memory index', 'sqlite like',
+                                                             'sqlite fts5', 'matches'))
+    for size in sizes:
+        titles = synthetic_titles(size)
+        query = titles[size // 2].lower()
+
+        title_index = TitleSearchIndex()
+        for movie_id, title in enumerate(titles, start=1):
+            title_index.add(movie_id, title)
+
+        engine = create_engine('sqlite://')
+        engine.execute('CREATE TABLE movies (id INTEGER PRIMARY KEY, title VARCHAR(255))')
+        connection = engine.raw_connection()
+        connection.executemany('INSERT INTO movies (id, title) VALUES (?, ?)', enumerate(titles, start=1))
+        connection.commit()
+        install_title_search(engine)
+        indexed_statement = title_search_statement(query, indexed=True)
+
+        timings = [
+            milliseconds_per_call(lambda: [title for title in titles if query.lower() in title.lower()], repeats),
+            milliseconds_per_call(lambda: title_index.search(query), repeats),
+            milliseconds_per_call(lambda: engine.execute('SELECT id FROM movies WHERE title LIKE ?',
+                                                         '%{}%'.format(query)).fetchall(), repeats),
+            milliseconds_per_call(lambda: engine.execute(*indexed_statement).fetchall(), repeats),
+        ]
+        print('{:>10} {:>14.3f} {:>14.3f} {:>14.3f} {:>14.3f} {:>8}'.format(size, *timings,
+                                                                              len(title_index.search(query))))
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report the latency of title searches as the catalogue grows')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='numbers of synthetic titles to search')
+    parser.add_argument('--repeats', type=int, default=20, help='searches timed per measurement')
+    arguments = parser.parse_args()
+    run(arguments.sizes, arguments.repeats)
@@ -18,5 +18,55 @@ class Config:
     SQLALCHEMY_DATABASE_URI = environ.get('SQLALCHEMY_DATABASE_URI')
     SQLALCHEMY_ECHO = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool: 'queue', 'singleton' or 'null'. When unset, in-memory SQLite databases use 'singleton' and
+    # every other database 'queue'. A queue pool keeps SQLALCHEMY_POOL_SIZE connections, opens up to
+    # SQLALCHEMY_MAX_OVERFLOW more under load and lets a request wait SQLALCHEMY_POOL_TIMEOUT seconds for one
+    SQLALCHEMY_POOL_CLASS = environ.get('SQLALCHEMY_POOL_CLASS')
+    SQLALCHEMY_POOL_SIZE = int(environ.get('SQLALCHEMY_POOL_SIZE', 5))
+    SQLALCHEMY_MAX_OVERFLOW = int(environ.get('SQLALCHEMY_MAX_OVERFLOW', 10))
+    SQLALCHEMY_POOL_TIMEOUT = float(environ.get('SQLALCHEMY_POOL_TIMEOUT', 30))
+    # Count the statements each request executes and report them in an X-Query-Count response header
+    SQLALCHEMY_RECORD_QUERIES = environ.get('SQLALCHEMY_RECORD_QUERIES') == 'True'
 
     REPOSITORY = environ.get('REPOSITORY')
+
+    # Number of processes used while populating a repository, to parse movies.csv (memory repository) and to hash
+    # the plain passwords of users.csv
+    POPULATE_WORKERS = int(environ.get('POPULATE_WORKERS', 1))
+
+    # Whether users.csv may hold passwords hashed already, which are then stored as they are. Otherwise every password
+    # in it is taken as plain and hashed, even one that looks like a hash
+    PASSWORDS_PRE_HASHED = environ.get('PASSWORDS_PRE_HASHED') == 'True'
+
+    # Rows of a CSV file written to the database per transaction while populating it
+    POPULATE_BATCH_SIZE = int(environ.get('POPULATE_BATCH_SIZE', 10000))
+
+    # Bring the database in line with the CSV files on every start by applying only the rows that changed, instead of
+    # populating it from scratch when testing or when it is empty
+    DATABASE_SYNC = environ.get('DATABASE_SYNC') == 'True'
+
+    # File the populated memory repository is snapshotted to and restored from while the CSV files are unchanged.
+    # Snapshots are disabled when unset
+    MEMORY_SNAPSHOT_PATH = environ.get('MEMORY_SNAPSHOT_PATH')
+
+    # The sidebar of every page picks its random movies from a pool of SIDEBAR_POOL_SIZE movies, which is sampled
+    # afresh in the background once it is SIDEBAR_ROTATE_SECONDS old
+    SIDEBAR_POOL_SIZE = int(environ.get('SIDEBAR_POOL_SIZE', 100))
+    SIDEBAR_ROTATE_SECONDS = float(environ.get('SIDEBAR_ROTATE_SECONDS', 300))
+
+    # Cover art of the home page: 'imdb' looks the covers up on IMDb, 'local' reads them from the CSV file
+    # COVER_ART_FILE (id and cover_url columns). Covers are cached for COVER_ART_TTL_SECONDS and persisted to
+    # COVER_ART_CACHE_PATH; the cache is kept in memory only when unset
+    COVER_ART_PROVIDER = environ.get('COVER_ART_PROVIDER', 'imdb')
+    COVER_ART_FILE = environ.get('COVER_ART_FILE')
+    COVER_ART_CACHE_PATH = environ.get('COVER_ART_CACHE_PATH')
+    COVER_ART_TTL_SECONDS = float(environ.get('COVER_ART_TTL_SECONDS', 7 * 24 * 3600))
+
+    # Pages browsing the catalogue are cached by RESPONSE_CACHE_BACKEND: 'lru' (in process, up to
+    # RESPONSE_CACHE_MAX_ENTRIES pages), 'redis' or 'none'. The 'redis' backend connects to RESPONSE_CACHE_REDIS_URL,
+    # or uses an in-process stand-in when it is unset. Processes sharing a Redis server do not serve each other's pages,
+    # as only the process that rendered a page can tell when it goes stale. Pages are kept up to RESPONSE_CACHE_TTL_SECONDS
+    RESPONSE_CACHE_BACKEND = environ.get('RESPONSE_CACHE_BACKEND', 'lru')
+    RESPONSE_CACHE_MAX_ENTRIES = int(environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_REDIS_URL = environ.get('RESPONSE_CACHE_REDIS_URL')
+    RESPONSE_CACHE_TTL_SECONDS = float(environ.get('RESPONSE_CACHE_TTL_SECONDS', 600))